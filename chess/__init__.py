@@ -14,15 +14,18 @@ __email__ = "niklas.fiekas@backscattering.de"
 __version__ = "1.11.2"
 
 import collections
-import copy
+import contextlib
+import contextvars
 import dataclasses
 import enum
+import functools
 import math
+import os
 import re
 import itertools
 import typing
 
-from typing import ClassVar, Callable, Counter, Dict, Hashable, Iterable, Iterator, List, Literal, Mapping, Optional, SupportsInt, Tuple, Type, TypeVar, Union
+from typing import Any, ClassVar, Callable, Counter, Dict, Hashable, Iterable, Iterator, List, Literal, Mapping, Optional, SupportsInt, Tuple, Type, TypeVar, Union
 
 if typing.TYPE_CHECKING:
     from typing_extensions import Self, TypeAlias
@@ -1650,6 +1653,15 @@ class _BoardState:
         board.halfmove_clock = self.halfmove_clock
         board.fullmove_number = self.fullmove_number
 
+class _FrozenStack:
+    # An immutable segment at the bottom of the move stack, shared between
+    # copies of a board. Holds one list for each of Board._stacks.
+
+    def __init__(self, parent: Optional[_FrozenStack], stacks: Tuple[List[Any], ...]) -> None:
+        self.parent = parent
+        self.stacks = stacks
+        self.length: int = (parent.length if parent is not None else 0) + len(stacks[0])
+
 class Board(BaseBoard):
     """
     A :class:`~chess.BaseBoard`, additional information representing
@@ -1751,14 +1763,7 @@ class Board(BaseBoard):
     represented as king moves to the corresponding rook square.
     """
 
-    move_stack: List[Move]
-    """
-    The move stack. Use :func:`Board.push() <chess.Board.push()>`,
-    :func:`Board.pop() <chess.Board.pop()>`,
-    :func:`Board.peek() <chess.Board.peek()>` and
-    :func:`Board.clear_stack() <chess.Board.clear_stack()>` for
-    manipulation.
-    """
+    _stacks: ClassVar[Tuple[str, ...]] = ("_moves", "_stack")
 
     def __init__(self, fen: Optional[str] = STARTING_FEN, *, chess960: bool = False) -> None:
         BaseBoard.__init__(self, None)
@@ -1766,8 +1771,9 @@ class Board(BaseBoard):
         self.chess960 = chess960
 
         self.ep_square = None
-        self.move_stack = []
+        self._moves: List[Move] = []
         self._stack: List[_BoardState] = []
+        self._frozen: Optional[_FrozenStack] = None
 
         if fen is None:
             self.clear()
@@ -1847,13 +1853,75 @@ class Board(BaseBoard):
         super().clear_board()
         self.clear_stack()
 
+    @property
+    def move_stack(self) -> List[Move]:
+        """
+        The move stack. Use :func:`Board.push() <chess.Board.push()>`,
+        :func:`Board.pop() <chess.Board.pop()>`,
+        :func:`Board.peek() <chess.Board.peek()>` and
+        :func:`Board.clear_stack() <chess.Board.clear_stack()>` for
+        manipulation.
+
+        Moves pushed before the last :func:`Board.copy() <chess.Board.copy()>`
+        are shared with the copy, and collected into a new list the first
+        time this is accessed.
+        """
+        self._thaw()
+        return self._moves
+
+    @move_stack.setter
+    def move_stack(self, move_stack: List[Move]) -> None:
+        self._thaw()
+        self._moves = move_stack
+
     def clear_stack(self) -> None:
         """Clears the move stack."""
-        self.move_stack.clear()
-        self._stack.clear()
+        for name in self._stacks:
+            setattr(self, name, [])
+        self._frozen = None
+
+    def _freeze(self) -> None:
+        # Turns the stacks into an immutable segment, that can be shared
+        # with copies of the board.
+        if self._moves:
+            self._frozen = _FrozenStack(self._frozen, tuple(getattr(self, name) for name in self._stacks))
+            for name in self._stacks:
+                setattr(self, name, [])
+
+    def _thaw(self) -> None:
+        # Collects all shared segments into stacks owned by the board.
+        if self._frozen is not None:
+            segments: List[_FrozenStack] = []
+            frozen: Optional[_FrozenStack] = self._frozen
+            while frozen is not None:
+                segments.append(frozen)
+                frozen = frozen.parent
+            for i, name in enumerate(self._stacks):
+                stack = [item for segment in reversed(segments) for item in segment.stacks[i]]
+                stack.extend(getattr(self, name))
+                setattr(self, name, stack)
+            self._frozen = None
+
+    def _thaw_top(self) -> None:
+        # Copies only the topmost shared segment, to pop from it.
+        assert self._frozen is not None and not self._moves
+        for name, stack in zip(self._stacks, self._frozen.stacks):
+            setattr(self, name, stack[:])
+        self._frozen = self._frozen.parent
+
+    def _stack_size(self) -> int:
+        return len(self._moves) + (self._frozen.length if self._frozen is not None else 0)
+
+    def _reversed_states(self) -> Iterator[_BoardState]:
+        yield from reversed(self._stack)
+        frozen = self._frozen
+        while frozen is not None:
+            yield from reversed(frozen.stacks[1])
+            frozen = frozen.parent
 
     def root(self) -> Self:
         """Returns a copy of the root position."""
+        self._thaw()
         if self._stack:
             board = type(self)(None, chess960=self.chess960)
             self._stack[0].restore(board)
@@ -2076,6 +2144,8 @@ class Board(BaseBoard):
 
     def is_legal(self, move: Move) -> bool:
         """Check if a move is legal in the current position."""
+        if _instrumentation_used:
+            _count("legality_checks")
         return not self.is_variant_end() and self.is_pseudo_legal(move) and not self.is_into_check(move)
 
     def is_variant_end(self) -> bool:
@@ -2326,7 +2396,7 @@ class Board(BaseBoard):
 
         # Count positions.
         switchyard: List[Move] = []
-        while self.move_stack:
+        while self._stack_size():
             move = self.pop()
             switchyard.append(move)
 
@@ -2368,7 +2438,7 @@ class Board(BaseBoard):
         """
         # Fast check, based on occupancy only.
         maybe_repetitions = 1
-        for state in reversed(self._stack):
+        for state in self._reversed_states():
             if state.occupied == self.occupied:
                 maybe_repetitions += 1
                 if maybe_repetitions >= count:
@@ -2385,7 +2455,7 @@ class Board(BaseBoard):
                 if count <= 1:
                     return True
 
-                if len(self.move_stack) < count - 1:
+                if self._stack_size() < count - 1:
                     break
 
                 move = self.pop()
@@ -2428,11 +2498,14 @@ class Board(BaseBoard):
             responsibility to ensure that the move is at least pseudo-legal or
             a null move.
         """
+        if _instrumentation_used:
+            _count("push")
+
         # Push move and remember board state.
         move = self._to_chess960(move)
         board_state = _BoardState(self)
         self.castling_rights = self.clean_castling_rights()  # Before pushing stack
-        self.move_stack.append(self._from_chess960(self.chess960, move.from_square, move.to_square, move.promotion, move.drop))
+        self._moves.append(self._from_chess960(self.chess960, move.from_square, move.to_square, move.promotion, move.drop))
         self._stack.append(board_state)
 
         # Reset en passant square.
@@ -2532,7 +2605,13 @@ class Board(BaseBoard):
 
         :raises: :exc:`IndexError` if the move stack is empty.
         """
-        move = self.move_stack.pop()
+        if _instrumentation_used:
+            _count("pop")
+
+        if self._frozen is not None and not self._moves:
+            self._thaw_top()
+
+        move = self._moves.pop()
         self._stack.pop().restore(self)
         return move
 
@@ -2542,7 +2621,9 @@ class Board(BaseBoard):
 
         :raises: :exc:`IndexError` if the move stack is empty.
         """
-        return self.move_stack[-1]
+        if self._frozen is not None and not self._moves:
+            return typing.cast(Move, self._frozen.stacks[0][-1])
+        return self._moves[-1]
 
     def find_move(self, from_square: Square, to_square: Square, promotion: Optional[PieceType] = None) -> Move:
         """
@@ -2664,6 +2745,8 @@ class Board(BaseBoard):
         :raises: :exc:`ValueError` if syntactically invalid. Use
             :func:`~chess.Board.is_valid()` to detect invalid positions.
         """
+        if _instrumentation_used:
+            _count("fen_parses")
         parts = fen.split()
 
         # Board part.
@@ -3234,6 +3317,9 @@ class Board(BaseBoard):
             - :exc:`IllegalMoveError` if the SAN is illegal.
             - :exc:`AmbiguousMoveError` if the SAN is ambiguous.
         """
+        if _instrumentation_used:
+            _count("san_parses")
+
         # Castling.
         try:
             if san in ["O-O", "O-O+", "O-O#", "0-0", "0-0+", "0-0#"]:
@@ -3462,7 +3548,7 @@ class Board(BaseBoard):
         Returns valid castling rights filtered from
         :data:`~chess.Board.castling_rights`.
         """
-        if self._stack:
+        if self._stack or self._frozen is not None:
             # No new castling rights are assigned in a game, so we can assume
             # they were filtered already.
             return self.castling_rights
@@ -3806,6 +3892,10 @@ class Board(BaseBoard):
                     yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
 
     def generate_legal_moves(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move]:
+        moves = self._generate_legal_moves(from_mask, to_mask)
+        return _count_items("generated_moves", moves) if _instrumentation_used else moves
+
+    def _generate_legal_moves(self, from_mask: Bitboard, to_mask: Bitboard) -> Iterator[Move]:
         if self.is_variant_end():
             return
 
@@ -3919,7 +4009,7 @@ class Board(BaseBoard):
         return chess.svg.board(
             board=self,
             size=390,
-            lastmove=self.peek() if self.move_stack else None,
+            lastmove=self.peek() if self._stack_size() else None,
             check=self.king(self.turn) if self.is_check() else None)
 
     def __eq__(self, board: object) -> bool:
@@ -3968,6 +4058,11 @@ class Board(BaseBoard):
 
         Defaults to copying the entire move stack. Alternatively, *stack* can
         be ``False``, or an integer to copy a limited number of moves.
+
+        Copying the entire move stack is `O(1)`: The moves are shared between
+        both boards as an immutable prefix, and moves pushed afterwards are
+        kept separately on each board. Popping a move from the shared prefix
+        copies only the moves pushed between the last two copies.
         """
         board = super().copy()
 
@@ -3979,9 +4074,11 @@ class Board(BaseBoard):
         board.fullmove_number = self.fullmove_number
         board.halfmove_clock = self.halfmove_clock
 
-        if stack:
-            stack = len(self.move_stack) if stack is True else stack
-            board.move_stack = [copy.copy(move) for move in self.move_stack[-stack:]]
+        if stack is True or (stack and stack >= self._stack_size()):
+            self._freeze()
+            board._frozen = self._frozen
+        elif stack:
+            board.move_stack = self.move_stack[-stack:]
             board._stack = self._stack[-stack:]
 
         return board
@@ -4410,3 +4507,102 @@ class SquareSet:
         True
         """
         return cls(BB_SQUARES[square])
+
+
+_instrumentation_used = False
+_instrumentation_counters: contextvars.ContextVar[Optional[Counter[str]]] = contextvars.ContextVar("chess_instrumentation_counters", default=None)
+
+def _count(counter: str) -> None:
+    # Instrumented functions call this only if instrumentation has ever been
+    # enabled, so that there is no context lookup otherwise.
+    counters = _instrumentation_counters.get()
+    if counters is not None:
+        counters[counter] += 1
+
+def _count_items(counter: str, items: Iterator[Move]) -> Iterator[Move]:
+    counters = _instrumentation_counters.get()
+    if counters is None:
+        yield from items
+    else:
+        for item in items:
+            counters[counter] += 1
+            yield item
+
+def set_instrumentation(enabled: bool) -> None:
+    """
+    Enables or disables counting of library operations: ``push``, ``pop``,
+    ``generated_moves`` (legal moves generated), ``legality_checks``,
+    ``san_parses``, ``fen_parses``, ``syzygy_probes`` (table probes),
+    ``decompressed_blocks`` (Syzygy and Gaviota) and ``engine_lines``
+    (lines received from engines).
+
+    Counters belong to the current :mod:`context <contextvars>`, i.e., the
+    current thread or asyncio task. Operations in other threads and tasks
+    are not counted, unless they enable instrumentation themselves.
+
+    Counting applies to the implementations in :class:`chess.Board` and
+    the respective modules. Variant boards that override these methods
+    without calling them are not counted.
+
+    Instrumentation can also be enabled by setting the environment variable
+    ``PYTHON_CHESS_INSTRUMENTATION=1`` before importing :mod:`chess`, in the
+    context that imports it. Until instrumentation is enabled for the first
+    time, instrumented functions do not even look up the current context.
+    """
+    global _instrumentation_used
+
+    if not enabled:
+        _instrumentation_counters.set(None)
+    elif _instrumentation_counters.get() is None:
+        _instrumentation_used = True
+        _instrumentation_counters.set(collections.Counter())
+
+def instrumentation_counters() -> Dict[str, int]:
+    """
+    Returns a snapshot of the operation counters collected in the current
+    context while :func:`instrumentation <chess.set_instrumentation()>` was
+    enabled.
+    """
+    counters = _instrumentation_counters.get()
+    return dict(counters) if counters is not None else {}
+
+def reset_instrumentation_counters() -> None:
+    """Resets all operation counters of the current context to zero."""
+    counters = _instrumentation_counters.get()
+    if counters is not None:
+        counters.clear()
+
+@contextlib.contextmanager
+def instrumented() -> Iterator[Counter[str]]:
+    """
+    Counts :func:`operations <chess.set_instrumentation()>` within a
+    ``with`` block, in the current context. Yields a counter that receives
+    the number of operations performed in the block. When the block is
+    exited, the counts are also added to the counters of the enclosing
+    block, if any.
+
+    >>> import chess
+    >>>
+    >>> with chess.instrumented() as counters:
+    ...     board = chess.Board()
+    ...     board.push_san("e4")
+    ...
+    Move.from_uci('e2e4')
+    >>> counters["push"], counters["san_parses"]
+    (1, 1)
+    """
+    global _instrumentation_used
+    _instrumentation_used = True
+
+    outer = _instrumentation_counters.get()
+    counters: Counter[str] = collections.Counter()
+    token = _instrumentation_counters.set(counters)
+    try:
+        yield counters
+    finally:
+        _instrumentation_counters.reset(token)
+        if outer is not None:
+            outer.update(counters)
+
+if os.environ.get("PYTHON_CHESS_INSTRUMENTATION", "").strip() not in ["", "0"]:
+    set_instrumentation(True)
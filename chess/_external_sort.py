@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+from typing import BinaryIO, Callable, List
+
+
+def merge_run_groups(runs: List[str], directory: str, fan_in: int, merge: Callable[[List[str], BinaryIO], None]) -> List[str]:
+    # Merges groups of sorted runs into new runs in the directory, in
+    # multiple passes, until at most fan_in runs are left. This limits the
+    # number of open files. merge() writes the merged group to the given
+    # file. Merged runs are deleted.
+    fan_in = max(fan_in, 2)
+    while len(runs) > fan_in:
+        merged: List[str] = []
+        for i in range(0, len(runs), fan_in):
+            fd, path = tempfile.mkstemp(prefix="merged-", suffix=".bin", dir=directory)
+            merged.append(path)
+            group = runs[i:i + fan_in]
+            with open(fd, "wb") as f:
+                merge(group, f)
+            for run in group:
+                os.unlink(run)
+        runs = merged
+    return runs
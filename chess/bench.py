@@ -0,0 +1,427 @@
+"""
+Reproducible micro and macro benchmarks for python-chess.
+
+Run all benchmarks and save the results:
+
+.. code-block:: shell
+
+    python -m chess.bench --output baseline.json
+
+Compare against a saved baseline, failing with exit code 1 if any
+benchmark got slower by more than the given threshold:
+
+.. code-block:: shell
+
+    python -m chess.bench --baseline baseline.json --threshold 0.1
+
+Most benchmarks use the test data from a source checkout (``data/`` and
+``examples/perft/``). Benchmarks with missing data are skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import chess
+import chess.gaviota
+import chess.pgn
+import chess.polyglot
+import chess.svg
+import chess.syzygy
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+PERFT_MAX_NODES = 10000
+
+
+class BenchContext:
+    def __init__(self, *, root: str = ROOT) -> None:
+        self.root = root
+        self.data = os.path.join(root, "data")
+
+    def path(self, *parts: str) -> str:
+        path = os.path.join(self.root, *parts)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"benchmark data not found: {path!r}")
+        return path
+
+    def pgn_texts(self) -> List[str]:
+        directory = self.path("data", "pgn")
+        texts = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".pgn"):
+                with open(os.path.join(directory, name), encoding="utf-8-sig") as f:
+                    texts.append(f.read())
+        return texts
+
+    def games(self) -> List[chess.pgn.Game]:
+        games = []
+        for text in self.pgn_texts():
+            pgn = io.StringIO(text)
+            while True:
+                game = chess.pgn.read_game(pgn, Visitor=_QuietGameBuilder)
+                if game is None:
+                    break
+                games.append(game)
+        return games
+
+    def mainlines(self) -> List[Tuple[chess.Board, List[chess.Move]]]:
+        return [(game.board(), list(game.mainline_moves())) for game in self.games() if type(game.board()) is chess.Board]
+
+    def positions(self) -> List[chess.Board]:
+        positions = []
+        for board, moves in self.mainlines():
+            for move in moves:
+                positions.append(board.copy(stack=False))
+                board.push(move)
+        return positions
+
+
+class _QuietGameBuilder(chess.pgn.GameBuilder[chess.pgn.Game]):
+    def handle_error(self, error: Exception) -> None:
+        pass
+
+
+Benchmark = Callable[[BenchContext], Callable[[], int]]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """
+    Registers a benchmark. The decorated function gets a
+    :class:`~chess.bench.BenchContext` and performs any setup. It returns
+    the function to be timed, which returns the number of operations
+    performed.
+    """
+    def decorator(f: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = f
+        return f
+    return decorator
+
+
+def _perft(board: chess.Board, depth: int) -> int:
+    if depth <= 1:
+        return board.legal_moves.count() if depth == 1 else 1
+
+    count = 0
+    for move in board.legal_moves:
+        board.push(move)
+        count += _perft(board, depth - 1)
+        board.pop()
+    return count
+
+
+@benchmark("perft")
+def bench_perft(ctx: BenchContext) -> Callable[[], int]:
+    tests = []
+    board = chess.Board(chess960=True)
+    with open(ctx.path("examples", "perft", "tricky.perft")) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            cmd, arg = line.split(None, 1)
+            if cmd == "epd":
+                board = chess.Board.from_epd(arg, chess960=True)[0]
+            elif cmd == "perft":
+                depth, nodes = map(int, arg.split())
+                if nodes <= PERFT_MAX_NODES:
+                    tests.append((board.copy(), depth, nodes))
+
+    def run() -> int:
+        total = 0
+        for board, depth, nodes in tests:
+            result = _perft(board, depth)
+            assert result == nodes, f"perft {depth} of {board.fen()}: expected {nodes}, got {result}"
+            total += result
+        return total
+
+    return run
+
+
+@benchmark("san")
+def bench_san(ctx: BenchContext) -> Callable[[], int]:
+    mainlines = ctx.mainlines()
+
+    def run() -> int:
+        count = 0
+        for root, moves in mainlines:
+            board = root.copy()
+            for move in moves:
+                board.push(board.parse_san(board.san(move)))
+                count += 1
+        return count
+
+    return run
+
+
+@benchmark("uci")
+def bench_uci(ctx: BenchContext) -> Callable[[], int]:
+    mainlines = ctx.mainlines()
+
+    def run() -> int:
+        count = 0
+        for root, moves in mainlines:
+            board = root.copy()
+            for move in moves:
+                board.push(board.parse_uci(board.uci(move)))
+                count += 1
+        return count
+
+    return run
+
+
+@benchmark("fen")
+def bench_fen(ctx: BenchContext) -> Callable[[], int]:
+    fens = [board.fen() for board in ctx.positions()]
+
+    def run() -> int:
+        for fen in fens:
+            chess.Board(fen).fen()
+        return len(fens)
+
+    return run
+
+
+@benchmark("pgn")
+def bench_pgn(ctx: BenchContext) -> Callable[[], int]:
+    texts = ctx.pgn_texts()
+
+    def run() -> int:
+        count = 0
+        for text in texts:
+            pgn = io.StringIO(text)
+            while chess.pgn.read_game(pgn, Visitor=_QuietGameBuilder) is not None:
+                count += 1
+        return count
+
+    return run
+
+
+@benchmark("pgn_export")
+def bench_pgn_export(ctx: BenchContext) -> Callable[[], int]:
+    games = ctx.games()
+
+    def run() -> int:
+        for game in games:
+            game.accept(chess.pgn.StringExporter(headers=True, variations=True, comments=True))
+        return len(games)
+
+    return run
+
+
+@benchmark("pgn_write_games")
+def bench_pgn_write_games(ctx: BenchContext) -> Callable[[], int]:
+    games = ctx.games() * 10
+
+    def run() -> int:
+        chess.pgn.write_games(io.StringIO(), games)
+        return len(games)
+
+    return run
+
+
+@benchmark("polyglot")
+def bench_polyglot(ctx: BenchContext) -> Callable[[], int]:
+    path = ctx.path("data", "polyglot", "performance.bin")
+    positions = ctx.positions()
+
+    def run() -> int:
+        with chess.polyglot.open_reader(path) as reader:
+            for board in positions:
+                for _ in reader.find_all(board):
+                    pass
+        return len(positions)
+
+    return run
+
+
+def _endgames(ctx: BenchContext) -> List[chess.Board]:
+    with open(ctx.path("data", "endgame.epd")) as f:
+        return [chess.Board.from_epd(line)[0] for line in f if line.strip()]
+
+
+@benchmark("syzygy")
+def bench_syzygy(ctx: BenchContext) -> Callable[[], int]:
+    directory = ctx.path("data", "syzygy", "regular")
+
+    boards = []
+    with chess.syzygy.open_tablebase(directory) as tablebase:
+        for board in _endgames(ctx):
+            if tablebase.get_dtz(board) is not None:
+                boards.append(board)
+
+    def run() -> int:
+        with chess.syzygy.open_tablebase(directory) as tablebase:
+            for board in boards:
+                tablebase.probe_wdl(board)
+                tablebase.probe_dtz(board)
+        return len(boards)
+
+    return run
+
+
+@benchmark("gaviota")
+def bench_gaviota(ctx: BenchContext) -> Callable[[], int]:
+    directory = ctx.path("data", "gaviota")
+
+    boards = []
+    for square in chess.SQUARES[8:56]:
+        for symbol in "PNBRQ":
+            board = chess.Board("8/8/8/1k6/8/8/8/5K2 w - - 0 1")
+            board.set_piece_at(square, chess.Piece.from_symbol(symbol))
+            if board.is_valid():
+                boards.append(board)
+
+    def run() -> int:
+        with chess.gaviota.open_tablebase(directory, LibraryLoader=None) as tablebase:
+            for board in boards:
+                tablebase.probe_dtm(board)
+        return len(boards)
+
+    return run
+
+
+@benchmark("svg")
+def bench_svg(ctx: BenchContext) -> Callable[[], int]:
+    positions = ctx.positions()[:200]
+    boards = []
+    for board in positions:
+        move = next(iter(board.legal_moves), None)
+        boards.append((board, move, board.king(board.turn) if board.is_check() else None))
+
+    def run() -> int:
+        for board, lastmove, check in boards:
+            chess.svg.board(board, lastmove=lastmove, check=check, size=360)
+        return len(boards)
+
+    return run
+
+
+def _measure(f: Callable[[], int], repeat: int) -> Tuple[float, int]:
+    ops = f()  # Warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = f()
+        best = min(best, time.perf_counter() - start)
+    return best, ops
+
+
+def run(patterns: Sequence[str] = (), *, root: str = ROOT, repeat: int = 5, log: Optional[Callable[[str], Any]] = None) -> Dict[str, Any]:
+    """
+    Runs the benchmarks with names matching any of the given shell-style
+    *patterns* (or all benchmarks) and returns a JSON-serializable report.
+
+    The time of each benchmark is the best of *repeat* runs.
+    """
+    ctx = BenchContext(root=root)
+
+    report: Dict[str, Any] = {
+        "version": chess.__version__,
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "benchmarks": {},
+        "skipped": {},
+    }
+
+    for name, setup in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+            continue
+
+        try:
+            f = setup(ctx)
+        except FileNotFoundError as err:
+            report["skipped"][name] = str(err)
+            if log:
+                log(f"{name:<10} skipped: {err}")
+            continue
+
+        seconds, ops = _measure(f, repeat)
+        report["benchmarks"][name] = {
+            "seconds": seconds,
+            "ops": ops,
+            "ops_per_second": ops / seconds if seconds else None,
+        }
+        if log:
+            log(f"{name:<10} {seconds * 1000:10.2f} ms {ops:10d} ops")
+
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], *, threshold: float = 0.1) -> Iterator[Tuple[str, float, float]]:
+    """
+    Compares a report to a *baseline* report. Yields the name, baseline
+    time and current time of all benchmarks that are slower than the
+    baseline by more than the relative *threshold*.
+
+    Benchmarks that are missing from either report are ignored.
+    """
+    for name, result in report["benchmarks"].items():
+        try:
+            before = baseline["benchmarks"][name]["seconds"]
+        except KeyError:
+            continue
+
+        after = result["seconds"]
+        if after > before * (1 + threshold):
+            yield name, before, after
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m chess.bench", description="Runs python-chess benchmarks.")
+    parser.add_argument("patterns", nargs="*", metavar="PATTERN", help="Run only benchmarks matching these shell-style patterns")
+    parser.add_argument("-l", "--list", action="store_true", help="List available benchmarks")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of timed runs per benchmark. Defaults to 5")
+    parser.add_argument("--root", default=ROOT, help="Source checkout with data/ and examples/perft/")
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file, - for stdout")
+    parser.add_argument("-b", "--baseline", help="Compare against a previously saved JSON report")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1, help="Relative slowdown considered a regression. Defaults to 0.1")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in BENCHMARKS:
+            print(name)
+        return 0
+
+    def log(line: str) -> None:
+        print(line, file=sys.stderr, flush=True)
+
+    report = run(args.patterns, root=args.root, repeat=args.repeat, log=log)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = list(compare(report, baseline, threshold=args.threshold))
+        for name, before, after in regressions:
+            log(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({after / before - 1:+.1%})")
+        if regressions:
+            return 1
+        log(f"No regressions above {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
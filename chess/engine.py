@@ -925,6 +925,8 @@ class Protocol(asyncio.SubprocessProtocol, metaclass=abc.ABCMeta):
 
     def _line_received(self, line: str) -> None:
         LOGGER.debug("%s: >> %s", self, line)
+        if chess._instrumentation_used:
+            chess._count("engine_lines")
 
         self.line_received(line)
 
@@ -3112,3 +3114,4 @@ class SimpleAnalysisResult:
 
     def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
         self.stop()
+
@@ -9,6 +9,7 @@ import lzma
 import os
 import os.path
 import struct
+import threading
 import typing
 
 import chess
@@ -1335,6 +1336,8 @@ def sortlists(ws: List[int], wp: List[int]) -> Tuple[List[int], List[int]]:
     return list(ws2), list(wp2)
 
 def egtb_block_unpack(side: int, n: int, bp: bytes) -> List[int]:
+    if chess._instrumentation_used:
+        chess._count("decompressed_blocks")
     return [dtm_unpack(side, i) for i in bp[:n]]
 
 def split_index(i: int) -> Tuple[int, int]:
@@ -1465,7 +1468,12 @@ class ZipInfo:
 
 
 class PythonTablebase:
-    """Provides access to Gaviota tablebases using pure Python code."""
+    """
+    Provides access to Gaviota tablebases using pure Python code.
+
+    Probing is thread-safe. File access and the block cache are guarded by a
+    lock, while decompression of blocks happens outside of it.
+    """
 
     def __init__(self) -> None:
         self.available_tables: Dict[str, str] = {}
@@ -1473,6 +1481,7 @@ class PythonTablebase:
         self.streams: Dict[str, BinaryIO] = {}
         self.zipinfo: Dict[str, ZipInfo] = {}
 
+        self.lock = threading.RLock()
         self.block_cache: Dict[Tuple[str, int, int], TableBlock] = {}
         self.block_age = 0
 
@@ -1659,28 +1668,30 @@ class PythonTablebase:
         return self._open_tablebase(req)
 
     def _open_tablebase(self, req: Request) -> BinaryIO:
-        stream = self.streams.get(req.egkey)
+        with self.lock:
+            stream = self.streams.get(req.egkey)
 
-        if stream is None:
-            path = self.available_tables[req.egkey]
-            stream = open(path, "rb")
-            self.egtb_loadindexes(req.egkey, stream)
-            self.streams[req.egkey] = stream
+            if stream is None:
+                path = self.available_tables[req.egkey]
+                stream = open(path, "rb")
+                self.egtb_loadindexes(req.egkey, stream)
+                self.streams[req.egkey] = stream
 
-        return stream
+            return stream
 
     def close(self) -> None:
         """Closes all loaded tables."""
-        self.available_tables.clear()
+        with self.lock:
+            self.available_tables.clear()
 
-        self.zipinfo.clear()
+            self.zipinfo.clear()
 
-        self.block_age = 0
-        self.block_cache.clear()
+            self.block_age = 0
+            self.block_cache.clear()
 
-        while self.streams:
-            _, stream = self.streams.popitem()
-            stream.close()
+            while self.streams:
+                _, stream = self.streams.popitem()
+                stream.close()
 
     def egtb_block_getnumber(self, req: Request, idx: int) -> int:
         maxindex = EGKEY[req.egkey].maxindex
@@ -1706,10 +1717,12 @@ class PythonTablebase:
         idx = EGKEY[req.egkey].pctoi(req)
         offset, remainder = split_index(idx)
 
-        t = self.block_cache.get((req.egkey, offset, req.side))
-
-        if t is None:
-            t = TableBlock(req.egkey, req.side, offset, self.block_age)
+        with self.lock:
+            t = self.block_cache.get((req.egkey, offset, req.side))
+            if t is not None:
+                t.age = self.block_age
+                self.block_age += 1
+                return t.pcache[remainder]
 
             block = self.egtb_block_getnumber(req, idx)
             n = self.egtb_block_getsize(req, idx)
@@ -1718,41 +1731,44 @@ class PythonTablebase:
             self.egtb_block_park(req.egkey, block, stream)
             buffer_zipped: bytearray | bytes = stream.read(z)
 
-            if buffer_zipped[0] == 0:
-                # If flag is zero, plain LZMA is following.
-                buffer_zipped = buffer_zipped[2:]
-            else:
-                # Else LZMA86. Build a fake header.
-                DICTIONARY_SIZE = 4096
-                POS_STATE_BITS = 2
-                NUM_LITERAL_POS_STATE_BITS = 0
-                NUM_LITERAL_CONTEXT_BITS = 3
-                properties = bytearray(13)
-                properties[0] = (POS_STATE_BITS * 5 + NUM_LITERAL_POS_STATE_BITS) * 9 + NUM_LITERAL_CONTEXT_BITS
-                for i in range(4):
-                    properties[1 + i] = (DICTIONARY_SIZE >> (8 * i)) & 0xFF
-                for i in range(8):
-                    properties[5 + i] = (n >> (8 * i)) & 0xFF
-
-                # Concatenate the fake header with the true LZMA stream.
-                buffer_zipped = properties + buffer_zipped[15:]
-
-            buffer_packed = lzma.LZMADecompressor().decompress(buffer_zipped)
-
-            t.pcache = egtb_block_unpack(req.side, n, buffer_packed)
+        # Decompress without holding the lock. Concurrent probes may
+        # occasionally decompress the same block twice.
+        t = TableBlock(req.egkey, req.side, offset, self.block_age)
 
+        if buffer_zipped[0] == 0:
+            # If flag is zero, plain LZMA is following.
+            buffer_zipped = buffer_zipped[2:]
+        else:
+            # Else LZMA86. Build a fake header.
+            DICTIONARY_SIZE = 4096
+            POS_STATE_BITS = 2
+            NUM_LITERAL_POS_STATE_BITS = 0
+            NUM_LITERAL_CONTEXT_BITS = 3
+            properties = bytearray(13)
+            properties[0] = (POS_STATE_BITS * 5 + NUM_LITERAL_POS_STATE_BITS) * 9 + NUM_LITERAL_CONTEXT_BITS
+            for i in range(4):
+                properties[1 + i] = (DICTIONARY_SIZE >> (8 * i)) & 0xFF
+            for i in range(8):
+                properties[5 + i] = (n >> (8 * i)) & 0xFF
+
+            # Concatenate the fake header with the true LZMA stream.
+            buffer_zipped = properties + buffer_zipped[15:]
+
+        buffer_packed = lzma.LZMADecompressor().decompress(buffer_zipped)
+
+        t.pcache = egtb_block_unpack(req.side, n, buffer_packed)
+
+        with self.lock:
             # Update LRU block cache.
+            t.age = self.block_age
             self.block_cache[(t.egkey, t.offset, t.side)] = t
             if len(self.block_cache) > 128:
                 lru_cache_key = min(self.block_cache, key=lambda cache_key: self.block_cache[cache_key].age)
                 del self.block_cache[lru_cache_key]
-        else:
-            t.age = self.block_age
 
-        self.block_age += 1
-        dtm = t.pcache[remainder]
+            self.block_age += 1
 
-        return dtm
+        return t.pcache[remainder]
 
     def egtb_loadindexes(self, egkey: str, stream: BinaryIO) -> ZipInfo:
         zipinfo = self.zipinfo.get(egkey)
@@ -1972,12 +1988,13 @@ def open_tablebase_native(directory: str, *, libgtb: Optional[str] = None, Libra
     return tables
 
 
-def open_tablebase(directory: str, *, libgtb: Optional[str] = None, LibraryLoader: ctypes.LibraryLoader[ctypes.CDLL] = ctypes.cdll) -> Union[NativeTablebase, PythonTablebase]:
+def open_tablebase(directory: str, *, libgtb: Optional[str] = None, LibraryLoader: Optional[ctypes.LibraryLoader[ctypes.CDLL]] = ctypes.cdll) -> Union[NativeTablebase, PythonTablebase]:
     """
     Opens a collection of tables for probing.
 
     First native access via the shared library libgtb is tried. You can
-    optionally provide a specific library name or a library loader.
+    optionally provide a specific library name or a library loader, or
+    ``None`` to skip native access.
     The shared library has global state and caches, so only one instance can
     be open at a time.
 
@@ -1,19 +1,43 @@
 from __future__ import annotations
 
 import abc
+import array
+import codecs
+import collections
+import concurrent.futures
+import contextlib
 import dataclasses
 import enum
+import functools
+import hashlib
+import heapq
+import io
 import itertools
+import json
 import logging
+import math
+import mmap
+import operator
+import os
+import queue
 import re
+import shutil
+import struct
+import sys
+import tempfile
+import threading
 import typing
+import weakref
 
 import chess
+import chess._external_sort
 import chess.engine
+import chess.polyglot
 import chess.svg
 
-from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Literal, Mapping, MutableMapping, Set, TextIO, Tuple, Type, TypeVar, Optional, Union
+from typing import IO, Any, BinaryIO, Callable, ContextManager, Deque, Dict, Generic, Iterable, Iterator, List, Literal, Mapping, MutableMapping, Sequence, Set, TextIO, Tuple, Type, TypeVar, Optional, Union
 from chess import Color, Square
+from types import TracebackType
 
 if typing.TYPE_CHECKING:
     from typing_extensions import Self, override
@@ -102,6 +126,25 @@ MOVETEXT_REGEX = re.compile(r"""
     |([\?!]{1,2})
     """, re.DOTALL | re.VERBOSE)
 
+MOVETEXT_BLOCK_REGEX = re.compile(r"""
+    [NBKRQ]?[a-h]?[1-8]?[\-x]?[a-h][1-8](?:=?[nbrqkNBRQK])?
+    |[PNBRQK]?@[a-h][1-8]
+    |--
+    |Z0
+    |0000
+    |@@@@
+    |O-O(?:-O)?
+    |0-0(?:-0)?
+    |\{
+    |;[^\n]*
+    |^%[^\n]*
+    |\$[0-9]+
+    |\(
+    |\)
+    |\*|1-0|0-1|1/2-1/2
+    |[\?!]{1,2}
+    """, re.MULTILINE | re.VERBOSE)
+
 SKIP_MOVETEXT_REGEX = re.compile(r""";|\{|\}""")
 
 
@@ -144,6 +187,25 @@ def _standardize_comments(comment: Union[str, list[str]]) -> list[str]:
 TAG_ROSTER = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
 
 
+def _parse_seconds(match: typing.Match[str]) -> float:
+    return int(match.group("hours")) * 3600 + int(match.group("minutes")) * 60 + float(match.group("seconds"))
+
+
+def _parse_eval(match: typing.Match[str], turn: Color) -> chess.engine.PovScore:
+    if match.group("mate"):
+        mate = int(match.group("mate"))
+        score: chess.engine.Score = chess.engine.Mate(mate)
+        if mate == 0:
+            # Resolve this ambiguity in the specification in favor of
+            # standard chess: The player to move after mate is the player
+            # who has been mated.
+            return chess.engine.PovScore(score, turn)
+    else:
+        score = chess.engine.Cp(round(float(match.group("cp")) * 100))
+
+    return chess.engine.PovScore(score if turn else -score, turn)
+
+
 class SkipType(enum.Enum):
     SKIP = None
 
@@ -186,6 +248,52 @@ class TimeControl:
     type: TimeControlType = TimeControlType.UNKNOWN
 
 
+BOARD_CHECKPOINT_INTERVAL = 0
+"""
+Number of plies between positions cached by :func:`chess.pgn.GameNode.board()`.
+Defaults to ``0``, which disables checkpoints.
+
+Checkpoints store only the position, so boards replayed from a checkpoint
+have only the moves after the checkpoint on their move stack.
+"""
+
+MAX_BOARD_CHECKPOINTS = 4096
+"""
+Maximum number of positions cached by :func:`chess.pgn.GameNode.board()`,
+across all games. The oldest checkpoints are discarded first.
+"""
+
+
+def _setup_key(headers: Headers) -> Tuple[Optional[str], Optional[str]]:
+    return headers.get("Variant"), headers.get("FEN")
+
+
+@dataclasses.dataclass
+class _BoardCheckpoint:
+    game: Game
+    setup_key: Tuple[Optional[str], Optional[str]]
+    ply: int
+    board: chess.Board
+
+    def is_valid(self) -> bool:
+        # Changing the starting position invalidates all checkpoints.
+        return self.setup_key == _setup_key(self.game.headers)
+
+
+_board_checkpoints: Deque[weakref.ref[ChildNode]] = collections.deque()
+_board_checkpoints_lock = threading.Lock()
+
+
+def _add_board_checkpoint(node: ChildNode, checkpoint: _BoardCheckpoint) -> None:
+    node._board_checkpoint = checkpoint
+    with _board_checkpoints_lock:
+        _board_checkpoints.append(weakref.ref(node))
+        while len(_board_checkpoints) > MAX_BOARD_CHECKPOINTS:
+            evicted = _board_checkpoints.popleft()()
+            if evicted is not None:
+                evicted._board_checkpoint = None
+
+
 class _AcceptFrame:
     def __init__(self, node: ChildNode, *, is_variation: bool = False, sidelines: bool = True):
         self.state = "pre"
@@ -241,7 +349,11 @@ class GameNode(abc.ABC):
 
         It's a copy, so modifying the board will not alter the game.
 
-        Complexity is `O(n)`.
+        Complexity is `O(n)`. If
+        :data:`~chess.pgn.BOARD_CHECKPOINT_INTERVAL` is set, positions are
+        checkpointed, so that subsequent calls for nodes near a checkpoint
+        replay only a few moves. The move stack of the returned board then
+        starts at the checkpoint.
         """
 
     @abc.abstractmethod
@@ -254,7 +366,8 @@ class GameNode(abc.ABC):
         Usually this is equal to the number of parent nodes, but it may be
         more if the game was started from a custom position.
 
-        Complexity is `O(n)`.
+        Complexity is `O(n)`, but stops at the nearest checkpoint left by
+        :func:`~chess.pgn.GameNode.board()`.
         """
 
     def turn(self) -> Color:
@@ -458,23 +571,7 @@ class GameNode(abc.ABC):
         Complexity is `O(n)`.
         """
         match = EVAL_REGEX.search(" ".join(self.comments))
-        if not match:
-            return None
-
-        turn = self.turn()
-
-        if match.group("mate"):
-            mate = int(match.group("mate"))
-            score: chess.engine.Score = chess.engine.Mate(mate)
-            if mate == 0:
-                # Resolve this ambiguity in the specification in favor of
-                # standard chess: The player to move after mate is the player
-                # who has been mated.
-                return chess.engine.PovScore(score, turn)
-        else:
-            score = chess.engine.Cp(round(float(match.group("cp")) * 100))
-
-        return chess.engine.PovScore(score if turn else -score, turn)
+        return None if match is None else _parse_eval(match, self.turn())
 
     def eval_depth(self) -> Optional[int]:
         """
@@ -555,9 +652,7 @@ class GameNode(abc.ABC):
         move, in seconds.
         """
         match = CLOCK_REGEX.search(" ".join(self.comments))
-        if match is None:
-            return None
-        return int(match.group("hours")) * 3600 + int(match.group("minutes")) * 60 + float(match.group("seconds"))
+        return None if match is None else _parse_seconds(match)
 
     def set_clock(self, seconds: Optional[float]) -> None:
         """
@@ -584,9 +679,7 @@ class GameNode(abc.ABC):
         move, in seconds.
         """
         match = EMT_REGEX.search(" ".join(self.comments))
-        if match is None:
-            return None
-        return int(match.group("hours")) * 3600 + int(match.group("minutes")) * 60 + float(match.group("seconds"))
+        return None if match is None else _parse_seconds(match)
 
     def set_emt(self, seconds: Optional[float]) -> None:
         """
@@ -699,19 +792,39 @@ class ChildNode(GameNode):
         """The move leading to this node."""
         return self._move
 
+    _board_checkpoint: Optional[_BoardCheckpoint] = None
+
     @override
     def board(self) -> chess.Board:
-        stack: List[chess.Move] = []
+        stack: List[ChildNode] = []
         node: GameNode = self
+        checkpoint = None
 
-        while node.move is not None and node.parent is not None:
-            stack.append(node.move)
+        while isinstance(node, ChildNode):
+            checkpoint = node._board_checkpoint
+            if checkpoint is not None and checkpoint.is_valid():
+                break
+            checkpoint = None
+            stack.append(node)
             node = node.parent
 
-        board = node.game().board()
+        if checkpoint is None:
+            game = node.game()
+            setup_key = _setup_key(game.headers)
+            board = game.board()
+            ply = board.ply()
+        else:
+            game = checkpoint.game
+            setup_key = checkpoint.setup_key
+            board = checkpoint.board.copy()
+            ply = checkpoint.ply
 
         while stack:
-            board.push(stack.pop())
+            child = stack.pop()
+            board.push(child.move)
+            ply += 1
+            if BOARD_CHECKPOINT_INTERVAL and ply % BOARD_CHECKPOINT_INTERVAL == 0:
+                _add_board_checkpoint(child, _BoardCheckpoint(game, setup_key, ply, board.copy(stack=False)))
 
         return board
 
@@ -719,7 +832,10 @@ class ChildNode(GameNode):
     def ply(self) -> int:
         ply = 0
         node: GameNode = self
-        while node.parent is not None:
+        while isinstance(node, ChildNode):
+            checkpoint = node._board_checkpoint
+            if checkpoint is not None and checkpoint.is_valid():
+                return checkpoint.ply + ply
             ply += 1
             node = node.parent
         return node.game().ply() + ply
@@ -755,15 +871,16 @@ class ChildNode(GameNode):
         """
         return typing.cast(ChildNode, super().end())
 
-    def _accept_node(self, parent_board: chess.Board, visitor: BaseVisitor[ResultT]) -> None:
+    def _accept_node(self, parent_board: chess.Board, visitor: BaseVisitor[ResultT], *, visit_board: bool = True) -> None:
         if self.starting_comments:
             visitor.visit_comment(self.starting_comments)
 
         visitor.visit_move(parent_board, self.move)
 
-        parent_board.push(self.move)
-        visitor.visit_board(parent_board)
-        parent_board.pop()
+        if visit_board:
+            parent_board.push(self.move)
+            visitor.visit_board(parent_board)
+            parent_board.pop()
 
         for nag in sorted(self.nags):
             visitor.visit_nag(nag)
@@ -774,6 +891,9 @@ class ChildNode(GameNode):
     def _accept(self, parent_board: chess.Board, visitor: BaseVisitor[ResultT], *, sidelines: bool = True) -> None:
         stack = [_AcceptFrame(self, sidelines=sidelines)]
 
+        # Avoid playing moves just for visitors that ignore the boards.
+        visit_board = _overrides(visitor, "visit_board")
+
         while stack:
             top = stack[-1]
 
@@ -782,7 +902,7 @@ class ChildNode(GameNode):
                 visitor.end_variation()
 
             if top.state == "pre":
-                top.node._accept_node(parent_board, visitor)
+                top.node._accept_node(parent_board, visitor, visit_board=visit_board)
                 top.state = "variations"
             elif top.state == "variations":
                 try:
@@ -957,6 +1077,43 @@ class Game(GameNode):
     def builder(cls: Type[GameT]) -> GameBuilder[GameT]:
         return GameBuilder(Game=cls)
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Flatten the tree, so that pickling (for example, to send games
+        # between processes) does not exceed the recursion limit for long
+        # games.
+        state = self.__dict__.copy()
+        del state["variations"]
+
+        nodes: List[Tuple[int, Type[ChildNode], Dict[str, Any]]] = []
+        parents: List[GameNode] = [self]
+        for parent_index, parent in enumerate(parents):
+            for child in parent.variations:
+                child_state = child.__dict__.copy()
+                del child_state["_parent"]
+                del child_state["variations"]
+                child_state.pop("_board_checkpoint", None)
+                nodes.append((parent_index, type(child), child_state))
+                parents.append(child)
+
+        state["_nodes"] = nodes
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state = state.copy()
+        nodes = state.pop("_nodes")
+        self.__dict__.update(state)
+        self.variations = []
+
+        parents: List[GameNode] = [self]
+        for parent_index, cls, child_state in nodes:
+            parent = parents[parent_index]
+            child = cls.__new__(cls)
+            child.__dict__.update(child_state)
+            child._parent = parent
+            child.variations = []
+            parent.variations.append(child)
+            parents.append(child)
+
     def __repr__(self) -> str:
         return "<{} at {:#x} ({!r} vs. {!r}, {!r} at {!r}{})>".format(
             type(self).__name__,
@@ -968,6 +1125,297 @@ class Game(GameNode):
             f", {len(self.errors)} errors" if self.errors else "")
 
 
+class LazyGame(Game):
+    """
+    A game that keeps the unparsed movetext and parses it only when the
+    moves, comments or errors are first accessed, for example with
+    :func:`~chess.pgn.GameNode.mainline()`,
+    :data:`~chess.pgn.GameNode.variations` or
+    :func:`~chess.pgn.Game.accept()`. Extends :class:`~chess.pgn.Game`.
+
+    Read lazy games with :class:`~chess.pgn.LazyGameBuilder`:
+
+    >>> import chess.pgn
+    >>>
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>>
+    >>> game = chess.pgn.read_game(pgn, Visitor=chess.pgn.LazyGameBuilder)
+    >>> game.is_parsed()
+    False
+    >>> game.headers["White"]
+    'Garry Kasparov'
+    >>> game.next().move
+    Move.from_uci('g1f3')
+    >>> game.is_parsed()
+    True
+    """
+
+    def __init__(self, headers: Optional[Union[Mapping[str, str], Iterable[Tuple[str, str]]]] = None, *, movetext: str = "") -> None:
+        super().__init__(headers)
+        self._movetext: Optional[str] = movetext or None
+
+    def is_parsed(self) -> bool:
+        """Checks if the movetext has already been parsed."""
+        return self._movetext is None
+
+    def _parse(self) -> None:
+        movetext, self._movetext = self._movetext, None
+        if movetext is not None:
+            read_game(io.StringIO(movetext), Visitor=lambda: _LazyGameParser(self))
+
+    @property
+    def variations(self) -> List[ChildNode]:
+        if self._movetext is not None:
+            self._parse()
+        return typing.cast(List[ChildNode], self.__dict__["variations"])
+
+    @variations.setter
+    def variations(self, variations: List[ChildNode]) -> None:
+        self.__dict__["variations"] = variations
+
+    @property
+    def comments(self) -> list[str]:
+        if self._movetext is not None:
+            self._parse()
+        return typing.cast(List[str], self.__dict__["comments"])
+
+    @comments.setter
+    def comments(self, comments: list[str]) -> None:
+        self.__dict__["comments"] = comments
+
+    @property
+    def errors(self) -> List[Exception]:
+        if self._movetext is not None:
+            self._parse()
+        return typing.cast(List[Exception], self.__dict__["errors"])
+
+    @errors.setter
+    def errors(self, errors: List[Exception]) -> None:
+        self.__dict__["errors"] = errors
+
+    @override
+    def __getstate__(self) -> Dict[str, Any]:
+        if self._movetext is None:
+            return super().__getstate__()
+
+        # Keep the movetext unparsed.
+        state = self.__dict__.copy()
+        del state["variations"]
+        state["_nodes"] = []
+        return state
+
+
+COMPACT_MATE_SCORE = 1000000
+COMPACT_NO_EVAL = -0x80000000
+
+
+def _pack_move(move: chess.Move) -> int:
+    if move.drop:
+        return move.to_square | move.to_square << 6 | move.drop << 12 | 0x8000
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def _unpack_move(packed: int) -> chess.Move:
+    to_square = packed >> 6 & 0x3f
+    piece_type = packed >> 12 & 0x7
+    if packed & 0x8000:
+        return chess.Move(to_square, to_square, drop=piece_type)
+    return chess.Move(packed & 0x3f, to_square, promotion=piece_type or None)
+
+
+def _pack_eval(score: chess.engine.PovScore) -> int:
+    white = score.white()
+    mate = white.mate()
+    if mate is None:
+        # Clamp centipawns, so that they fit and can not be mistaken for
+        # mate scores.
+        cp = typing.cast(int, white.score())
+        return max(-COMPACT_MATE_SCORE // 2, min(cp, COMPACT_MATE_SCORE // 2))
+    elif abs(mate) >= COMPACT_MATE_SCORE // 2:
+        return COMPACT_NO_EVAL
+    return white.score(mate_score=COMPACT_MATE_SCORE)
+
+
+def _unpack_eval(packed: int) -> chess.engine.PovScore:
+    score: chess.engine.Score
+    if packed > COMPACT_MATE_SCORE // 2:
+        score = chess.engine.Mate(COMPACT_MATE_SCORE - packed) if packed < COMPACT_MATE_SCORE else chess.engine.MateGiven
+    elif packed < -COMPACT_MATE_SCORE // 2:
+        score = chess.engine.Mate(-COMPACT_MATE_SCORE - packed)
+    else:
+        score = chess.engine.Cp(packed)
+    return chess.engine.PovScore(score, chess.WHITE)
+
+
+class CompactGame:
+    """
+    A memory efficient representation of the mainline of a game, without
+    variations and comments.
+
+    Moves are packed into 16 bit integers: The from square in bits 0-5, the
+    to square in bits 6-11 and the promotion piece type in bits 12-14. Drops
+    have the drop piece type in bits 12-14, the target square as both from
+    and to square, and bit 15 set.
+
+    Clocks, evaluations and NAGs are kept in optional arrays, parallel to
+    the moves.
+
+    >>> import chess.pgn
+    >>>
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>>
+    >>> game = chess.pgn.read_game(pgn, Visitor=chess.pgn.CompactGameBuilder)
+    >>> len(game.moves)
+    89
+    >>> game.mainline_moves()[0]
+    Move.from_uci('g1f3')
+    """
+
+    headers: Headers
+    """A mapping of headers, like :data:`chess.pgn.Game.headers`."""
+
+    fen: str
+    """The FEN of the starting position."""
+
+    moves: array.array[int]
+    """The packed moves of the mainline."""
+
+    clocks: Optional[array.array[float]]
+    """
+    The remaining time in seconds after each move (``nan`` if unknown),
+    or ``None`` if there are no ``[%clk ...]`` annotations.
+    """
+
+    evals: Optional[array.array[int]]
+    """
+    The evaluation after each move in centipawns from the point of view of
+    White (:data:`~chess.pgn.COMPACT_NO_EVAL` if unknown), or ``None`` if
+    there are no ``[%eval ...]`` annotations. Mates are scored with
+    :data:`~chess.pgn.COMPACT_MATE_SCORE`, like
+    :func:`chess.engine.Score.score()`. Centipawns are clamped to half of
+    :data:`~chess.pgn.COMPACT_MATE_SCORE`. Depths are not kept.
+    """
+
+    nags: Optional[array.array[int]]
+    """
+    The smallest NAG of each move (0 if none), or ``None`` if there are
+    no NAGs.
+    """
+
+    errors: List[Exception]
+    """
+    A list of errors (such as illegal or ambiguous moves) encountered while
+    parsing the game.
+    """
+
+    def __init__(self, headers: Optional[Union[Mapping[str, str], Iterable[Tuple[str, str]]]] = None, *, fen: Optional[str] = None) -> None:
+        self.headers = Headers(headers)
+        self.fen = self.headers.variant().starting_fen if fen is None else fen
+        self.moves = array.array("H")
+        self.clocks = None
+        self.evals = None
+        self.nags = None
+        self.errors = []
+
+    def board(self) -> chess.Board:
+        """Gets a board with the starting position of the game."""
+        board = self.headers.variant()(self.fen, chess960=self.headers.is_chess960())
+        board.chess960 = board.chess960 or board.has_chess960_castling_rights()
+        return board
+
+    def mainline_moves(self) -> List[chess.Move]:
+        """Unpacks the moves of the mainline."""
+        return [_unpack_move(packed) for packed in self.moves]
+
+    def clock(self, index: int) -> Optional[float]:
+        """Gets the remaining time after the move with the given *index*, if known."""
+        clock = self.clocks[index] if self.clocks is not None else math.nan
+        return None if math.isnan(clock) else clock
+
+    def eval(self, index: int) -> Optional[chess.engine.PovScore]:
+        """Gets the evaluation after the move with the given *index*, if known."""
+        packed = self.evals[index] if self.evals is not None else COMPACT_NO_EVAL
+        return None if packed == COMPACT_NO_EVAL else _unpack_eval(packed)
+
+    def _add_clock(self, index: int, seconds: float) -> None:
+        if self.clocks is None:
+            self.clocks = array.array("d", [math.nan]) * len(self.moves)
+        self.clocks[index] = seconds
+
+    def _add_eval(self, index: int, score: chess.engine.PovScore) -> None:
+        if self.evals is None:
+            self.evals = array.array("i", [COMPACT_NO_EVAL]) * len(self.moves)
+        self.evals[index] = _pack_eval(score)
+
+    def _add_nag(self, index: int, nag: int) -> None:
+        if not 0 < nag < 256:
+            return
+        if self.nags is None:
+            self.nags = array.array("B", [0]) * len(self.moves)
+        if not self.nags[index] or nag < self.nags[index]:
+            self.nags[index] = nag
+
+    def _push(self, move: chess.Move) -> None:
+        self.moves.append(_pack_move(move))
+        if self.clocks is not None:
+            self.clocks.append(math.nan)
+        if self.evals is not None:
+            self.evals.append(COMPACT_NO_EVAL)
+        if self.nags is not None:
+            self.nags.append(0)
+
+    @classmethod
+    def from_game(cls, game: Game) -> CompactGame:
+        """
+        Creates a compact game from the mainline of a
+        :class:`~chess.pgn.Game`.
+        """
+        compact = cls(game.headers, fen=game.board().fen())
+        for index, node in enumerate(game.mainline()):
+            compact._push(node.move)
+
+            clock = node.clock()
+            if clock is not None:
+                compact._add_clock(index, clock)
+
+            score = node.eval()
+            if score is not None:
+                compact._add_eval(index, score)
+
+            for nag in node.nags:
+                compact._add_nag(index, nag)
+        return compact
+
+    def to_game(self) -> Game:
+        """Creates a :class:`~chess.pgn.Game` with the mainline."""
+        game = Game(self.headers)
+        node: GameNode = game
+        for index, move in enumerate(self.mainline_moves()):
+            node = node.add_variation(move)
+
+            clock = self.clock(index)
+            if clock is not None:
+                node.set_clock(clock)
+
+            score = self.eval(index)
+            if score is not None:
+                node.set_eval(score)
+
+            if self.nags is not None and self.nags[index]:
+                node.nags.add(self.nags[index])
+        return game
+
+    def __repr__(self) -> str:
+        return "<{} at {:#x} ({!r} vs. {!r}, {!r} at {!r}, {} moves)>".format(
+            type(self).__name__,
+            id(self),
+            self.headers.get("White", "?"),
+            self.headers.get("Black", "?"),
+            self.headers.get("Date", "????.??.??"),
+            self.headers.get("Site", "?"),
+            len(self.moves))
+
+
 HeadersT = TypeVar("HeadersT", bound="Headers")
 
 class Headers(MutableMapping[str, str]):
@@ -1087,9 +1535,10 @@ class Mainline(Generic[MainlineMapT]):
     def accept(self, visitor: BaseVisitor[ResultT]) -> ResultT:
         node = self.start
         board = self.start.board()
+        visit_board = _overrides(visitor, "visit_board")
         while node.variations:
             node = node.variations[0]
-            node._accept_node(board, visitor)
+            node._accept_node(board, visitor, visit_board=visit_board)
             board.push(node.move)
         return visitor.result()
 
@@ -1100,6 +1549,49 @@ class Mainline(Generic[MainlineMapT]):
         return f"<Mainline at {id(self):#x} ({self.accept(StringExporter(columns=None, comments=False))})>"
 
 
+@dataclasses.dataclass
+class Annotations:
+    """
+    The moves of the mainline of a game, and the annotations in their
+    comments, parsed once into lists with one entry per move.
+
+    >>> import chess.pgn
+    >>>
+    >>> pgn = open("data/pgn/knightvuillaume-jannlee-zh-lichess.pgn")
+    >>>
+    >>> annotations = chess.pgn.read_game(pgn, Visitor=chess.pgn.AnnotationsBuilder)
+    >>> annotations.clocks[:6]
+    [60.0, 60.0, 60.0, 60.0, 59.0, 59.0]
+    """
+
+    headers: Headers = dataclasses.field(default_factory=Headers)
+    """A mapping of headers, like :data:`chess.pgn.Game.headers`."""
+
+    moves: List[chess.Move] = dataclasses.field(default_factory=list)
+    """The moves of the mainline."""
+
+    clocks: List[Optional[float]] = dataclasses.field(default_factory=list)
+    """The remaining times from ``[%clk ...]``, like :func:`chess.pgn.GameNode.clock()`."""
+
+    emts: List[Optional[float]] = dataclasses.field(default_factory=list)
+    """The elapsed move times from ``[%emt ...]``, like :func:`chess.pgn.GameNode.emt()`."""
+
+    evals: List[Optional[chess.engine.PovScore]] = dataclasses.field(default_factory=list)
+    """The evaluations from ``[%eval ...]``, like :func:`chess.pgn.GameNode.eval()`."""
+
+    eval_depths: List[Optional[int]] = dataclasses.field(default_factory=list)
+    """The evaluation depths, like :func:`chess.pgn.GameNode.eval_depth()`."""
+
+    arrows: List[List[chess.svg.Arrow]] = dataclasses.field(default_factory=list)
+    """The arrows from ``[%csl ...]`` and ``[%cal ...]``, like :func:`chess.pgn.GameNode.arrows()`."""
+
+    errors: List[Exception] = dataclasses.field(default_factory=list)
+    """
+    A list of errors (such as illegal or ambiguous moves) encountered while
+    parsing the game.
+    """
+
+
 class BaseVisitor(abc.ABC, Generic[ResultT]):
     """
     Base class for visitors.
@@ -1126,6 +1618,14 @@ class BaseVisitor(abc.ABC, Generic[ResultT]):
         """Called after visiting game headers."""
         pass
 
+    def visit_movetext(self, movetext: str) -> None:
+        """
+        When the visitor is used by a parser and skips the game after
+        :func:`~chess.pgn.BaseVisitor.end_headers()`, this is called with
+        the unparsed movetext of the game.
+        """
+        pass
+
     def begin_parse_san(self, board: chess.Board, san: str) -> Optional[SkipType]:
         """
         When the visitor is used by a parser, this is called at the start of
@@ -1188,6 +1688,10 @@ class BaseVisitor(abc.ABC, Generic[ResultT]):
         raise error
 
 
+def _overrides(visitor: BaseVisitor[Any], name: str) -> bool:
+    return getattr(type(visitor), name) is not getattr(BaseVisitor, name)
+
+
 class GameBuilder(BaseVisitor[GameT]):
     """
     Creates a game model. Default visitor for :func:`~chess.pgn.read_game()`.
@@ -1327,98 +1831,326 @@ class HeadersBuilder(BaseVisitor[HeadersT]):
         return self.headers
 
 
-class BoardBuilder(BaseVisitor[chess.Board]):
+class LazyGameBuilder(BaseVisitor[LazyGame]):
     """
-    Returns the final position of the game. The mainline of the game is
-    on the move stack.
+    Collects the headers and the unparsed movetext of a game into a
+    :class:`~chess.pgn.LazyGame`. This is much faster than
+    :class:`~chess.pgn.GameBuilder` when only few of the games are
+    inspected beyond their headers.
     """
 
     @override
     def begin_game(self) -> None:
-        self.skip_variation_depth = 0
+        self.game = LazyGame()
 
     @override
-    def begin_variation(self) -> SkipType:
-        self.skip_variation_depth += 1
+    def begin_headers(self) -> Headers:
+        return self.game.headers
+
+    @override
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        self.game.headers[tagname] = tagvalue
+
+    @override
+    def end_headers(self) -> SkipType:
         return SKIP
 
     @override
-    def end_variation(self) -> None:
-        self.skip_variation_depth = max(self.skip_variation_depth - 1, 0)
+    def visit_movetext(self, movetext: str) -> None:
+        self.game._movetext = movetext or None
+
+        # The result in the movetext replaces an unknown result header.
+        if self.game.headers.get("Result", "*") == "*" and any(result in movetext for result in ["1-0", "0-1", "1/2-1/2"]):
+            self.game._parse()
 
     @override
-    def visit_board(self, board: chess.Board) -> None:
-        if not self.skip_variation_depth:
-            self.board = board
+    def result(self) -> LazyGame:
+        return self.game
+
+
+class _LazyGameParser(GameBuilder[LazyGame]):
+    # Parses the movetext into an existing lazy game, so that its headers
+    # select the variant and starting position.
+
+    def __init__(self, game: LazyGame) -> None:
+        super().__init__(Game=LazyGame)
+        self.lazy_game = game
 
     @override
-    def result(self) -> chess.Board:
-        return self.board
+    def begin_game(self) -> None:
+        super().begin_game()
+        self.game = self.lazy_game
+        self.variation_stack = [self.game]
 
 
-class SkipVisitor(BaseVisitor[Literal[True]]):
-    """Skips a game."""
+class CompactGameBuilder(BaseVisitor[CompactGame]):
+    """
+    Creates a :class:`~chess.pgn.CompactGame`. Variations are skipped.
+    Comments are only scanned for clock and evaluation annotations.
+    """
 
     @override
-    def begin_game(self) -> SkipType:
-        return SKIP
+    def begin_game(self) -> None:
+        self.game = CompactGame()
+        self.turn = chess.WHITE
+        self.fen: Optional[str] = None
 
     @override
-    def end_headers(self) -> SkipType:
-        return SKIP
+    def begin_headers(self) -> Headers:
+        return self.game.headers
 
     @override
-    def begin_variation(self) -> SkipType:
-        return SKIP
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        self.game.headers[tagname] = tagvalue
 
     @override
-    def result(self) -> Literal[True]:
-        return True
+    def visit_board(self, board: chess.Board) -> None:
+        if self.fen is None:
+            self.game.fen = self.fen = board.fen()
+        self.turn = board.turn
 
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.game._push(move)
 
-class StringExporterMixin:
-    def __init__(self, *, columns: Optional[int] = 80, headers: bool = True, comments: bool = True, variations: bool = True):
-        self.columns = columns
-        self.headers = headers
-        self.comments = comments
-        self.variations = variations
+    @override
+    def visit_comment(self, comment: Union[str, list[str]]) -> None:
+        index = len(self.game.moves) - 1
+        if index < 0:
+            return
+
+        for text in _standardize_comments(comment):
+            if self.game.clock(index) is None:
+                match = CLOCK_REGEX.search(text)
+                if match:
+                    self.game._add_clock(index, _parse_seconds(match))
+            if self.game.eval(index) is None:
+                match = EVAL_REGEX.search(text)
+                if match:
+                    self.game._add_eval(index, _parse_eval(match, self.turn))
 
-        self.found_headers = False
+    @override
+    def visit_nag(self, nag: int) -> None:
+        if self.game.moves:
+            self.game._add_nag(len(self.game.moves) - 1, nag)
 
-        self.force_movenumber = True
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
 
-        self.lines: List[str] = []
-        self.current_line = ""
-        self.variation_depth = 0
+    @override
+    def visit_result(self, result: str) -> None:
+        if self.game.headers.get("Result", "*") == "*":
+            self.game.headers["Result"] = result
 
-    def flush_current_line(self) -> None:
-        if self.current_line:
-            self.lines.append(self.current_line.rstrip())
-        self.current_line = ""
+    @override
+    def handle_error(self, error: Exception) -> None:
+        """
+        Populates :data:`chess.pgn.CompactGame.errors` with encountered
+        errors and logs them, like :func:`chess.pgn.GameBuilder.handle_error()`.
+        """
+        LOGGER.error("%s while parsing %r", error, self.game)
+        self.game.errors.append(error)
 
-    def write_token(self, token: str) -> None:
-        if self.columns is not None and self.columns - len(self.current_line) < len(token):
-            self.flush_current_line()
-        self.current_line += token
+    @override
+    def result(self) -> CompactGame:
+        return self.game
 
-    def write_line(self, line: str = "") -> None:
-        self.flush_current_line()
-        self.lines.append(line.rstrip())
 
-    def end_game(self) -> None:
-        self.write_line()
+class AnnotationsBuilder(BaseVisitor[Annotations]):
+    """
+    Collects the mainline moves of a game and parses the clock, elapsed
+    move time, evaluation and arrow annotations in their comments into
+    :class:`~chess.pgn.Annotations`. Variations are skipped and no game
+    tree is built.
+    """
 
-    def begin_headers(self) -> None:
-        self.found_headers = False
+    @override
+    def begin_game(self) -> None:
+        self.annotations = Annotations()
+        self.turn = chess.WHITE
+
+    @override
+    def begin_headers(self) -> Headers:
+        return self.annotations.headers
 
+    @override
     def visit_header(self, tagname: str, tagvalue: str) -> None:
-        if self.headers:
-            self.found_headers = True
-            self.write_line(f"[{tagname} \"{tagvalue}\"]")
+        self.annotations.headers[tagname] = tagvalue
 
-    def end_headers(self) -> None:
-        if self.found_headers:
-            self.write_line()
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        self.turn = board.turn
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        annotations = self.annotations
+        annotations.moves.append(move)
+        annotations.clocks.append(None)
+        annotations.emts.append(None)
+        annotations.evals.append(None)
+        annotations.eval_depths.append(None)
+        annotations.arrows.append([])
+
+    @override
+    def visit_comment(self, comment: Union[str, list[str]]) -> None:
+        annotations = self.annotations
+        if not annotations.moves:
+            return
+
+        for text in _standardize_comments(comment):
+            if "[%" not in text:
+                continue
+
+            if annotations.clocks[-1] is None:
+                match = CLOCK_REGEX.search(text)
+                if match:
+                    annotations.clocks[-1] = _parse_seconds(match)
+
+            if annotations.emts[-1] is None:
+                match = EMT_REGEX.search(text)
+                if match:
+                    annotations.emts[-1] = _parse_seconds(match)
+
+            if annotations.evals[-1] is None:
+                match = EVAL_REGEX.search(text)
+                if match:
+                    annotations.evals[-1] = _parse_eval(match, self.turn)
+                    annotations.eval_depths[-1] = int(match.group("depth")) if match.group("depth") else None
+
+            for match in ARROWS_REGEX.finditer(text):
+                for group in match.group("arrows").split(","):
+                    annotations.arrows[-1].append(chess.svg.Arrow.from_pgn(group))
+
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
+
+    @override
+    def visit_result(self, result: str) -> None:
+        if self.annotations.headers.get("Result", "*") == "*":
+            self.annotations.headers["Result"] = result
+
+    @override
+    def handle_error(self, error: Exception) -> None:
+        """
+        Logs the error and appends it to
+        :data:`chess.pgn.Annotations.errors`. After an illegal move, the
+        lists end with the annotations of the last legal move.
+        """
+        LOGGER.error("%s while parsing annotations of %r", error, self.annotations.headers)
+        self.annotations.errors.append(error)
+
+    @override
+    def result(self) -> Annotations:
+        return self.annotations
+
+
+class BoardBuilder(BaseVisitor[chess.Board]):
+    """
+    Returns the final position of the game. The mainline of the game is
+    on the move stack.
+    """
+
+    @override
+    def begin_game(self) -> None:
+        self.skip_variation_depth = 0
+
+    @override
+    def begin_variation(self) -> SkipType:
+        self.skip_variation_depth += 1
+        return SKIP
+
+    @override
+    def end_variation(self) -> None:
+        self.skip_variation_depth = max(self.skip_variation_depth - 1, 0)
+
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        if not self.skip_variation_depth:
+            self.board = board
+
+    @override
+    def result(self) -> chess.Board:
+        return self.board
+
+
+class SkipVisitor(BaseVisitor[Literal[True]]):
+    """Skips a game."""
+
+    @override
+    def begin_game(self) -> SkipType:
+        return SKIP
+
+    @override
+    def end_headers(self) -> SkipType:
+        return SKIP
+
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
+
+    @override
+    def result(self) -> Literal[True]:
+        return True
+
+
+class StringExporterMixin:
+    def __init__(self, *, columns: Optional[int] = 80, headers: bool = True, comments: bool = True, variations: bool = True):
+        self.columns = columns
+        self.headers = headers
+        self.comments = comments
+        self.variations = variations
+
+        self.found_headers = False
+
+        self.force_movenumber = True
+
+        self.lines: List[str] = []
+        self.tokens: List[str] = []
+        self.line_length = 0
+        self.variation_depth = 0
+
+    @property
+    def current_line(self) -> str:
+        return "".join(self.tokens)
+
+    @current_line.setter
+    def current_line(self, line: str) -> None:
+        self.tokens = [line] if line else []
+        self.line_length = len(line)
+
+    def flush_current_line(self) -> None:
+        if self.tokens:
+            self.lines.append("".join(self.tokens).rstrip())
+            self.tokens.clear()
+        self.line_length = 0
+
+    def write_token(self, token: str) -> None:
+        # Wrap based on token lengths, joining each line only once.
+        if self.columns is not None and self.columns - self.line_length < len(token):
+            self.flush_current_line()
+        self.tokens.append(token)
+        self.line_length += len(token)
+
+    def write_line(self, line: str = "") -> None:
+        self.flush_current_line()
+        self.lines.append(line.rstrip())
+
+    def end_game(self) -> None:
+        self.write_line()
+
+    def begin_headers(self) -> None:
+        self.found_headers = False
+
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        if self.headers:
+            self.found_headers = True
+            self.write_line(f"[{tagname} \"{tagvalue}\"]")
+
+    def end_headers(self) -> None:
+        if self.found_headers:
+            self.write_line()
 
     def begin_variation(self) -> Optional[SkipType]:
         self.variation_depth += 1
@@ -1488,7 +2220,7 @@ class StringExporter(StringExporterMixin, BaseVisitor[str]):
 
     @override
     def result(self) -> str:
-        if self.current_line:
+        if self.tokens:
             return "\n".join(itertools.chain(self.lines, [self.current_line.rstrip()])).rstrip()
         else:
             return "\n".join(self.lines).rstrip()
@@ -1521,18 +2253,20 @@ class FileExporter(StringExporterMixin, BaseVisitor[int]):
     @override
     def begin_game(self) -> None:
         self.written: int = 0
+        self.lines.clear()
+        self.current_line = ""
+        self.force_movenumber = True
+        self.variation_depth = 0
         super().begin_game()
 
-    def flush_current_line(self) -> None:
-        if self.current_line:
-            self.written += self.handle.write(self.current_line.rstrip())
-            self.written += self.handle.write("\n")
-        self.current_line = ""
+    @override
+    def end_game(self) -> None:
+        super().end_game()
 
-    def write_line(self, line: str = "") -> None:
-        self.flush_current_line()
-        self.written += self.handle.write(line.rstrip())
-        self.written += self.handle.write("\n")
+        # Write the entire game at once.
+        self.lines.append("")
+        self.written += self.handle.write("\n".join(self.lines))
+        self.lines.clear()
 
     @override
     def result(self) -> int:
@@ -1545,317 +2279,2565 @@ class FileExporter(StringExporterMixin, BaseVisitor[int]):
         return self.__repr__()
 
 
-@typing.overload
-def read_game(handle: TextIO) -> Optional[Game]: ...
-@typing.overload
-def read_game(handle: TextIO, *, Visitor: Callable[[], BaseVisitor[ResultT]]) -> Optional[ResultT]: ...
-def read_game(handle: TextIO, *, Visitor: Any = GameBuilder) -> Any:
+def write_games(handle: TextIO, games: Iterable[GameNode], *, columns: Optional[int] = 80, headers: bool = True, comments: bool = True, variations: bool = True) -> int:
     """
-    Reads a game from a file opened in text mode.
+    Writes all *games* to a text file, reusing a single
+    :class:`~chess.pgn.FileExporter`. Returns the number of characters
+    written.
 
     >>> import chess.pgn
     >>>
-    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
-    >>>
-    >>> first_game = chess.pgn.read_game(pgn)
-    >>> second_game = chess.pgn.read_game(pgn)
-    >>>
-    >>> first_game.headers["Event"]
-    'IBM Man-Machine, New York USA'
+    >>> with open("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+    ...     games = list(chess.pgn.iter_games(pgn))
     >>>
-    >>> # Iterate through all moves and play them on a board.
-    >>> board = first_game.board()
-    >>> for move in first_game.mainline_moves():
-    ...     board.push(move)
-    ...
-    >>> board
-    Board('4r3/6P1/2p2P1k/1p6/pP2p1R1/P1B5/2P2K2/3r4 b - - 0 45')
+    >>> with open("normalized.pgn", "w", encoding="utf-8") as f:  # doctest: +SKIP
+    ...     chess.pgn.write_games(f, (game for _, game in games), comments=False)
+    """
+    exporter = FileExporter(handle, columns=columns, headers=headers, comments=comments, variations=variations)
+    return sum(game.accept(exporter) for game in games)
 
-    By using text mode, the parser does not need to handle encodings. It is the
-    caller's responsibility to open the file with the correct encoding.
-    PGN files are usually ASCII or UTF-8 encoded, sometimes with BOM (which
-    this parser automatically ignores). See :func:`open` for options to
-    deal with encoding errors.
 
-    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn", encoding="utf-8")
+class ColumnarExporter(BaseVisitor[int]):
+    """
+    Collects the mainlines of many games into columns with one entry per
+    move, for analysis with columnar tools like NumPy.
 
-    Use :class:`~io.StringIO` to parse games from a string.
+    The same exporter is used for all games. Its result for each game is
+    the number of moves added.
 
-    >>> import io
+    >>> import chess.pgn
     >>>
-    >>> pgn = io.StringIO("1. e4 e5 2. Nf3 *")
-    >>> game = chess.pgn.read_game(pgn)
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>>
+    >>> exporter = chess.pgn.ColumnarExporter(headers=["White", "Result"])
+    >>> while chess.pgn.read_game(pgn, Visitor=lambda: exporter) is not None:
+    ...     pass
+    >>>
+    >>> exporter.save("kasparov-deep-blue-1997")  # doctest: +SKIP
+
+    Per move columns:
+
+    * ``game``: Index of the game (unsigned 32 bit).
+    * ``ply``: Ply before the move, like :func:`chess.Board.ply()`
+      (unsigned 32 bit).
+    * ``move``: Move, packed like :data:`chess.pgn.CompactGame.moves`
+      (unsigned 16 bit).
+    * ``san``: Index of the SAN of the move in the ``san`` dictionary
+      (unsigned 32 bit). Only if *san* is enabled.
+    * ``clock``: Remaining time in seconds from ``[%clk ...]``, or ``nan``
+      (64 bit float).
+    * ``eval``: Evaluation from ``[%eval ...]``, encoded like
+      :data:`chess.pgn.CompactGame.evals` (signed 32 bit).
+
+    For each of the selected *headers*, there is a per game column
+    ``header_<tagname>`` (unsigned 32 bit) with indexes into the
+    dictionary of that header. Missing headers are empty strings.
+
+    Variations are skipped.
+    """
 
-    The end of a game is determined by a completely blank line or the end of
-    the file. (Of course, blank lines in comments are possible).
+    def __init__(self, *, headers: Iterable[str] = ("White", "Black", "Result"), san: bool = True) -> None:
+        self.san = san
+        self.header_names = list(headers)
+        self.games = 0
+
+        self.columns: Dict[str, array.array[Any]] = {
+            "game": array.array("I"),
+            "ply": array.array("I"),
+            "move": array.array("H"),
+            "clock": array.array("d"),
+            "eval": array.array("i"),
+        }
+        if san:
+            self.columns["san"] = array.array("I")
+        for name in self.header_names:
+            self.columns[f"header_{name}"] = array.array("I")
+
+        self.dictionaries: Dict[str, Dict[str, int]] = {}
+        if san:
+            self.dictionaries["san"] = {}
+        for name in self.header_names:
+            self.dictionaries[f"header_{name}"] = {}
+
+    def _encode(self, column: str, value: str) -> int:
+        dictionary = self.dictionaries[column]
+        try:
+            return dictionary[value]
+        except KeyError:
+            dictionary[value] = code = len(dictionary)
+            return code
 
-    According to the PGN standard, at least the usual seven header tags are
-    required for a valid game. This parser also handles games without any
-    headers just fine.
+    @override
+    def begin_game(self) -> None:
+        self.start = len(self.columns["move"])
+        self.headers: Dict[str, str] = {}
+        self.turn = chess.WHITE
 
-    The parser is relatively forgiving when it comes to errors. It skips over
-    tokens it can not parse. By default, any exceptions are logged and
-    collected in :data:`Game.errors <chess.pgn.Game.errors>`. This behavior can
-    be :func:`overridden <chess.pgn.GameBuilder.handle_error>`.
+    @override
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        if tagname in self.header_names:
+            self.headers[tagname] = tagvalue
 
-    Returns the parsed game or ``None`` if the end of file is reached.
-    """
-    visitor = Visitor()
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        self.turn = board.turn
 
-    found_game = False
-    skipping_game = False
-    managed_headers: Optional[Headers] = None
-    unmanaged_headers: Optional[Headers] = None
-    board_stack: List[chess.Board] = []
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        columns = self.columns
+        columns["game"].append(self.games)
+        columns["ply"].append(board.ply())
+        columns["move"].append(_pack_move(move))
+        columns["clock"].append(math.nan)
+        columns["eval"].append(COMPACT_NO_EVAL)
+        if self.san:
+            columns["san"].append(self._encode("san", board.san(move)))
 
-    # Ignore leading empty lines and comments.
-    line = handle.readline().lstrip("\ufeff")
-    while line.isspace() or line.startswith("%") or line.startswith(";"):
-        line = handle.readline()
+    @override
+    def visit_comment(self, comment: Union[str, list[str]]) -> None:
+        if len(self.columns["move"]) <= self.start:
+            return
 
-    # Parse game headers.
-    consecutive_empty_lines = 0
-    while line:
-        # Ignore comments.
-        if line.startswith("%") or line.startswith(";"):
-            line = handle.readline()
-            continue
+        clocks = self.columns["clock"]
+        evals = self.columns["eval"]
+        for text in _standardize_comments(comment):
+            if "[%" not in text:
+                continue
 
-        # Ignore up to one consecutive empty line between headers.
-        if consecutive_empty_lines < 1 and line.isspace():
-            consecutive_empty_lines += 1
-            line = handle.readline()
-            continue
+            if math.isnan(clocks[-1]):
+                match = CLOCK_REGEX.search(text)
+                if match:
+                    clocks[-1] = _parse_seconds(match)
 
-        # First token of the game.
-        if not found_game:
-            found_game = True
-            skipping_game = visitor.begin_game() is SKIP
-            if not skipping_game:
-                managed_headers = visitor.begin_headers()
-                if not isinstance(managed_headers, Headers):
-                    unmanaged_headers = Headers({})
+            if evals[-1] == COMPACT_NO_EVAL:
+                match = EVAL_REGEX.search(text)
+                if match:
+                    evals[-1] = _pack_eval(_parse_eval(match, self.turn))
 
-        stripped = line.lstrip()
-        if not stripped.startswith("["):
-            break
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
 
-        consecutive_empty_lines = 0
+    @override
+    def visit_result(self, result: str) -> None:
+        if self.headers.get("Result", "*") == "*":
+            self.headers["Result"] = result
 
-        if not skipping_game:
-            tag_match = TAG_REGEX.match(stripped)
-            if tag_match:
-                visitor.visit_header(tag_match.group(1), tag_match.group(2))
-                if unmanaged_headers is not None:
-                    unmanaged_headers[tag_match.group(1)] = tag_match.group(2)
-            else:
-                # Ignore invalid or malformed headers.
-                line = handle.readline()
-                continue
+    @override
+    def end_game(self) -> None:
+        for name in self.header_names:
+            column = f"header_{name}"
+            self.columns[column].append(self._encode(column, self.headers.get(name, "")))
+        self.games += 1
 
-        line = handle.readline()
+    @override
+    def handle_error(self, error: Exception) -> None:
+        """
+        Logs errors and continues with the next game, keeping the moves
+        that were already added.
+        """
+        LOGGER.error("%s while exporting game %d to columns", error, self.games)
 
-    if not found_game:
-        return None
+    @override
+    def result(self) -> int:
+        return len(self.columns["move"]) - self.start
 
-    if not skipping_game:
-        skipping_game = visitor.end_headers() is SKIP
+    def values(self, column: str) -> List[str]:
+        """
+        Gets the string dictionary of a column, mapping indexes to
+        strings.
+        """
+        return list(self.dictionaries[column])
 
-    if not skipping_game:
-        # Chess variant.
-        headers = managed_headers if unmanaged_headers is None else unmanaged_headers
-        assert headers is not None, "got neither managed nor unmanaged headers"
-        try:
-            VariantBoard = headers.variant()
-        except ValueError as error:
-            visitor.handle_error(error)
-            VariantBoard = chess.Board
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Gets all columns as NumPy arrays. String dictionaries are included
+        as ``<column>_values``.
 
-        # Initial position.
-        fen = headers.get("FEN", VariantBoard.starting_fen)
-        try:
+        Requires the ``numpy`` package.
+        """
+        import numpy  # type: ignore[import-not-found, unused-ignore]
+
+        arrays = {name: numpy.frombuffer(column, dtype=column.typecode).copy() for name, column in self.columns.items()}
+        for name in self.dictionaries:
+            arrays[f"{name}_values"] = numpy.array(self.values(name), dtype=str)
+        return arrays
+
+    def save_npz(self, file: Union[str, BinaryIO], *, compressed: bool = False) -> None:
+        """
+        Saves all columns and string dictionaries to a NumPy ``.npz`` file.
+
+        Requires the ``numpy`` package.
+        """
+        import numpy  # type: ignore[import-not-found, unused-ignore]
+
+        arrays = self.to_numpy()
+        if compressed:
+            numpy.savez_compressed(file, **arrays)
+        else:
+            numpy.savez(file, **arrays)
+
+    def save(self, directory: str) -> None:
+        """
+        Saves each column as raw little endian binary file ``<column>.bin``
+        in *directory*, which will be created if needed.
+
+        ``columns.json`` describes the column types (as NumPy dtype
+        strings) and lengths, and contains the string dictionaries. The
+        columns can be memory mapped, for example with
+        ``numpy.memmap(path, dtype=dtype, mode="r")``.
+
+        Does not require NumPy.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        manifest: Dict[str, Any] = {"games": self.games, "columns": {}, "dictionaries": {}}
+        for name, column in self.columns.items():
+            kind = "f" if column.typecode == "d" else "i" if column.typecode.islower() else "u"
+            manifest["columns"][name] = {"dtype": f"<{kind}{column.itemsize}", "length": len(column)}
+
+            if sys.byteorder == "big":
+                column = array.array(column.typecode, column)
+                column.byteswap()
+            with open(os.path.join(directory, f"{name}.bin"), "wb") as f:
+                column.tofile(f)
+
+        for name in self.dictionaries:
+            manifest["dictionaries"][name] = self.values(name)
+
+        with open(os.path.join(directory, "columns.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    def __repr__(self) -> str:
+        return f"<ColumnarExporter at {id(self):#x} ({self.games} games, {len(self.columns['move'])} moves)>"
+
+
+FINGERPRINT_SIZE = 16
+
+
+class FingerprintBuilder(BaseVisitor[bytes]):
+    """
+    Computes a fingerprint of a game without building a game tree: a
+    :data:`~chess.pgn.FINGERPRINT_SIZE` byte BLAKE2b hash of the variant and
+    starting position, the packed mainline moves
+    (see :class:`~chess.pgn.CompactGame`) and the values of the selected
+    *headers*.
+
+    Games with the same mainline from the same starting position have the
+    same fingerprint, regardless of formatting, comments, variations or
+    the way moves are written.
+
+    >>> import chess.pgn
+    >>>
+    >>> pgn = io.StringIO("1. e4 { Best by test } e5 2. Ng1f3 (2. Nc3) *")
+    >>> other = io.StringIO("1. e4 e5 2. Nf3 1-0")
+    >>>
+    >>> chess.pgn.read_game(pgn, Visitor=chess.pgn.FingerprintBuilder) == chess.pgn.read_game(other, Visitor=chess.pgn.FingerprintBuilder)
+    True
+
+    Use :func:`functools.partial()` to select headers, for example
+    ``functools.partial(chess.pgn.FingerprintBuilder, headers=["White", "Black", "Date"])``.
+    """
+
+    def __init__(self, *, headers: Iterable[str] = ()) -> None:
+        self.header_names = list(headers)
+
+    @override
+    def begin_game(self) -> None:
+        self.setup: Optional[str] = None
+        self.moves = array.array("H")
+        self.headers: Dict[str, str] = {}
+
+    @override
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        if tagname in self.header_names:
+            self.headers[tagname] = tagvalue
+
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        if self.setup is None:
+            self.setup = f"{type(board).uci_variant} {board.fen()}"
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.moves.append(_pack_move(move))
+
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
+
+    @override
+    def handle_error(self, error: Exception) -> None:
+        """
+        Logs errors, like :func:`chess.pgn.GameBuilder.handle_error()`.
+        The fingerprint covers the moves up to the error.
+        """
+        LOGGER.error("%s while computing fingerprint of %r", error, self.headers)
+
+    @override
+    def result(self) -> bytes:
+        moves = self.moves
+        if sys.byteorder == "big":
+            moves = array.array("H", moves)
+            moves.byteswap()
+
+        fingerprint = hashlib.blake2b(digest_size=FINGERPRINT_SIZE)
+        fingerprint.update((self.setup or "").encode("utf-8"))
+        fingerprint.update(struct.pack("<I", len(moves)))
+        fingerprint.update(moves.tobytes())
+        for name in self.header_names:
+            fingerprint.update(f"\0{name}\0{self.headers.get(name, '')}".encode("utf-8"))
+        return fingerprint.digest()
+
+
+class Opening(typing.NamedTuple):
+    """An opening from an :class:`~chess.pgn.OpeningTable`."""
+
+    eco: str
+    """The ECO code, like ``C50``."""
+
+    name: str
+    """The name of the opening, like ``Italian Game``."""
+
+    moves: Tuple[chess.Move, ...]
+    """The moves from the standard starting position."""
+
+
+OPENING_MOVE_NUMBER_REGEX = re.compile(r"\d+\.+")
+
+
+class OpeningTable:
+    """
+    A table of openings, stored in a trie of packed moves
+    (see :class:`~chess.pgn.CompactGame`) and in a dictionary of the
+    Zobrist hashes (see :func:`chess.polyglot.zobrist_hash()`) of their
+    final positions, to also classify transpositions.
+
+    See :func:`~chess.pgn.read_opening_table()` to load openings from a
+    file, and :class:`~chess.pgn.OpeningClassifier` or
+    :class:`~chess.pgn.OpeningGameBuilder` to classify games while
+    parsing.
+    """
+
+    def __init__(self) -> None:
+        # Maps parent node << 16 | packed move to the child node.
+        self.trie: Dict[int, int] = {}
+        self.openings: List[Optional[Opening]] = [None]
+        self.positions: Dict[int, Opening] = {}
+
+        self.max_ply = 0
+        """The number of moves of the longest opening."""
+
+    def add(self, eco: str, name: str, moves: Union[str, Iterable[chess.Move]]) -> Opening:
+        """
+        Adds an opening, given by the ECO code, the name and the moves from
+        the standard starting position, either as a list of moves or as
+        SAN movetext like ``1. e4 e5 2. Nf3 Nc6 3. Bc4``.
+
+        :raises: :exc:`ValueError` if the moves are not legal.
+        """
+        board = chess.Board()
+        if isinstance(moves, str):
+            for san in OPENING_MOVE_NUMBER_REGEX.sub(" ", moves).split():
+                board.push_san(san)
+        else:
+            for move in moves:
+                if not board.is_legal(move):
+                    raise chess.IllegalMoveError(f"illegal move in opening {eco} {name}: {move}")
+                board.push(move)
+
+        opening = Opening(eco, name, tuple(board.move_stack))
+
+        node = 0
+        for move in opening.moves:
+            edge = node << 16 | _pack_move(move)
+            child = self.trie.get(edge)
+            if child is None:
+                child = self.trie[edge] = len(self.openings)
+                self.openings.append(None)
+            node = child
+
+        self.openings[node] = opening
+        self.positions.setdefault(chess.polyglot.zobrist_hash(board), opening)
+        self.max_ply = max(self.max_ply, len(opening.moves))
+        return opening
+
+    def classify(self, game: Union[GameNode, Iterable[chess.Move]]) -> Optional[Opening]:
+        """
+        Finds the opening of a game (or of a sequence of moves from the
+        standard starting position), like
+        :class:`~chess.pgn.OpeningClassifier`.
+        """
+        if isinstance(game, GameNode):
+            board = game.game().board()
+            moves: Iterable[chess.Move] = game.game().mainline_moves()
+        else:
+            board = chess.Board()
+            moves = game
+
+        tracker = _OpeningTracker(self)
+        tracker.begin(board)
+        for move in moves:
+            if tracker.ply >= self.max_ply:
+                break
+            tracker.push(move)
+            board.push(move)
+            tracker.visit_board(board)
+        return tracker.opening
+
+    def __len__(self) -> int:
+        return sum(opening is not None for opening in self.openings)
+
+    def __repr__(self) -> str:
+        return f"<OpeningTable at {id(self):#x} ({len(self)} openings)>"
+
+
+def read_opening_table(handle: TextIO, *, table: Optional[OpeningTable] = None) -> OpeningTable:
+    """
+    Reads openings from a tab separated file with the columns name, ECO
+    code and moves (see :func:`chess.pgn.OpeningTable.add()`) into a new
+    or the given *table*.
+
+    A header row can select a different order of columns, using the names
+    ``name``, ``eco`` and ``moves`` (or ``pgn``), as in the tables of the
+    `lichess-org/chess-openings <https://github.com/lichess-org/chess-openings>`_
+    project. Empty lines and lines starting with ``#`` are ignored.
+
+    >>> import chess.pgn
+    >>>
+    >>> table = chess.pgn.read_opening_table(io.StringIO("eco\\tname\\tpgn\\nC50\\tItalian Game\\t1. e4 e5 2. Nf3 Nc6 3. Bc4\\n"))
+    >>> table.classify([chess.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "f1c4", "b8c6", "g1f3", "g8f6"]])
+    Opening(eco='C50', name='Italian Game', moves=(Move.from_uci('e2e4'), Move.from_uci('e7e5'), Move.from_uci('g1f3'), Move.from_uci('b8c6'), Move.from_uci('f1c4')))
+
+    :raises: :exc:`ValueError` with the line number if an opening is
+        invalid.
+    """
+    table = OpeningTable() if table is None else table
+    name_column, eco_column, moves_column = 0, 1, 2
+
+    for line_number, line in enumerate(handle, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+
+        columns = line.split("\t")
+        if line_number == 1:
+            lowered = [column.strip().lower() for column in columns]
+            if "name" in lowered and "eco" in lowered:
+                name_column = lowered.index("name")
+                eco_column = lowered.index("eco")
+                moves_column = lowered.index("moves") if "moves" in lowered else lowered.index("pgn")
+                continue
+
+        try:
+            table.add(columns[eco_column].strip(), columns[name_column].strip(), columns[moves_column])
+        except (IndexError, ValueError) as error:
+            raise ValueError(f"invalid opening in line {line_number}: {error}") from error
+
+    return table
+
+
+class _OpeningTracker:
+    def __init__(self, table: OpeningTable) -> None:
+        self.table = table
+
+    def begin(self, board: chess.Board) -> None:
+        # The trie only applies to games from the standard starting position.
+        standard = type(board).uci_variant == "chess" and not board.chess960 and board.fen() == chess.STARTING_FEN
+        self.node: Optional[int] = 0 if standard else None
+        self.ply = 0
+        self.opening: Optional[Opening] = None
+        self.lookup = False
+
+    def push(self, move: chess.Move) -> None:
+        self.ply += 1
+        if self.node is not None:
+            self.node = self.table.trie.get(self.node << 16 | _pack_move(move))
+        if self.node is not None:
+            opening = self.table.openings[self.node]
+            if opening is not None:
+                self.opening = opening
+                self.lookup = False
+                return
+        self.lookup = self.ply <= self.table.max_ply
+
+    def visit_board(self, board: chess.Board) -> None:
+        if self.lookup:
+            self.lookup = False
+            opening = self.table.positions.get(chess.polyglot.zobrist_hash(board))
+            if opening is not None:
+                self.opening = opening
+
+
+class OpeningClassifier(BaseVisitor[Optional[Opening]]):
+    """
+    Finds the opening of a game in an :class:`~chess.pgn.OpeningTable`,
+    while parsing, without building a game model.
+
+    The opening is the one reached last in the mainline: by following the
+    moves in the trie, or by transposition, using the Zobrist hash of the
+    position. Returns ``None`` if no opening was reached. Moves after the
+    longest opening in the table are not even parsed.
+
+    >>> import chess.pgn
+    >>> import functools
+    >>>
+    >>> table = chess.pgn.OpeningTable()
+    >>> table.add("C50", "Italian Game", "1. e4 e5 2. Nf3 Nc6 3. Bc4")
+    Opening(eco='C50', name='Italian Game', moves=(...))
+    >>>
+    >>> pgn = io.StringIO("1. e4 e5 2. Bc4 Nc6 3. Nf3 Nf6 *")
+    >>> chess.pgn.read_game(pgn, Visitor=functools.partial(chess.pgn.OpeningClassifier, table)).name
+    'Italian Game'
+    """
+
+    def __init__(self, table: OpeningTable) -> None:
+        self.tracker = _OpeningTracker(table)
+
+    @override
+    def begin_game(self) -> None:
+        self.started = False
+
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        if not self.started:
+            self.started = True
+            self.tracker.begin(board)
+        elif self.tracker.lookup:
+            self.tracker.visit_board(board)
+
+    @override
+    def begin_parse_san(self, board: chess.Board, san: str) -> Optional[SkipType]:
+        return SKIP if self.tracker.ply >= self.tracker.table.max_ply else None
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.tracker.push(move)
+
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
+
+    @override
+    def handle_error(self, error: Exception) -> None:
+        LOGGER.error("%s while classifying opening", error)
+
+    @override
+    def result(self) -> Optional[Opening]:
+        return self.tracker.opening if self.started else None
+
+
+class OpeningGameBuilder(GameBuilder[GameT]):
+    """
+    Creates a game model, like :class:`~chess.pgn.GameBuilder`, and
+    classifies the opening while parsing, like
+    :class:`~chess.pgn.OpeningClassifier`.
+
+    The ``ECO`` and ``Opening`` headers are set if an opening was found.
+    Existing headers are kept, unless *overwrite* is set.
+
+    >>> import chess.pgn
+    >>> import functools
+    >>>
+    >>> table = chess.pgn.OpeningTable()
+    >>> table.add("C50", "Italian Game", "1. e4 e5 2. Nf3 Nc6 3. Bc4")
+    Opening(eco='C50', name='Italian Game', moves=(...))
+    >>>
+    >>> pgn = io.StringIO("1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 *")
+    >>> game = chess.pgn.read_game(pgn, Visitor=functools.partial(chess.pgn.OpeningGameBuilder, table))
+    >>> game.headers["ECO"], game.headers["Opening"]
+    ('C50', 'Italian Game')
+    """
+
+    @typing.overload
+    def __init__(self: OpeningGameBuilder[Game], table: OpeningTable, *, overwrite: bool = False) -> None: ...
+    @typing.overload
+    def __init__(self, table: OpeningTable, *, Game: Type[GameT], overwrite: bool = False) -> None: ...
+    def __init__(self, table: OpeningTable, *, Game: Any = Game, overwrite: bool = False) -> None:
+        super().__init__(Game=Game)
+        self.tracker = _OpeningTracker(table)
+        self.overwrite = overwrite
+
+    @override
+    def begin_game(self) -> None:
+        super().begin_game()
+        self.started = False
+        self.variation_depth = 0
+
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        if not self.started:
+            self.started = True
+            self.tracker.begin(board)
+        elif self.tracker.lookup and not self.variation_depth:
+            self.tracker.visit_board(board)
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        super().visit_move(board, move)
+        if not self.variation_depth and self.tracker.ply < self.tracker.table.max_ply:
+            self.tracker.push(move)
+
+    @override
+    def begin_variation(self) -> None:
+        super().begin_variation()
+        self.variation_depth += 1
+
+    @override
+    def end_variation(self) -> None:
+        super().end_variation()
+        self.variation_depth -= 1
+
+    @override
+    def end_game(self) -> None:
+        opening = self.tracker.opening if self.started else None
+        if opening is not None:
+            headers = self.game.headers
+            if self.overwrite or "ECO" not in headers:
+                headers["ECO"] = opening.eco
+            if self.overwrite or "Opening" not in headers:
+                headers["Opening"] = opening.name
+
+
+HeaderFilter = Union[Callable[[Headers], bool], Iterable[Tuple[str, str, Any]]]
+
+_HEADER_FILTER_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda actual, value: actual in value,
+    "contains": operator.contains,
+}
+
+
+def _header_predicate(where: HeaderFilter) -> Callable[[Headers], bool]:
+    if callable(where):
+        return where
+
+    conditions = []
+    for tag, op, value in where:
+        try:
+            compare = _HEADER_FILTER_OPERATORS[op]
+        except KeyError:
+            raise ValueError(f"unknown operator in header filter: {op!r}")
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        conditions.append((tag, compare, value, numeric))
+
+    def predicate(headers: Headers) -> bool:
+        for tag, compare, value, numeric in conditions:
+            actual: Any = headers.get(tag)
+            if actual is None:
+                return False
+            if numeric:
+                try:
+                    actual = float(actual)
+                except ValueError:
+                    return False
+            if not compare(actual, value):
+                return False
+        return True
+
+    return predicate
+
+
+class _FilteredType(enum.Enum):
+    FILTERED = None
+
+_FILTERED = _FilteredType.FILTERED
+
+
+@typing.overload
+def read_game(handle: TextIO, *, where: Optional[HeaderFilter] = None) -> Optional[Game]: ...
+@typing.overload
+def read_game(handle: TextIO, *, Visitor: Callable[[], BaseVisitor[ResultT]], where: Optional[HeaderFilter] = None) -> Optional[ResultT]: ...
+def read_game(handle: TextIO, *, Visitor: Any = GameBuilder, where: Optional[HeaderFilter] = None) -> Any:
+    """
+    Reads a game from a file opened in text mode.
+
+    >>> import chess.pgn
+    >>>
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>>
+    >>> first_game = chess.pgn.read_game(pgn)
+    >>> second_game = chess.pgn.read_game(pgn)
+    >>>
+    >>> first_game.headers["Event"]
+    'IBM Man-Machine, New York USA'
+    >>>
+    >>> # Iterate through all moves and play them on a board.
+    >>> board = first_game.board()
+    >>> for move in first_game.mainline_moves():
+    ...     board.push(move)
+    ...
+    >>> board
+    Board('4r3/6P1/2p2P1k/1p6/pP2p1R1/P1B5/2P2K2/3r4 b - - 0 45')
+
+    By using text mode, the parser does not need to handle encodings. It is the
+    caller's responsibility to open the file with the correct encoding.
+    PGN files are usually ASCII or UTF-8 encoded, sometimes with BOM (which
+    this parser automatically ignores). See :func:`open` for options to
+    deal with encoding errors.
+
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn", encoding="utf-8")
+
+    Use :class:`~io.StringIO` to parse games from a string.
+
+    >>> import io
+    >>>
+    >>> pgn = io.StringIO("1. e4 e5 2. Nf3 *")
+    >>> game = chess.pgn.read_game(pgn)
+
+    The end of a game is determined by a completely blank line or the end of
+    the file. (Of course, blank lines in comments are possible).
+
+    According to the PGN standard, at least the usual seven header tags are
+    required for a valid game. This parser also handles games without any
+    headers just fine.
+
+    The parser is relatively forgiving when it comes to errors. It skips over
+    tokens it can not parse. By default, any exceptions are logged and
+    collected in :data:`Game.errors <chess.pgn.Game.errors>`. This behavior can
+    be :func:`overridden <chess.pgn.GameBuilder.handle_error>`.
+
+    Games can be filtered by their headers with *where*. Games that do not
+    match are skipped without parsing their movetext, and without being seen
+    by the visitor. The filter is either a function that gets the
+    :class:`~chess.pgn.Headers`, or a list of conditions in the form
+    ``(tag, operator, value)`` that must all be satisfied. Operators are
+    ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``in`` and ``contains``.
+    Header values are converted to numbers for comparisons with numbers.
+    Games that do not have the tag never satisfy a condition.
+
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>>
+    >>> game = chess.pgn.read_game(pgn, where=[("White", "contains", "Kasparov"), ("Result", "==", "1/2-1/2")])
+    >>> game.headers["Site"]
+    '03'
+
+    Returns the parsed game or ``None`` if the end of file is reached.
+    """
+    predicate = None if where is None else _header_predicate(where)
+    while True:
+        result = _read_game(handle, Visitor, predicate)
+        if result is not _FILTERED:
+            return result
+
+
+def _read_game(handle: _LineSource, Visitor: Callable[[], BaseVisitor[ResultT]], where: Optional[Callable[[Headers], bool]]) -> Union[ResultT, None, _FilteredType]:
+    visitor: BaseVisitor[ResultT]
+
+    found_game = False
+    skipping_game = False
+    managed_headers: Optional[Headers] = None
+    unmanaged_headers: Optional[Headers] = None
+    filter_tags: Optional[List[Tuple[str, str]]] = None
+
+    # Ignore leading empty lines and comments.
+    line = handle.readline().lstrip("\ufeff")
+    while line.isspace() or line.startswith("%") or line.startswith(";"):
+        line = handle.readline()
+
+    # Parse game headers.
+    consecutive_empty_lines = 0
+    while line:
+        # Ignore comments.
+        if line.startswith("%") or line.startswith(";"):
+            line = handle.readline()
+            continue
+
+        # Ignore up to one consecutive empty line between headers.
+        if consecutive_empty_lines < 1 and line.isspace():
+            consecutive_empty_lines += 1
+            line = handle.readline()
+            continue
+
+        # First token of the game.
+        if not found_game:
+            found_game = True
+            if where is not None:
+                # Collect headers for the filter before creating the
+                # visitor.
+                filter_tags = []
+            else:
+                visitor = Visitor()
+                skipping_game = visitor.begin_game() is SKIP
+                if not skipping_game:
+                    managed_headers = visitor.begin_headers()
+                    if not isinstance(managed_headers, Headers):
+                        unmanaged_headers = Headers({})
+
+        stripped = line.lstrip()
+        if not stripped.startswith("["):
+            break
+
+        consecutive_empty_lines = 0
+
+        if filter_tags is not None:
+            tag_match = TAG_REGEX.match(stripped)
+            if tag_match:
+                filter_tags.append((tag_match.group(1), tag_match.group(2)))
+        elif not skipping_game:
+            tag_match = TAG_REGEX.match(stripped)
+            if tag_match:
+                visitor.visit_header(tag_match.group(1), tag_match.group(2))
+                if unmanaged_headers is not None:
+                    unmanaged_headers[tag_match.group(1)] = tag_match.group(2)
+            else:
+                # Ignore invalid or malformed headers.
+                line = handle.readline()
+                continue
+
+        line = handle.readline()
+
+    if not found_game:
+        return None
+
+    if filter_tags is not None:
+        assert where is not None, "collected headers without filter"
+        if not where(Headers(filter_tags)):
+            _skip_movetext_lines(handle, line)
+            return _FILTERED
+
+        visitor = Visitor()
+        skipping_game = visitor.begin_game() is SKIP
+        if not skipping_game:
+            managed_headers = visitor.begin_headers()
+            if not isinstance(managed_headers, Headers):
+                unmanaged_headers = Headers({})
+            for tagname, tagvalue in filter_tags:
+                visitor.visit_header(tagname, tagvalue)
+                if unmanaged_headers is not None:
+                    unmanaged_headers[tagname] = tagvalue
+
+    visited_headers = not skipping_game
+    if not skipping_game:
+        skipping_game = visitor.end_headers() is SKIP
+
+    if not skipping_game:
+        # Chess variant.
+        headers = managed_headers if unmanaged_headers is None else unmanaged_headers
+        assert headers is not None, "got neither managed nor unmanaged headers"
+        try:
+            VariantBoard = headers.variant()
+        except ValueError as error:
+            visitor.handle_error(error)
+            VariantBoard = chess.Board
+
+        # Initial position.
+        fen = headers.get("FEN", VariantBoard.starting_fen)
+        try:
             board = VariantBoard(fen, chess960=headers.is_chess960())
         except ValueError as error:
             visitor.handle_error(error)
             skipping_game = True
         else:
-            board.chess960 = board.chess960 or board.has_chess960_castling_rights()
-            board_stack = [board]
-            visitor.visit_board(board)
+            board.chess960 = board.chess960 or board.has_chess960_castling_rights()
+            visitor.visit_board(board)
+
+    # Fast path: Skip entire game.
+    movetext_lines: List[str] = []
+    if skipping_game:
+        if visited_headers and _overrides(visitor, "visit_movetext"):
+            _skip_movetext_lines(handle, line, movetext_lines)
+            visitor.visit_movetext("".join(movetext_lines))
+        else:
+            _skip_movetext_lines(handle, line)
+        visitor.end_game()
+        return visitor.result()
+
+    # Read the entire movetext of the game, up to the next empty line
+    # outside of comments, and tokenize it at once.
+    _skip_movetext_lines(handle, line, movetext_lines)
+    movetext = "".join(movetext_lines)
+
+    # Parse movetext. Variations are played on the same board, remembering
+    # the move they replace and the length of the move stack at their start.
+    variation_stack: List[Tuple[chess.Move, int]] = []
+    skip_variation_depth = 0
+    pos = 0
+    while True:
+        match = MOVETEXT_BLOCK_REGEX.search(movetext, pos)
+        if match is None:
+            break
+        token = match.group(0)
+        pos = match.end()
+
+        if token == "{":
+            # Find the end of the comment.
+            start = pos + 1 if movetext.startswith(" ", pos) else pos
+            close = movetext.find("}", start)
+            if close == -1:
+                end = pos = len(movetext)
+            else:
+                end = close - 1 if close > start and movetext[close - 1] == " " else close
+                pos = close + 1
+
+            if not skip_variation_depth:
+                # Visitors have always been given the comment as a string.
+                visitor.visit_comment(movetext[start:end])  # type: ignore
+        elif token == "(":
+            if skip_variation_depth:
+                skip_variation_depth += 1
+            elif board.move_stack:
+                if visitor.begin_variation() is SKIP:
+                    skip_variation_depth = 1
+                else:
+                    move = board.pop()
+                    variation_stack.append((move, len(board.move_stack)))
+        elif token == ")":
+            if skip_variation_depth == 1:
+                skip_variation_depth = 0
+                visitor.end_variation()
+            elif skip_variation_depth:
+                skip_variation_depth -= 1
+            elif variation_stack:
+                visitor.end_variation()
+                move, stack_length = variation_stack.pop()
+                while len(board.move_stack) > stack_length:
+                    board.pop()
+                board.push(move)
+        elif skip_variation_depth or token.startswith(";") or token.startswith("%"):
+            continue
+        elif token.startswith("$"):
+            # Found a NAG.
+            visitor.visit_nag(int(token[1:]))
+        elif token == "?":
+            visitor.visit_nag(NAG_MISTAKE)
+        elif token == "??":
+            visitor.visit_nag(NAG_BLUNDER)
+        elif token == "!":
+            visitor.visit_nag(NAG_GOOD_MOVE)
+        elif token == "!!":
+            visitor.visit_nag(NAG_BRILLIANT_MOVE)
+        elif token == "!?":
+            visitor.visit_nag(NAG_SPECULATIVE_MOVE)
+        elif token == "?!":
+            visitor.visit_nag(NAG_DUBIOUS_MOVE)
+        elif token in ["1-0", "0-1", "1/2-1/2", "*"] and not variation_stack:
+            visitor.visit_result(token)
+        else:
+            # Parse SAN tokens.
+            if visitor.begin_parse_san(board, token) is not SKIP:
+                try:
+                    move = board.parse_san(token)
+                except ValueError as error:
+                    visitor.handle_error(error)
+                    skip_variation_depth = 1
+                else:
+                    visitor.visit_move(board, move)
+                    board.push(move)
+            visitor.visit_board(board)
+
+    visitor.end_game()
+    return visitor.result()
+
+
+def _skip_movetext_lines(handle: _LineSource, line: str, lines: Optional[List[str]] = None) -> None:
+    # Consume lines until the end of the game, only looking for comments
+    # that could contain blank lines. Optionally collect the lines.
+    in_comment = False
+    while line:
+        if lines is not None:
+            lines.append(line)
+
+        pos = 0
+        if in_comment:
+            pos = line.find("}") + 1
+            if not pos:
+                line = handle.readline()
+                continue
+            in_comment = False
+        elif line.isspace():
+            if lines is not None:
+                lines.pop()
+            break
+        elif line.startswith("%"):
+            line = handle.readline()
+            continue
+
+        while True:
+            brace = line.find("{", pos)
+            if brace == -1 or line.find(";", pos, brace) != -1:
+                break
+            pos = line.find("}", brace + 1) + 1
+            if not pos:
+                in_comment = True
+                break
+
+        line = handle.readline()
+
+
+def read_headers(handle: TextIO) -> Optional[Headers]:
+    """
+    Reads game headers from a PGN file opened in text mode. Skips the rest of
+    the game.
+
+    Since actually parsing many games from a big file is relatively expensive,
+    this is a better way to look only for specific games and then seek and
+    parse them later.
+
+    This example scans for the first game with Kasparov as the white player.
+
+    >>> import chess.pgn
+    >>>
+    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>>
+    >>> kasparov_offsets = []
+    >>>
+    >>> while True:
+    ...     offset = pgn.tell()
+    ...
+    ...     headers = chess.pgn.read_headers(pgn)
+    ...     if headers is None:
+    ...         break
+    ...
+    ...     if "Kasparov" in headers.get("White", "?"):
+    ...         kasparov_offsets.append(offset)
+
+    Then it can later be seeked and parsed.
+
+    >>> for offset in kasparov_offsets:
+    ...     pgn.seek(offset)
+    ...     chess.pgn.read_game(pgn)  # doctest: +ELLIPSIS
+    0
+    <Game at ... ('Garry Kasparov' vs. 'Deep Blue (Computer)', 1997.??.??)>
+    1436
+    <Game at ... ('Garry Kasparov' vs. 'Deep Blue (Computer)', 1997.??.??)>
+    3067
+    <Game at ... ('Garry Kasparov' vs. 'Deep Blue (Computer)', 1997.??.??)>
+    """
+    return read_game(handle, Visitor=HeadersBuilder)
+
+
+def skip_game(handle: TextIO) -> bool:
+    """
+    Skips a game. Returns ``True`` if a game was found and skipped.
+    """
+    return bool(read_game(handle, Visitor=SkipVisitor))
+
+
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+
+def _open_decompressor(path: str, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        import gzip
+        return typing.cast(BinaryIO, gzip.open(path, "rb"))
+    elif compression == "bz2":
+        import bz2
+        return typing.cast(BinaryIO, bz2.open(path, "rb"))
+    elif compression == "xz":
+        import lzma
+        return typing.cast(BinaryIO, lzma.open(path, "rb"))
+
+    try:
+        from compression import zstd  # type: ignore[import-not-found, unused-ignore]  # Python 3.14
+    except ImportError:
+        pass
+    else:
+        return typing.cast(BinaryIO, zstd.open(path, "rb"))
+
+    try:
+        import zstandard  # type: ignore[import-not-found, unused-ignore]
+    except ImportError:
+        raise ImportError(f"reading zstd compressed files requires Python 3.14 or the zstandard package: {path!r}")
+    return typing.cast(BinaryIO, zstandard.open(path, "rb"))
+
+
+class _BackgroundReader(io.RawIOBase):
+    """
+    Reads blocks from a file in a background thread, so that slow sources
+    (like decompression, which releases the GIL) overlap with consuming
+    the data.
+    """
+
+    def __init__(self, source: BinaryIO, *, block_size: int, queue_size: int) -> None:
+        super().__init__()
+        self.source = source
+        self.block_size = block_size
+        self.queue: queue.Queue[Union[bytes, BaseException]] = queue.Queue(queue_size)
+        self.closing = threading.Event()
+
+        self.block = memoryview(b"")
+        self.pos = 0
+        self.eof = False
+
+        self.thread = threading.Thread(target=self._run, name="chess.pgn background reader", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        try:
+            while not self.closing.is_set():
+                block = self.source.read(self.block_size)
+                self._put(block)
+                if not block:
+                    break
+        except BaseException as err:
+            self._put(err)
+
+    def _put(self, item: Union[bytes, BaseException]) -> None:
+        while not self.closing.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                break
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while self.pos >= len(self.block):
+            if self.eof:
+                return 0
+
+            item = self.queue.get()
+            if isinstance(item, BaseException):
+                self.eof = True
+                raise item
+            elif not item:
+                self.eof = True
+                return 0
+
+            self.block = memoryview(item)
+            self.pos = 0
+
+        n = min(len(buffer), len(self.block) - self.pos)
+        buffer[:n] = self.block[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closing.set()
+            self.thread.join()
+            self.source.close()
+        super().close()
+
+
+def open_pgn(path: str, mode: str = "r", *, encoding: str = "utf-8", errors: str = "replace", block_size: int = 1 << 20, queue_size: int = 16) -> IO[Any]:
+    """
+    Opens a PGN file that may be compressed with gzip, bzip2 or xz,
+    or with zstd on Python 3.14 or if the ``zstandard`` package is
+    installed. The compression is detected from the contents of the file.
+
+    >>> import chess.pgn
+    >>>
+    >>> with chess.pgn.open_pgn("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+    ...     game = chess.pgn.read_game(pgn)
+
+    Compressed files are decompressed in a background thread, in blocks of
+    *block_size* bytes, with up to *queue_size* blocks waiting to be parsed.
+
+    Opens the file in text mode with the given *encoding* and *errors*
+    handling, or in binary mode (``"rb"``), for example for
+    :func:`~chess.pgn.iter_games()`. Compressed files are not seekable.
+    """
+    if mode not in ["r", "rt", "rb"]:
+        raise ValueError(f"invalid mode for pgn file: {mode!r}")
+
+    with open(path, "rb") as f:
+        magic = f.read(6)
+
+    compression = next((name for prefix, name in COMPRESSION_MAGIC if magic.startswith(prefix)), None)
+    if compression is None:
+        return open(path, mode, encoding=None if mode == "rb" else encoding, errors=None if mode == "rb" else errors)
+
+    raw = _BackgroundReader(_open_decompressor(path, compression), block_size=block_size, queue_size=queue_size)
+    binary = io.BufferedReader(raw, buffer_size=block_size)
+    return binary if mode == "rb" else io.TextIOWrapper(binary, encoding=encoding, errors=errors)
+
+
+READ_AHEAD = 1 << 20
+
+
+class _LineSource(typing.Protocol):
+    """The part of :class:`typing.TextIO` needed to read games."""
+
+    def readline(self) -> str: ...
+
+
+class _LineReader:
+    """
+    Serves lines from large chunks of a text or binary file, keeping track
+    of the offset of the next line. Lines from binary files are decoded
+    individually, so that offsets are byte offsets.
+    """
+
+    def __init__(self, handle: Union[TextIO, BinaryIO], *, read_ahead: int = READ_AHEAD, encoding: str = "utf-8", errors: str = "replace") -> None:
+        self.handle = handle
+        self.read_ahead = max(1, read_ahead)
+        self.encoding = encoding
+        self.errors = errors
+
+        empty = handle.read(0)
+        self.binary = isinstance(empty, bytes)
+        self.newline: Any = b"\n" if self.binary else "\n"
+        self.buffer: Any = empty
+        self.pos = 0
+        self.eof = False
+
+        # Text handles only have opaque cookies, so count characters from
+        # the current position.
+        self.offset = 0
+        if self.binary:
+            try:
+                self.offset = handle.tell()
+            except (AttributeError, OSError):
+                pass
+
+    def tell(self) -> int:
+        return self.offset
+
+    def _line_end(self) -> int:
+        start = self.pos
+        while True:
+            end: int = self.buffer.find(self.newline, start)
+            if end != -1:
+                return end + 1
+            elif self.eof:
+                return len(self.buffer)
+
+            chunk = self.handle.read(self.read_ahead)
+            if chunk:
+                self.buffer = self.buffer[self.pos:] + chunk
+                start = max(0, start - self.pos)
+                self.pos = 0
+            else:
+                self.eof = True
+
+    def _decode(self, line: Any) -> str:
+        if not self.binary:
+            return typing.cast(str, line)
+        if line.endswith(b"\r\n"):
+            line = line[:-2] + b"\n"
+        return typing.cast(str, line.decode(self.encoding, self.errors))
+
+    def peekline(self) -> str:
+        end = self._line_end()
+        return self._decode(self.buffer[self.pos:end])
+
+    def readline(self) -> str:
+        end = self._line_end()
+        line = self.buffer[self.pos:end]
+        self.offset += end - self.pos
+        self.pos = end
+        return self._decode(line)
+
+
+def _scan_games(reader: _LineReader, Visitor: Callable[[], BaseVisitor[ResultT]], where: Optional[HeaderFilter] = None) -> Iterator[Tuple[int, int, ResultT]]:
+    predicate = None if where is None else _header_predicate(where)
+
+    while True:
+        # Skip to the first line of the next game, so that the offset points
+        # at its first header.
+        line = reader.peekline()
+        while line.isspace() or line.startswith("%") or line.startswith(";"):
+            reader.readline()
+            line = reader.peekline()
+        if not line:
+            return
+
+        start = reader.tell()
+        result = _read_game(reader, Visitor, predicate)
+        if result is not _FILTERED:
+            yield start, reader.tell(), typing.cast(ResultT, result)
+
+
+@typing.overload
+def iter_games(handle: Union[TextIO, BinaryIO], *, where: Optional[HeaderFilter] = None, read_ahead: int = READ_AHEAD, encoding: str = "utf-8", errors: str = "replace") -> Iterator[Tuple[int, Game]]: ...
+@typing.overload
+def iter_games(handle: Union[TextIO, BinaryIO], *, Visitor: Callable[[], BaseVisitor[ResultT]], where: Optional[HeaderFilter] = None, read_ahead: int = READ_AHEAD, encoding: str = "utf-8", errors: str = "replace") -> Iterator[Tuple[int, ResultT]]: ...
+def iter_games(handle: Union[TextIO, BinaryIO], *, Visitor: Any = GameBuilder, where: Optional[HeaderFilter] = None, read_ahead: int = READ_AHEAD, encoding: str = "utf-8", errors: str = "replace") -> Iterator[Tuple[int, Any]]:
+    """
+    Reads all remaining games from a file, yielding tuples of the offset
+    where each game starts and the *Visitor* result. Games can be filtered
+    by their headers with *where* (see :func:`~chess.pgn.read_game()`).
+
+    The file is read in chunks of *read_ahead* bytes (or characters).
+
+    Files opened in binary mode are recommended. Then offsets are byte
+    offsets that can later be used to :func:`seek <io.IOBase.seek>` to a
+    game, for example to resume an interrupted job. Lines are decoded with
+    the given *encoding* and *errors* handling.
+
+    >>> import chess.pgn
+    >>>
+    >>> with open("data/pgn/kasparov-deep-blue-1997.pgn", "rb") as pgn:
+    ...     for offset, headers in chess.pgn.iter_games(pgn, Visitor=chess.pgn.HeadersBuilder):
+    ...         print(offset, headers["White"])
+    0 Garry Kasparov
+    717 Deep Blue (Computer)
+    1436 Garry Kasparov
+    2194 Deep Blue (Computer)
+    3067 Garry Kasparov
+    3855 Deep Blue (Computer)
+
+    For files opened in text mode, offsets count characters from the
+    position where reading started.
+
+    The position of *handle* is undefined after reading.
+    """
+    reader = _LineReader(handle, read_ahead=read_ahead, encoding=encoding, errors=errors)
+    for offset, _, result in _scan_games(reader, Visitor, where):
+        yield offset, result
+
+
+GAME_BOUNDARY_REGEX = re.compile(rb"\n[ \t\r]*\n(?=\[[A-Za-z0-9])")
+
+CHUNK_SIZE = 1 << 22
+
+
+def _split_games(path: str, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                match = GAME_BOUNDARY_REGEX.search(mm, min(start + chunk_size, size))
+                end = match.end() if match else size
+                yield start, end
+                start = end
+
+
+def _read_chunk(path: str, start: int, end: int, Visitor: Callable[[], BaseVisitor[ResultT]], where: Optional[HeaderFilter], encoding: str, errors: str) -> List[ResultT]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    reader = _LineReader(io.BytesIO(data), read_ahead=len(data), encoding=encoding, errors=errors)
+    return [result for _, _, result in _scan_games(reader, Visitor, where)]
+
+
+@typing.overload
+def parallel_read(path: str, *, where: Optional[HeaderFilter] = None, processes: Optional[int] = None, ordered: bool = True, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8", errors: str = "replace") -> Iterator[Game]: ...
+@typing.overload
+def parallel_read(path: str, *, Visitor: Callable[[], BaseVisitor[ResultT]], where: Optional[HeaderFilter] = None, processes: Optional[int] = None, ordered: bool = True, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8", errors: str = "replace") -> Iterator[ResultT]: ...
+def parallel_read(path: str, *, Visitor: Any = GameBuilder, where: Optional[HeaderFilter] = None, processes: Optional[int] = None, ordered: bool = True, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8", errors: str = "replace") -> Iterator[Any]:
+    """
+    Reads all games from a PGN file using a pool of worker processes.
+    Yields the *Visitor* result for each game. Games can be filtered by their
+    headers with *where* (see :func:`~chess.pgn.read_game()`).
+
+    The file is split into chunks of about *chunk_size* bytes at game
+    boundaries, i.e., a blank line followed by a header tag. Each chunk is
+    parsed by one of *processes* workers (defaults to the number of CPUs).
+
+    >>> import chess.pgn
+    >>>
+    >>> for headers in chess.pgn.parallel_read("data/pgn/kasparov-deep-blue-1997.pgn", Visitor=chess.pgn.HeadersBuilder):
+    ...     print(headers["Result"])
+    1-0
+    1-0
+    1/2-1/2
+    1/2-1/2
+    1/2-1/2
+    1-0
+
+    Results are yielded in file order, unless *ordered* is ``False``. Then
+    they are yielded as soon as a chunk is finished.
+
+    *Visitor*, *where* and the results are sent between processes, so they
+    must be picklable. For example, the visitor must be defined at module
+    level, and header filters should use the list of conditions instead of a
+    lambda function.
+
+    Lines are decoded with the given *encoding* and *errors* handling.
+    """
+    max_workers = processes or os.cpu_count() or 1
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        pending: Deque[concurrent.futures.Future[List[Any]]] = collections.deque()
+        try:
+            for start, end in _split_games(path, chunk_size):
+                pending.append(executor.submit(_read_chunk, path, start, end, Visitor, where, encoding, errors))
+
+                # Limit the number of results waiting to be consumed.
+                while len(pending) >= 2 * max_workers:
+                    yield from _next_completed(pending, ordered).result()
+
+            while pending:
+                yield from _next_completed(pending, ordered).result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _next_completed(pending: Deque[concurrent.futures.Future[List[Any]]], ordered: bool) -> concurrent.futures.Future[List[Any]]:
+    if ordered:
+        return pending.popleft()
+
+    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+    future = next(iter(done))
+    pending.remove(future)
+    return future
+
+
+class _TransformExporter(StringExporter):
+    def __init__(self, *, columns: Optional[int], comments: bool, variations: bool, normalize_san: bool) -> None:
+        super().__init__(columns=columns, headers=True, comments=comments, variations=variations)
+        self.normalize_san = normalize_san
+        self.san = ""
+
+    @override
+    def begin_parse_san(self, board: chess.Board, san: str) -> None:
+        self.san = san
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        if self.normalize_san:
+            super().visit_move(board, move)
+        elif self.variations or not self.variation_depth:
+            # Keep the SAN as written, without generating it again.
+            if board.turn == chess.WHITE:
+                self.write_token(str(board.fullmove_number) + ". ")
+            elif self.force_movenumber:
+                self.write_token(str(board.fullmove_number) + "... ")
+
+            # The tokenizer does not capture check and checkmate suffixes.
+            suffix = ""
+            if move and board.gives_check(move):
+                board.push(move)
+                suffix = "#" if board.is_checkmate() else "+"
+                board.pop()
+
+            self.write_token(self.san + suffix + " ")
+
+            self.force_movenumber = False
+
+    @override
+    def handle_error(self, error: Exception) -> None:
+        LOGGER.error("%s while transforming game, writing it up to the error", error)
+
+
+def transform(path: str, handle: TextIO, *, comments: bool = True, variations: bool = True, normalize_san: bool = False, columns: Optional[int] = 80, where: Optional[HeaderFilter] = None, processes: Optional[int] = None, chunk_size: int = CHUNK_SIZE, encoding: str = "utf-8", errors: str = "replace") -> int:
+    """
+    Reads all games from the PGN file at *path* and writes them to the text
+    file *handle*, in the original order. Returns the number of games
+    written.
+
+    Comments and NAGs are removed unless *comments* is set, and variations
+    are removed (and not even parsed) unless *variations* is set. Moves are
+    written as in the original file, unless *normalize_san* is set. Then
+    they are written in standard algebraic notation, as generated by
+    :func:`chess.Board.san()`. Lines are wrapped at *columns*.
+
+    Games can be filtered by their headers with *where*
+    (see :func:`~chess.pgn.read_game()`). Games with illegal moves are
+    logged and written up to the error.
+
+    Games are parsed in a pool of *processes* worker processes, like
+    :func:`~chess.pgn.parallel_read()`, or in the current process if
+    *processes* is ``1``.
+
+    This is also available on the command line:
+
+    .. code-block:: shell
+
+        python -m chess.pgn transform in.pgn out.pgn --strip-comments --strip-variations --normalize-san -j 4
+    """
+    # Picklable, so that it can be sent to worker processes.
+    Visitor = functools.partial(_TransformExporter, columns=columns, comments=comments, variations=variations, normalize_san=normalize_san)
+
+    results: Iterator[str]
+    f: ContextManager[Optional[BinaryIO]]
+    if processes == 1:
+        pgn = open(path, "rb")
+        f = pgn
+        results = (result for _, result in iter_games(pgn, Visitor=Visitor, where=where, encoding=encoding, errors=errors))
+    else:
+        f = contextlib.nullcontext()
+        results = parallel_read(path, Visitor=Visitor, where=where, processes=processes, chunk_size=chunk_size, encoding=encoding, errors=errors)
+
+    count = 0
+    with f:
+        for result in results:
+            handle.write(result)
+            handle.write("\n\n")
+            count += 1
+    return count
+
+
+HEADER_BLOCK_BYTES_REGEX = re.compile(rb"""(?:
+    [ \t]*\[[^\n]*(?:\n|\Z)
+    |[%;][^\n]*(?:\n|\Z)
+    |[ \t\r\f\v]*\n(?=(?:[%;][^\n]*\n)*[ \t]*\[)
+)*""", re.VERBOSE)
+
+BLANK_LINE_BYTES_REGEX = re.compile(rb"\n[ \t\r\f\v]*\n")
+
+
+@contextlib.contextmanager
+def _mmap_file(path: str) -> Iterator[Any]:
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            yield b""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            try:
+                # Unix
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            except AttributeError:
+                pass
+
+            yield mm
+
+
+def _line_end(buffer: Any, pos: int) -> int:
+    end = buffer.find(b"\n", pos)
+    return len(buffer) if end == -1 else end + 1
+
+
+def _skip_movetext(buffer: Any, pos: int) -> int:
+    # Like the fast path of read_game(), but jumping between comments and
+    # blank lines with bytes.find() instead of looking at every line.
+    blank_start = blank_end = -1
+    while pos < len(buffer):
+        # Blank lines and escaped lines start with the newline before pos.
+        if blank_end < pos:
+            blank = BLANK_LINE_BYTES_REGEX.search(buffer, max(pos - 1, 0))
+            blank_start, blank_end = (blank.start(), blank.end()) if blank else (len(buffer), len(buffer))
+
+        # Find the first comment before the blank line.
+        special, limit = None, blank_start
+        for token in [b"{", b";", b"\n%"]:
+            index = buffer.find(token, max(pos - 1, 0) if token == b"\n%" else pos, limit)
+            if index != -1:
+                special, limit = token, index
+
+        if special is None:
+            return blank_end
+        elif special == b"{":
+            close = buffer.find(b"}", limit + 1)
+            if close == -1:
+                return len(buffer)
+            pos = close + 1
+        else:
+            pos = _line_end(buffer, limit + len(special))
+
+    return len(buffer)
+
+
+def _tag_bytes_regex(tags: Optional[Iterable[str]], encoding: str) -> Optional[re.Pattern[bytes]]:
+    if tags is None:
+        names = rb"[A-Za-z0-9][A-Za-z0-9_+#=:-]*"
+    else:
+        names = b"|".join(re.escape(tag.encode(encoding)) for tag in tags)
+        if not names:
+            return None
+    # Starting with a literal is much faster than anchoring at the start of
+    # the line, so that is checked separately.
+    return re.compile(rb"\[(" + names + rb")[ \t\r\f\v]+\"([^\r\n]*)\"\][ \t\r\f\v]*$", re.MULTILINE)
+
+
+def _scan_headers(buffer: Any, tags: Optional[Iterable[str]], encoding: str, errors: str) -> Iterator[Tuple[int, int, Headers]]:
+    tag_regex = _tag_bytes_regex(tags, encoding)
+    size = len(buffer)
+    pos = 0
+
+    while pos < size:
+        # Skip blank lines and comments between games.
+        end = _line_end(buffer, pos)
+        line = buffer[pos:end]
+        if line.isspace() or line.startswith(b"%") or line.startswith(b";"):
+            pos = end
+            continue
+
+        # Find the header tags.
+        start = pos
+        if line.startswith(b"\xef\xbb\xbf"):
+            pos += 3
+        headers_start = pos
+        pos = HEADER_BLOCK_BYTES_REGEX.match(buffer, pos).end()  # type: ignore
+
+        headers = Headers({})
+        if tag_regex is not None:
+            for tag_match in tag_regex.finditer(buffer, headers_start, pos):
+                line_start = max(buffer.rfind(b"\n", headers_start, tag_match.start()) + 1, headers_start)
+                if not buffer[line_start:tag_match.start()].strip(b" \t"):
+                    headers[tag_match.group(1).decode(encoding, errors)] = tag_match.group(2).decode(encoding, errors)
+
+        # Skip movetext. Up to one blank line after the headers does not end
+        # the game.
+        if pos < size:
+            end = _line_end(buffer, pos)
+            if buffer[pos:end].isspace():
+                pos = end
+                end = _line_end(buffer, pos)
+            pos = end if buffer[pos:end].isspace() else _skip_movetext(buffer, pos)
+
+        yield start, pos, headers
+
+
+def scan_headers(path: str, *, tags: Optional[Iterable[str]] = None, encoding: str = "utf-8", errors: str = "replace") -> Iterator[Tuple[int, Headers]]:
+    """
+    Scans a PGN file for game headers, yielding tuples of the byte offset
+    where each game starts and its headers.
+
+    This is much faster than :func:`~chess.pgn.read_headers()`, because the
+    file is memory mapped and the movetext is skipped with
+    :func:`bytes.find()`. Only the given header *tags* (or all) are decoded
+    with the given *encoding* and *errors* handling.
+
+    >>> import chess.pgn
+    >>>
+    >>> for offset, headers in chess.pgn.scan_headers("data/pgn/kasparov-deep-blue-1997.pgn", tags=["White", "Result"]):
+    ...     print(offset, headers)
+    0 Headers(White='Garry Kasparov', Result='1-0')
+    717 Headers(White='Deep Blue (Computer)', Result='1-0')
+    1436 Headers(White='Garry Kasparov', Result='1/2-1/2')
+    2194 Headers(White='Deep Blue (Computer)', Result='1/2-1/2')
+    3067 Headers(White='Garry Kasparov', Result='1/2-1/2')
+    3855 Headers(White='Deep Blue (Computer)', Result='1-0')
+    """
+    with _mmap_file(path) as buffer:
+        for start, _, headers in _scan_headers(buffer, tags, encoding, errors):
+            yield start, headers
+
+
+INDEX_SUFFIX = ".idx"
+
+INDEX_MAGIC = b"PGNINDEX"
+
+INDEX_HEADER_STRUCT = struct.Struct(">8sQqQQH")
+
+INDEX_ENTRY_STRUCT = struct.Struct(">QQQ")
+
+INDEX_LENGTH_STRUCT = struct.Struct(">H")
+
+_INDEX_MISSING = 0xffff
+
+
+def _source_stat(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_index(path: str, *, index_path: Optional[str] = None, tags: Iterable[str] = TAG_ROSTER, encoding: str = "utf-8", errors: str = "replace") -> str:
+    """
+    Scans a PGN file and writes a compact binary index with the byte offset,
+    length and selected header *tags* of each game. Returns the path of the
+    index, which defaults to the path of the PGN file with the suffix
+    ``.idx`` appended.
+
+    See :class:`~chess.pgn.IndexedPGN` to use the index.
+    """
+    index_path = index_path or path + INDEX_SUFFIX
+    tags = list(tags)
+    size, mtime_ns = _source_stat(path)
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f, tempfile.TemporaryFile() as entries, _mmap_file(path) as source:
+            # Placeholder for the header.
+            f.write(INDEX_HEADER_STRUCT.pack(INDEX_MAGIC, 0, 0, 0, 0, 0))
+            for tag in tags:
+                name = tag.encode("utf-8")
+                f.write(INDEX_LENGTH_STRUCT.pack(len(name)))
+                f.write(name)
+
+            count = 0
+            for start, end, headers in _scan_headers(source, tags, encoding, errors):
+                entries.write(INDEX_ENTRY_STRUCT.pack(start, end - start, f.tell()))
+                for tag in tags:
+                    value = headers.get(tag)
+                    if value is None:
+                        f.write(INDEX_LENGTH_STRUCT.pack(_INDEX_MISSING))
+                    else:
+                        data = value.encode("utf-8")[:_INDEX_MISSING - 1]
+                        f.write(INDEX_LENGTH_STRUCT.pack(len(data)))
+                        f.write(data)
+                count += 1
+
+            entries_offset = f.tell()
+            entries.seek(0)
+            shutil.copyfileobj(entries, f)
+
+            f.seek(0)
+            f.write(INDEX_HEADER_STRUCT.pack(INDEX_MAGIC, size, mtime_ns, count, entries_offset, len(tags)))
+
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+    return index_path
+
+
+class IndexedPGN:
+    """
+    Random access to the games of a PGN file, using an index created by
+    :func:`~chess.pgn.build_index()`.
+
+    If the index at *index_path* (defaults to the path of the PGN file with
+    the suffix ``.idx`` appended) does not exist or does not match the size
+    and modification time of the PGN file or was built with other *tags*,
+    it is rebuilt with the given *tags*.
+
+    >>> import chess.pgn
+    >>>
+    >>> with chess.pgn.IndexedPGN("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+    ...     len(pgn)
+    ...     pgn[5].end().board()
+    ...     for i, game in pgn.iter_games(where=lambda headers: headers["Result"] == "1-0"):
+    ...         print(i, game.headers["White"])
+    6
+    Board('r1k4r/p2nb1p1/2b4p/1p1n1p2/2PP4/3Q1NB1/1P3PPP/R5K1 b - - 0 19')
+    0 Garry Kasparov
+    1 Deep Blue (Computer)
+    5 Deep Blue (Computer)
+    """
+
+    def __init__(self, path: str, *, index_path: Optional[str] = None, tags: Iterable[str] = TAG_ROSTER, encoding: str = "utf-8", errors: str = "replace") -> None:
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.encoding = encoding
+        self.errors = errors
+
+        tags = list(tags)
+        if not self._is_fresh(tags):
+            build_index(path, index_path=self.index_path, tags=tags, encoding=encoding, errors=errors)
+
+        with open(self.index_path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, _, _, count, self._entries_offset, tag_count = INDEX_HEADER_STRUCT.unpack_from(self.mmap, 0)
+        self._count: int = count
+        if magic != INDEX_MAGIC:
+            self.mmap.close()
+            raise IOError(f"invalid pgn index: {self.index_path!r}")
+
+        self.tags: List[str] = []
+        """The header tags stored in the index."""
+
+        offset = INDEX_HEADER_STRUCT.size
+        for _ in range(tag_count):
+            length, = INDEX_LENGTH_STRUCT.unpack_from(self.mmap, offset)
+            offset += INDEX_LENGTH_STRUCT.size
+            self.tags.append(self.mmap[offset:offset + length].decode("utf-8"))
+            offset += length
+
+        self.handle = open(path, "rb")
+        self.lock = threading.Lock()
+
+    def _is_fresh(self, tags: List[str]) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, size, mtime_ns, _, _, tag_count = INDEX_HEADER_STRUCT.unpack(f.read(INDEX_HEADER_STRUCT.size))
+                if magic != INDEX_MAGIC or (size, mtime_ns) != _source_stat(self.path) or tag_count != len(tags):
+                    return False
+
+                indexed_tags = []
+                for _ in range(tag_count):
+                    length, = INDEX_LENGTH_STRUCT.unpack(f.read(INDEX_LENGTH_STRUCT.size))
+                    indexed_tags.append(f.read(length).decode("utf-8"))
+        except (OSError, struct.error, UnicodeDecodeError):
+            return False
+        return indexed_tags == tags
+
+    def __enter__(self) -> IndexedPGN:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, index: int) -> Tuple[int, int, int]:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"game index out of range: {index}")
+        return typing.cast(Tuple[int, int, int], INDEX_ENTRY_STRUCT.unpack_from(self.mmap, self._entries_offset + index * INDEX_ENTRY_STRUCT.size))
+
+    def offset(self, index: int) -> int:
+        """Gets the byte offset of a game in the PGN file."""
+        return self._entry(index)[0]
+
+    def headers(self, index: int) -> Headers:
+        """
+        Gets the indexed headers of a game, without accessing the PGN file.
+        """
+        _, _, position = self._entry(index)
+        headers = Headers({})
+        for tag in self.tags:
+            length, = INDEX_LENGTH_STRUCT.unpack_from(self.mmap, position)
+            position += INDEX_LENGTH_STRUCT.size
+            if length != _INDEX_MISSING:
+                headers[tag] = self.mmap[position:position + length].decode("utf-8", "ignore")
+                position += length
+        return headers
+
+    @typing.overload
+    def read_game(self, index: int) -> Game: ...
+    @typing.overload
+    def read_game(self, index: int, *, Visitor: Callable[[], BaseVisitor[ResultT]]) -> ResultT: ...
+    def read_game(self, index: int, *, Visitor: Any = GameBuilder) -> Any:
+        """
+        Seeks to a game and reads it with the given *Visitor*
+        (see :func:`~chess.pgn.read_game()`).
+        """
+        offset, length, _ = self._entry(index)
+        with self.lock:
+            self.handle.seek(offset)
+            data = self.handle.read(length)
+        reader = _LineReader(io.BytesIO(data), read_ahead=len(data), encoding=self.encoding, errors=self.errors)
+        return read_game(reader, Visitor=Visitor)  # type: ignore
+
+    def __getitem__(self, index: int) -> Game:
+        return self.read_game(index)
+
+    def __iter__(self) -> Iterator[Game]:
+        for index in range(len(self)):
+            yield self.read_game(index)
+
+    @typing.overload
+    def iter_games(self, *, where: Optional[HeaderFilter] = None) -> Iterator[Tuple[int, Game]]: ...
+    @typing.overload
+    def iter_games(self, *, where: Optional[HeaderFilter] = None, Visitor: Callable[[], BaseVisitor[ResultT]]) -> Iterator[Tuple[int, ResultT]]: ...
+    def iter_games(self, *, where: Optional[HeaderFilter] = None, Visitor: Any = GameBuilder) -> Iterator[Tuple[int, Any]]:
+        """
+        Yields tuples of the index and the *Visitor* result for each game.
 
-    # Fast path: Skip entire game.
-    if skipping_game:
-        in_comment = False
+        If given, only games where the header filter *where*
+        (see :func:`~chess.pgn.read_game()`) matches the
+        :func:`indexed headers <chess.pgn.IndexedPGN.headers>` are read.
+        """
+        predicate = None if where is None else _header_predicate(where)
+        for index in range(len(self)):
+            if predicate is None or predicate(self.headers(index)):
+                yield index, self.read_game(index, Visitor=Visitor)
 
-        while line:
-            if not in_comment:
-                if line.isspace():
-                    break
-                elif line.startswith("%"):
-                    line = handle.readline()
-                    continue
-
-            for match in SKIP_MOVETEXT_REGEX.finditer(line):
-                token = match.group(0)
-                if token == "{":
-                    in_comment = True
-                elif not in_comment and token == ";":
-                    break
-                elif token == "}":
-                    in_comment = False
+    def close(self) -> None:
+        """Closes the index and the PGN file."""
+        self.mmap.close()
+        self.handle.close()
 
-            line = handle.readline()
+    def __repr__(self) -> str:
+        return f"<IndexedPGN at {id(self):#x} ({self.path!r}, {len(self)} games)>"
 
-        visitor.end_game()
-        return visitor.result()
 
-    # Parse movetext.
-    skip_variation_depth = 0
-    fresh_line = True
-    while line:
-        if fresh_line:
-            # Ignore comments.
-            if line.startswith("%") or line.startswith(";"):
-                line = handle.readline()
-                continue
-            # An empty line means the end of a game.
-            if line.isspace():
-                visitor.end_game()
-                return visitor.result()
-        fresh_line = True
-
-        for match in MOVETEXT_REGEX.finditer(line):
-            token = match.group(0)
-
-            if token.startswith("{"):
-                # Consume until the end of the comment.
-                start_index = 2 if token.startswith("{ ") else 1
-                line = token[start_index:]
-
-                comment_lines = []
-                while line and "}" not in line:
-                    comment_lines.append(line)
-                    line = handle.readline()
-
-                if line:
-                    close_index = line.find("}")
-                    end_index = close_index - 1 if close_index > 0 and line[close_index - 1] == " " else close_index
-                    comment_lines.append(line[:end_index])
-                    line = line[close_index + 1:]
-
-                if not skip_variation_depth:
-                    visitor.visit_comment("".join(comment_lines))
-
-                # Continue with the current line.
-                fresh_line = False
-                break
-            elif token == "(":
-                if skip_variation_depth:
-                    skip_variation_depth += 1
-                elif board_stack[-1].move_stack:
-                    if visitor.begin_variation() is SKIP:
-                        skip_variation_depth = 1
-                    else:
-                        board = board_stack[-1].copy()
-                        board.pop()
-                        board_stack.append(board)
-            elif token == ")":
-                if skip_variation_depth == 1:
-                    skip_variation_depth = 0
-                    visitor.end_variation()
-                elif skip_variation_depth:
-                    skip_variation_depth -= 1
-                elif len(board_stack) > 1:
-                    visitor.end_variation()
-                    board_stack.pop()
-            elif skip_variation_depth:
-                continue
-            elif token.startswith(";"):
+class PositionStats(typing.NamedTuple):
+    """
+    Statistics of a move in a position, from
+    :func:`~chess.pgn.build_position_stats()`.
+    """
+
+    key: int
+    """The Zobrist hash of the position, like :func:`chess.polyglot.zobrist_hash()`."""
+
+    move: chess.Move
+    """The move played in the position."""
+
+    games: int
+    """The number of games, including games without a known result."""
+
+    white: int
+    """The number of games won by White."""
+
+    draws: int
+    """The number of drawn games."""
+
+    black: int
+    """The number of games won by Black."""
+
+
+POSITION_STATS_ENTRY_BYTES = 160
+
+POSITION_STATS_MERGE_FAN_IN = 64
+
+# Counters packed into a single integer, to keep entries small. Adding
+# packed counters adds the individual counters.
+_STATS_BITS = 40
+_STATS_MASK = (1 << _STATS_BITS) - 1
+_STATS_INCREMENTS = {
+    "1-0": 1 | 1 << _STATS_BITS,
+    "1/2-1/2": 1 | 1 << (2 * _STATS_BITS),
+    "0-1": 1 | 1 << (3 * _STATS_BITS),
+}
+
+_STATS_RUN_STRUCT = struct.Struct(">QHQQQQ")
+
+
+class _PositionStatsVisitor(BaseVisitor[Tuple[List[int], str]]):
+    def __init__(self, max_ply: int) -> None:
+        self.max_ply = max_ply
+
+    @override
+    def begin_game(self) -> None:
+        self.keys: List[int] = []
+        self.game_result = "*"
+
+    @override
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        if tagname == "Result":
+            self.game_result = tagvalue
+
+    @override
+    def begin_parse_san(self, board: chess.Board, san: str) -> Optional[SkipType]:
+        return SKIP if len(self.keys) >= self.max_ply else None
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.keys.append(chess.polyglot.zobrist_hash(board) << 16 | _pack_move(move))
+
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
+
+    @override
+    def visit_result(self, result: str) -> None:
+        if self.game_result == "*":
+            self.game_result = result
+
+    @override
+    def handle_error(self, error: Exception) -> None:
+        LOGGER.error("%s while collecting position stats", error)
+
+    @override
+    def result(self) -> Tuple[List[int], str]:
+        return self.keys, self.game_result
+
+
+def _unpack_stats(combined: int, counters: int) -> PositionStats:
+    white = counters >> _STATS_BITS & _STATS_MASK
+    draws = counters >> (2 * _STATS_BITS) & _STATS_MASK
+    black = counters >> (3 * _STATS_BITS)
+    return PositionStats(combined >> 16, _unpack_move(combined & 0xffff), counters & _STATS_MASK, white, draws, black)
+
+
+def _pack_stats_record(combined: int, counters: int) -> bytes:
+    return _STATS_RUN_STRUCT.pack(
+        combined >> 16, combined & 0xffff,
+        counters & _STATS_MASK,
+        counters >> _STATS_BITS & _STATS_MASK,
+        counters >> (2 * _STATS_BITS) & _STATS_MASK,
+        counters >> (3 * _STATS_BITS))
+
+
+def _write_stats_run(path: str, counts: Dict[int, int]) -> None:
+    with open(path, "wb") as f:
+        for combined in sorted(counts):
+            f.write(_pack_stats_record(combined, counts[combined]))
+
+
+def _read_stats_run(path: str, records: int = 4096) -> Iterator[Tuple[int, int]]:
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(_STATS_RUN_STRUCT.size * records)
+            if not data:
                 break
-            elif token.startswith("$"):
-                # Found a NAG.
-                visitor.visit_nag(int(token[1:]))
-            elif token == "?":
-                visitor.visit_nag(NAG_MISTAKE)
-            elif token == "??":
-                visitor.visit_nag(NAG_BLUNDER)
-            elif token == "!":
-                visitor.visit_nag(NAG_GOOD_MOVE)
-            elif token == "!!":
-                visitor.visit_nag(NAG_BRILLIANT_MOVE)
-            elif token == "!?":
-                visitor.visit_nag(NAG_SPECULATIVE_MOVE)
-            elif token == "?!":
-                visitor.visit_nag(NAG_DUBIOUS_MOVE)
-            elif token in ["1-0", "0-1", "1/2-1/2", "*"] and len(board_stack) == 1:
-                visitor.visit_result(token)
-            else:
-                # Parse SAN tokens.
-                if visitor.begin_parse_san(board_stack[-1], token) is not SKIP:
-                    try:
-                        move = board_stack[-1].parse_san(token)
-                    except ValueError as error:
-                        visitor.handle_error(error)
-                        skip_variation_depth = 1
-                    else:
-                        visitor.visit_move(board_stack[-1], move)
-                        board_stack[-1].push(move)
-                visitor.visit_board(board_stack[-1])
+            for key, move, games, white, draws, black in _STATS_RUN_STRUCT.iter_unpack(data):
+                yield key << 16 | move, games | white << _STATS_BITS | draws << (2 * _STATS_BITS) | black << (3 * _STATS_BITS)
 
-        if fresh_line:
-            line = handle.readline()
 
-    visitor.end_game()
-    return visitor.result()
+def _merge_stats_runs(paths: List[str]) -> Iterator[Tuple[int, int]]:
+    current, total = None, 0
+    for combined, counters in heapq.merge(*(_read_stats_run(path) for path in paths)):
+        if combined != current:
+            if current is not None:
+                yield current, total
+            current, total = combined, 0
+        total += counters
+    if current is not None:
+        yield current, total
 
 
-def read_headers(handle: TextIO) -> Optional[Headers]:
+def build_position_stats(handles: Iterable[TextIO], *, max_ply: int = 30, memory_mb: int = 256, where: Optional[HeaderFilter] = None, directory: Optional[str] = None) -> Iterator[PositionStats]:
     """
-    Reads game headers from a PGN file opened in text mode. Skips the rest of
-    the game.
-
-    Since actually parsing many games from a big file is relatively expensive,
-    this is a better way to look only for specific games and then seek and
-    parse them later.
+    Reads all games from the given PGN files and counts how often each
+    move was played in each position of the first *max_ply* plies of the
+    mainlines, and with which results.
 
-    This example scans for the first game with Kasparov as the white player.
+    Yields :class:`~chess.pgn.PositionStats` sorted by Zobrist hash and
+    packed move (see :class:`~chess.pgn.CompactGame`), so that all moves of
+    a position are adjacent.
 
     >>> import chess.pgn
     >>>
-    >>> pgn = open("data/pgn/kasparov-deep-blue-1997.pgn")
+    >>> with open("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+    ...     stats = list(chess.pgn.build_position_stats([pgn], max_ply=2))
     >>>
-    >>> kasparov_offsets = []
+    >>> [(s.move.uci(), s.games, s.white, s.draws, s.black) for s in stats if s.key == chess.polyglot.zobrist_hash(chess.Board())]
+    [('d2d3', 1, 0, 1, 0), ('g1f3', 2, 1, 1, 0), ('e2e4', 3, 2, 1, 0)]
+
+    Counters are kept in memory, using roughly *memory_mb* megabytes.
+    When full, they are written to a sorted run in a temporary
+    subdirectory of *directory*, and runs are merged at the end. So there
+    is no limit on the number of games or positions.
+
+    Games can be filtered by their headers with *where*
+    (see :func:`~chess.pgn.read_game()`). Variations are ignored. Moves
+    after *max_ply* are not even parsed. Each game is counted at most once
+    for each position and move.
+    """
+    max_entries = max(1, memory_mb * 1024 * 1024 // POSITION_STATS_ENTRY_BYTES)
+
+    with tempfile.TemporaryDirectory(prefix="position-stats-", dir=directory) as tmpdir:
+        counts: Dict[int, int] = {}
+        runs: List[str] = []
+
+        for handle in handles:
+            while True:
+                game = read_game(handle, Visitor=lambda: _PositionStatsVisitor(max_ply), where=where)
+                if game is None:
+                    break
+
+                keys, result = game
+                increment = _STATS_INCREMENTS.get(result, 1)
+                for combined in set(keys):
+                    counts[combined] = counts.get(combined, 0) + increment
+
+                if len(counts) >= max_entries:
+                    runs.append(os.path.join(tmpdir, f"run-{len(runs)}.bin"))
+                    _write_stats_run(runs[-1], counts)
+                    counts.clear()
+
+        if not runs:
+            for combined in sorted(counts):
+                yield _unpack_stats(combined, counts[combined])
+            return
+
+        if counts:
+            runs.append(os.path.join(tmpdir, f"run-{len(runs)}.bin"))
+            _write_stats_run(runs[-1], counts)
+            counts.clear()
+
+        def merge(group: List[str], f: BinaryIO) -> None:
+            for combined, counters in _merge_stats_runs(group):
+                f.write(_pack_stats_record(combined, counters))
+
+        runs = chess._external_sort.merge_run_groups(runs, tmpdir, POSITION_STATS_MERGE_FAN_IN, merge)
+        for combined, counters in _merge_stats_runs(runs):
+            yield _unpack_stats(combined, counters)
+
+
+FINGERPRINT_SET_MAGIC = b"PGNFPSET"
+
+FINGERPRINT_SET_HEADER_STRUCT = struct.Struct(">8sQQ")
+
+_EMPTY_FINGERPRINT = bytes(FINGERPRINT_SIZE)
+
+
+class FingerprintSet:
+    """
+    A set of game fingerprints (see :class:`~chess.pgn.FingerprintBuilder`)
+    in a memory mapped file at *path*, or in an anonymous temporary file.
+    Existing files are opened and extended.
+
+    Fingerprints are stored in a hash table with open addressing. It is
+    doubled when it is half full, so it takes at most
+    ``4 * FINGERPRINT_SIZE`` bytes per fingerprint. The operating system
+    decides which parts are kept in memory.
+
+    Report duplicates while streaming:
+
+    >>> import chess.pgn
     >>>
-    >>> while True:
-    ...     offset = pgn.tell()
-    ...
-    ...     headers = chess.pgn.read_headers(pgn)
-    ...     if headers is None:
-    ...         break
-    ...
-    ...     if "Kasparov" in headers.get("White", "?"):
-    ...         kasparov_offsets.append(offset)
+    >>> with chess.pgn.FingerprintSet() as seen, open("data/pgn/kasparov-deep-blue-1997.pgn", "rb") as pgn:
+    ...     for offset, fingerprint in chess.pgn.iter_games(pgn, Visitor=chess.pgn.FingerprintBuilder):
+    ...         if not seen.add(fingerprint):
+    ...             print("duplicate at", offset)
 
-    Then it can later be seeked and parsed.
+    See :func:`~chess.pgn.deduplicate()` to drop duplicates.
+    """
 
-    >>> for offset in kasparov_offsets:
-    ...     pgn.seek(offset)
-    ...     chess.pgn.read_game(pgn)  # doctest: +ELLIPSIS
-    0
-    <Game at ... ('Garry Kasparov' vs. 'Deep Blue (Computer)', 1997.??.??)>
-    1436
-    <Game at ... ('Garry Kasparov' vs. 'Deep Blue (Computer)', 1997.??.??)>
-    3067
-    <Game at ... ('Garry Kasparov' vs. 'Deep Blue (Computer)', 1997.??.??)>
+    def __init__(self, path: Optional[str] = None, *, capacity: int = 1 << 16) -> None:
+        self.path = path
+        self.handle: BinaryIO
+        if path is None:
+            self.handle = typing.cast(BinaryIO, tempfile.TemporaryFile())
+        else:
+            self.handle = open(path, "r+b" if os.path.exists(path) else "w+b")
+
+        try:
+            self.capacity: int
+            self.count: int
+            header = self.handle.read(FINGERPRINT_SET_HEADER_STRUCT.size)
+            if header:
+                magic, self.capacity, self.count = FINGERPRINT_SET_HEADER_STRUCT.unpack(header)
+                if magic != FINGERPRINT_SET_MAGIC:
+                    raise IOError(f"invalid fingerprint set: {path!r}")
+            else:
+                self.capacity = 1 << max(0, capacity - 1).bit_length()
+                self.count = 0
+                self._allocate(self.handle, self.capacity)
+
+            self.mmap = mmap.mmap(self.handle.fileno(), 0)
+        except BaseException:
+            self.handle.close()
+            raise
+
+    def _allocate(self, handle: BinaryIO, capacity: int) -> None:
+        handle.truncate(0)
+        handle.seek(0)
+        handle.write(FINGERPRINT_SET_HEADER_STRUCT.pack(FINGERPRINT_SET_MAGIC, capacity, 0))
+        handle.truncate(FINGERPRINT_SET_HEADER_STRUCT.size + capacity * FINGERPRINT_SIZE)
+
+    def _key(self, fingerprint: bytes) -> bytes:
+        if len(fingerprint) != FINGERPRINT_SIZE:
+            raise ValueError(f"expected fingerprint of {FINGERPRINT_SIZE} bytes, got {len(fingerprint)}")
+        if fingerprint == _EMPTY_FINGERPRINT:
+            # Reserved for empty slots.
+            return fingerprint[:-1] + b"\x01"
+        return bytes(fingerprint)
+
+    def _slot(self, fingerprint: bytes) -> Tuple[int, bool]:
+        mm = self.mmap
+        mask = self.capacity - 1
+        index = int.from_bytes(fingerprint[:8], "little") & mask
+        while True:
+            offset = FINGERPRINT_SET_HEADER_STRUCT.size + index * FINGERPRINT_SIZE
+            slot = mm[offset:offset + FINGERPRINT_SIZE]
+            if slot == fingerprint:
+                return offset, True
+            elif slot == _EMPTY_FINGERPRINT:
+                return offset, False
+            index = (index + 1) & mask
+
+    def add(self, fingerprint: bytes) -> bool:
+        """
+        Adds a fingerprint. Returns ``True`` if it is new, or ``False`` if
+        it was already in the set.
+        """
+        fingerprint = self._key(fingerprint)
+        offset, found = self._slot(fingerprint)
+        if found:
+            return False
+
+        self.mmap[offset:offset + FINGERPRINT_SIZE] = fingerprint
+        self.count += 1
+        FINGERPRINT_SET_HEADER_STRUCT.pack_into(self.mmap, 0, FINGERPRINT_SET_MAGIC, self.capacity, self.count)
+
+        if 2 * self.count > self.capacity:
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        old_mmap = self.mmap
+        old_capacity = self.capacity
+
+        if self.path is None:
+            handle = typing.cast(BinaryIO, tempfile.TemporaryFile())
+        else:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            handle = open(tmp_path, "w+b")
+
+        try:
+            self.capacity = 2 * old_capacity
+            self._allocate(handle, self.capacity)
+            self.mmap = mmap.mmap(handle.fileno(), 0)
+
+            count = self.count
+            for offset in range(FINGERPRINT_SET_HEADER_STRUCT.size, len(old_mmap), FINGERPRINT_SIZE):
+                fingerprint = old_mmap[offset:offset + FINGERPRINT_SIZE]
+                if fingerprint != _EMPTY_FINGERPRINT:
+                    new_offset, _ = self._slot(fingerprint)
+                    self.mmap[new_offset:new_offset + FINGERPRINT_SIZE] = fingerprint
+            FINGERPRINT_SET_HEADER_STRUCT.pack_into(self.mmap, 0, FINGERPRINT_SET_MAGIC, self.capacity, count)
+        except BaseException:
+            self.capacity = old_capacity
+            self.mmap = old_mmap
+            handle.close()
+            if self.path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+            raise
+
+        old_mmap.close()
+        self.handle.close()
+        self.handle = handle
+        if self.path is not None:
+            # Files can not be renamed while open on Windows.
+            self.mmap.flush()
+            self.mmap.close()
+            self.handle.close()
+            os.replace(tmp_path, self.path)
+            self.handle = open(self.path, "r+b")
+            self.mmap = mmap.mmap(self.handle.fileno(), 0)
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return self._slot(self._key(fingerprint))[1]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Writes pending changes and closes the file."""
+        if not self.mmap.closed:
+            self.mmap.flush()
+            self.mmap.close()
+        self.handle.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"<FingerprintSet at {id(self):#x} ({self.path!r}, {len(self)} fingerprints)>"
+
+
+def deduplicate(paths: Iterable[str], handle: BinaryIO, *, seen: Optional[FingerprintSet] = None, headers: Iterable[str] = (), encoding: str = "utf-8", errors: str = "replace") -> Tuple[int, int]:
     """
-    return read_game(handle, Visitor=HeadersBuilder)
+    Copies the games from all PGN files at *paths* to the binary file
+    *handle*, dropping games with a fingerprint that was already seen
+    (see :class:`~chess.pgn.FingerprintBuilder`). Games are copied
+    byte for byte, so nothing but the separating blank lines changes.
 
+    Fingerprints are added to *seen*, so that it can be reused for
+    deduplicating against the same files later. Defaults to a temporary
+    :class:`~chess.pgn.FingerprintSet`.
 
-def skip_game(handle: TextIO) -> bool:
+    Returns the number of games written and the number of duplicates.
     """
-    Skips a game. Returns ``True`` if a game was found and skipped.
+    Visitor = functools.partial(FingerprintBuilder, headers=list(headers))
+    written = duplicates = 0
+
+    with contextlib.ExitStack() as stack:
+        if seen is None:
+            seen = stack.enter_context(FingerprintSet())
+
+        for path in paths:
+            with open(path, "rb") as f, _mmap_file(path) as source:
+                reader = _LineReader(f, encoding=encoding, errors=errors)
+                for start, end, fingerprint in _scan_games(reader, Visitor):
+                    if seen.add(fingerprint):
+                        data = source[start:end]
+                        if data.startswith(codecs.BOM_UTF8):
+                            data = data[len(codecs.BOM_UTF8):]
+                        handle.write(data.rstrip() + b"\n\n")
+                        written += 1
+                    else:
+                        duplicates += 1
+
+    return written, duplicates
+
+
+POSITION_INDEX_SUFFIX = ".pos"
+
+POSITION_INDEX_MAGIC = b"PGNPOSIX"
+
+POSITION_INDEX_HEADER_STRUCT = struct.Struct(">8sQqQQQ")
+
+POSITION_INDEX_ENTRY_STRUCT = struct.Struct(">QQ")
+
+POSITION_INDEX_ENTRY_BYTES = 64
+
+POSITION_INDEX_MERGE_FAN_IN = 64
+
+_POSITION_INDEX_CALLABLE_FILTER = 0xffff_ffff_ffff_ffff
+
+
+def _position_index_filter(where: Optional[HeaderFilter]) -> int:
+    # Identifies header filters, so that indexes built with other filters
+    # are not reused. Callables can not be compared.
+    if where is None:
+        return 0
+    elif callable(where):
+        return _POSITION_INDEX_CALLABLE_FILTER
+    digest = hashlib.blake2b(repr([tuple(condition) for condition in where]).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & (_POSITION_INDEX_CALLABLE_FILTER - 1) or 1
+
+
+class _PositionIndexVisitor(BaseVisitor[Set[int]]):
+    def __init__(self, max_ply: int) -> None:
+        self.max_ply = max_ply
+
+    @override
+    def begin_game(self) -> None:
+        self.keys: List[int] = []
+        self.plies = 0
+
+    @override
+    def visit_board(self, board: chess.Board) -> None:
+        # Called for the initial position and after every SAN token, but
+        # the position only changes after moves.
+        if len(self.keys) <= self.plies:
+            self.keys.append(chess.polyglot.zobrist_hash(board))
+
+    @override
+    def begin_parse_san(self, board: chess.Board, san: str) -> Optional[SkipType]:
+        return SKIP if self.plies >= self.max_ply else None
+
+    @override
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.plies += 1
+
+    @override
+    def begin_variation(self) -> SkipType:
+        return SKIP
+
+    @override
+    def handle_error(self, error: Exception) -> None:
+        LOGGER.error("%s while indexing positions", error)
+
+    @override
+    def result(self) -> Set[int]:
+        return set(self.keys)
+
+
+def _write_position_index_run(f: BinaryIO, entries: Iterable[int]) -> int:
+    pack = POSITION_INDEX_ENTRY_STRUCT.pack
+    count = 0
+    for entry in entries:
+        f.write(pack(entry >> 64, entry & 0xffff_ffff_ffff_ffff))
+        count += 1
+    return count
+
+
+def _read_position_index_run(path: str, records: int = 4096) -> Iterator[int]:
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(POSITION_INDEX_ENTRY_STRUCT.size * records)
+            if not data:
+                break
+            for key, offset in POSITION_INDEX_ENTRY_STRUCT.iter_unpack(data):
+                yield key << 64 | offset
+
+
+def build_position_index(path: str, *, index_path: Optional[str] = None, max_ply: int = 30, memory_mb: int = 256, where: Optional[HeaderFilter] = None, directory: Optional[str] = None, encoding: str = "utf-8", errors: str = "replace") -> str:
     """
-    return bool(read_game(handle, Visitor=SkipVisitor))
+    Reads all games of a PGN file and writes an index with the Zobrist hash
+    (see :func:`chess.polyglot.zobrist_hash()`) of every position in the
+    first *max_ply* plies of the mainlines, and the byte offsets of the
+    games where they occurred. Returns the path of the index, which
+    defaults to the path of the PGN file with the suffix ``.pos`` appended.
+
+    See :class:`~chess.pgn.PositionIndex` to use the index.
+
+    Games can be filtered by their headers with *where*
+    (see :func:`~chess.pgn.read_game()`). Variations are ignored. Moves
+    after *max_ply* are not even parsed.
+
+    Entries are sorted in memory, using roughly *memory_mb* megabytes.
+    When full, they are written to a sorted run in a temporary
+    subdirectory of *directory* (defaults to the directory of the index),
+    and runs are merged at the end.
+    """
+    index_path = index_path or path + POSITION_INDEX_SUFFIX
+    size, mtime_ns = _source_stat(path)
+    if where is not None and not callable(where):
+        where = list(where)
+    filter_id = _position_index_filter(where)
+    max_entries = max(1, memory_mb * 1024 * 1024 // POSITION_INDEX_ENTRY_BYTES)
+    Visitor = functools.partial(_PositionIndexVisitor, max_ply)
+
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(index_path))
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with tempfile.TemporaryDirectory(prefix="position-index-", dir=directory) as tmpdir, open(path, "rb") as pgn:
+            entries: List[int] = []
+            runs: List[str] = []
+
+            def spill() -> None:
+                runs.append(os.path.join(tmpdir, f"run-{len(runs)}.bin"))
+                entries.sort()
+                with open(runs[-1], "wb") as f:
+                    _write_position_index_run(f, entries)
+                entries.clear()
+
+            reader = _LineReader(pgn, encoding=encoding, errors=errors)
+            for offset, _, keys in _scan_games(reader, Visitor, where):
+                entries.extend(key << 64 | offset for key in keys)
+                if len(entries) >= max_entries:
+                    spill()
+
+            if runs and entries:
+                spill()
+
+            def merge(group: List[str], f: BinaryIO) -> None:
+                _write_position_index_run(f, heapq.merge(*(_read_position_index_run(run) for run in group)))
+
+            runs = chess._external_sort.merge_run_groups(runs, tmpdir, POSITION_INDEX_MERGE_FAN_IN, merge)
+
+            with open(tmp_path, "wb") as f:
+                # Placeholder for the header.
+                f.write(POSITION_INDEX_HEADER_STRUCT.pack(POSITION_INDEX_MAGIC, 0, 0, 0, 0, 0))
+                if runs:
+                    count = _write_position_index_run(f, heapq.merge(*(_read_position_index_run(run) for run in runs)))
+                else:
+                    entries.sort()
+                    count = _write_position_index_run(f, entries)
+                f.seek(0)
+                f.write(POSITION_INDEX_HEADER_STRUCT.pack(POSITION_INDEX_MAGIC, size, mtime_ns, count, max_ply, filter_id))
+
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+    return index_path
+
+
+class PositionIndex:
+    """
+    Finds games by position, using an index created by
+    :func:`~chess.pgn.build_position_index()`.
+
+    If the index at *index_path* (defaults to the path of the PGN file with
+    the suffix ``.pos`` appended) does not exist or does not match the
+    size and modification time of the PGN file, or was built with a
+    different *max_ply* or header filter *where*, it is rebuilt. Indexes
+    are always rebuilt if *where* is a callable, because callables can not
+    be compared.
+
+    >>> import chess.pgn
+    >>>
+    >>> board = chess.Board()
+    >>> board.push_san("Nf3")
+    Move.from_uci('g1f3')
+    >>>
+    >>> with chess.pgn.PositionIndex("data/pgn/kasparov-deep-blue-1997.pgn", max_ply=10) as index:
+    ...     index.lookup(board)
+    ...     for offset, headers in index.find_games(board, Visitor=chess.pgn.HeadersBuilder):
+    ...         print(offset, headers["White"], headers["Result"])
+    [0, 3067]
+    0 Garry Kasparov 1-0
+    3067 Garry Kasparov 1/2-1/2
+
+    Only positions in the first *max_ply* plies of the mainlines are
+    indexed. The index is sorted by Zobrist hash, so that lookups take
+    a binary search in the memory mapped file.
+    """
+
+    def __init__(self, path: str, *, index_path: Optional[str] = None, max_ply: int = 30, memory_mb: int = 256, where: Optional[HeaderFilter] = None, encoding: str = "utf-8", errors: str = "replace") -> None:
+        self.path = path
+        self.index_path = index_path or path + POSITION_INDEX_SUFFIX
+        self.max_ply = max_ply
+        self.encoding = encoding
+        self.errors = errors
+
+        if where is not None and not callable(where):
+            where = list(where)
+        if not self._is_fresh(_position_index_filter(where)):
+            build_position_index(path, index_path=self.index_path, max_ply=max_ply, memory_mb=memory_mb, where=where, encoding=encoding, errors=errors)
+
+        with open(self.index_path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, _, _, count, _, _ = POSITION_INDEX_HEADER_STRUCT.unpack_from(self.mmap, 0)
+        self._count: int = count
+        if magic != POSITION_INDEX_MAGIC or len(self.mmap) != POSITION_INDEX_HEADER_STRUCT.size + self._count * POSITION_INDEX_ENTRY_STRUCT.size:
+            self.mmap.close()
+            raise IOError(f"invalid position index: {self.index_path!r}")
+
+        try:
+            # Unix
+            self.mmap.madvise(mmap.MADV_RANDOM)
+        except AttributeError:
+            pass
+
+        self.handle = open(path, "rb")
+        self.lock = threading.Lock()
+
+    def _is_fresh(self, filter_id: int) -> bool:
+        if filter_id == _POSITION_INDEX_CALLABLE_FILTER:
+            return False
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, size, mtime_ns, _, max_ply, indexed_filter_id = POSITION_INDEX_HEADER_STRUCT.unpack(f.read(POSITION_INDEX_HEADER_STRUCT.size))
+        except (OSError, struct.error):
+            return False
+        return magic == POSITION_INDEX_MAGIC and (size, mtime_ns) == _source_stat(self.path) and (max_ply, indexed_filter_id) == (self.max_ply, filter_id)
+
+    def __enter__(self) -> PositionIndex:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Gets the number of indexed positions and games."""
+        return self._count
+
+    def _key_at(self, index: int) -> int:
+        key: int = POSITION_INDEX_ENTRY_STRUCT.unpack_from(self.mmap, POSITION_INDEX_HEADER_STRUCT.size + index * POSITION_INDEX_ENTRY_STRUCT.size)[0]
+        return key
+
+    def bisect_key_left(self, key: int) -> int:
+        lo = 0
+        hi = self._count
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    def lookup(self, board: Union[chess.Board, int]) -> List[int]:
+        """
+        Gets the sorted byte offsets of all indexed games where the position
+        (or Zobrist hash) occurred.
+        """
+        key = board if isinstance(board, int) else chess.polyglot.zobrist_hash(board)
+
+        offsets = []
+        position = POSITION_INDEX_HEADER_STRUCT.size + self.bisect_key_left(key) * POSITION_INDEX_ENTRY_STRUCT.size
+        while position < len(self.mmap):
+            entry_key, offset = POSITION_INDEX_ENTRY_STRUCT.unpack_from(self.mmap, position)
+            if entry_key != key:
+                break
+            offsets.append(offset)
+            position += POSITION_INDEX_ENTRY_STRUCT.size
+        return offsets
+
+    @typing.overload
+    def read_game(self, offset: int) -> Game: ...
+    @typing.overload
+    def read_game(self, offset: int, *, Visitor: Callable[[], BaseVisitor[ResultT]]) -> ResultT: ...
+    def read_game(self, offset: int, *, Visitor: Any = GameBuilder) -> Any:
+        """
+        Seeks to the game at the given byte offset and reads it with the
+        given *Visitor* (see :func:`~chess.pgn.read_game()`).
+        """
+        with self.lock:
+            self.handle.seek(offset)
+            reader = _LineReader(self.handle, read_ahead=1 << 14, encoding=self.encoding, errors=self.errors)
+            return read_game(reader, Visitor=Visitor)  # type: ignore
+
+    @typing.overload
+    def find_games(self, board: Union[chess.Board, int]) -> Iterator[Tuple[int, Game]]: ...
+    @typing.overload
+    def find_games(self, board: Union[chess.Board, int], *, Visitor: Callable[[], BaseVisitor[ResultT]]) -> Iterator[Tuple[int, ResultT]]: ...
+    def find_games(self, board: Union[chess.Board, int], *, Visitor: Any = GameBuilder) -> Iterator[Tuple[int, Any]]:
+        """
+        Yields tuples of the byte offset and the *Visitor* result for each
+        game where the position occurred.
+        """
+        for offset in self.lookup(board):
+            yield offset, self.read_game(offset, Visitor=Visitor)
+
+    def close(self) -> None:
+        """Closes the index and the PGN file."""
+        self.mmap.close()
+        self.handle.close()
+
+    def __repr__(self) -> str:
+        return f"<PositionIndex at {id(self):#x} ({self.path!r}, {len(self)} entries)>"
 
 
 def parse_time_control(time_control: str) -> TimeControl:
@@ -1914,3 +4896,49 @@ def parse_time_control(time_control: str) -> TimeControl:
         tc.type = TimeControlType.STANDARD
 
     return tc
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m chess.pgn", description="Processes PGN files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    transform_parser = subparsers.add_parser("transform", help="Rewrite the games of a PGN file")
+    transform_parser.add_argument("input", help="PGN file to read")
+    transform_parser.add_argument("output", help="PGN file to write, - for stdout")
+    transform_parser.add_argument("--strip-comments", action="store_true", help="Remove comments and NAGs")
+    transform_parser.add_argument("--strip-variations", action="store_true", help="Remove variations")
+    transform_parser.add_argument("--normalize-san", action="store_true", help="Write moves in standard algebraic notation, instead of as in the input")
+    transform_parser.add_argument("--columns", type=int, default=80, help="Wrap lines at this number of columns, 0 to disable. Defaults to 80")
+    transform_parser.add_argument("-j", "--processes", type=int, help="Number of worker processes. Defaults to the number of CPUs")
+    transform_parser.add_argument("--encoding", default="utf-8", help="Encoding of the input and output. Defaults to utf-8")
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+
+    options: Dict[str, Any] = {
+        "comments": not args.strip_comments,
+        "variations": not args.strip_variations,
+        "normalize_san": args.normalize_san,
+        "columns": args.columns or None,
+        "processes": args.processes,
+        "encoding": args.encoding,
+    }
+
+    if args.output == "-":
+        count = transform(args.input, sys.stdout, **options)
+    else:
+        with open(args.output, "w", encoding=args.encoding) as f:
+            count = transform(args.input, f, **options)
+
+    print(f"Transformed {count} games", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    # Run the functions of the imported module rather than __main__, so that
+    # visitors can be pickled for worker processes.
+    import chess.pgn
+    sys.exit(chess.pgn.main())
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import chess
+import chess._external_sort
 import struct
 import os
 import mmap
 import random
 import typing
+import contextlib
+import heapq
+import tempfile
 
 from types import TracebackType
-from typing import Callable, Container, Iterator, List, NamedTuple, Optional, Type, Union
+from typing import BinaryIO, Callable, Container, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type, Union
+
+if typing.TYPE_CHECKING:
+    import chess.pgn
 
 
 StrOrBytesPath = Union[str, bytes, "os.PathLike[str]", "os.PathLike[bytes]"]
@@ -520,3 +527,232 @@ def open_reader(path: StrOrBytesPath) -> MemoryMappedReader:
     c2c4 1 0
     """
     return MemoryMappedReader(path)
+
+
+WRITER_ENTRY_BYTES = 160
+
+WRITER_MERGE_FAN_IN = 64
+
+_WRITER_RUN_STRUCT = struct.Struct(">QHQQ")
+
+_WEIGHT_MASK = (1 << 64) - 1
+
+_RESULT_WEIGHTS = {
+    "1-0": (2, 0),
+    "1/2-1/2": (1, 1),
+    "0-1": (0, 2),
+}
+
+
+def _raw_move(move: chess.Move) -> int:
+    if move.drop:
+        return move.to_square | move.to_square << 6 | (move.drop - 1) << 12
+    return move.to_square | move.from_square << 6 | (move.promotion - 1 if move.promotion else 0) << 12
+
+
+def _read_writer_run(path: str, records: int = 4096) -> Iterator[Tuple[int, int]]:
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(_WRITER_RUN_STRUCT.size * records)
+            if not data:
+                break
+            for key, raw_move, weight, learn in _WRITER_RUN_STRUCT.iter_unpack(data):
+                yield key << 16 | raw_move, weight | learn << 64
+
+
+def _sum_sorted(items: Iterator[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+    current, total = None, 0
+    for combined, value in items:
+        if combined != current:
+            if current is not None:
+                yield current, total
+            current, total = combined, 0
+        total += value
+    if current is not None:
+        yield current, total
+
+
+class BookWriter:
+    """
+    Collects entries for a new Polyglot opening book.
+
+    Weights and learn values of entries with the same key and move are
+    added. When writing, entries are sorted by key and then by descending
+    weight, and the weights of positions where they exceed 16 bits are
+    scaled down proportionally. Learn values saturate at 32 bits.
+
+    Entries are kept in memory, using roughly *memory_mb* megabytes. When
+    full, they are written to a sorted run in a temporary subdirectory of
+    *directory*, so that books larger than memory can be built with an
+    external merge sort. Call :func:`~chess.polyglot.BookWriter.close()` or
+    use the writer as a context manager to remove the temporary files.
+
+    >>> import chess.pgn
+    >>> import chess.polyglot
+    >>>
+    >>> with chess.polyglot.BookWriter() as writer:
+    ...     with open("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+    ...         while (game := chess.pgn.read_game(pgn, Visitor=chess.pgn.CompactGameBuilder)) is not None:
+    ...             writer.add_game(game, max_ply=10)
+    ...     writer.write("kasparov-deep-blue-1997.bin")  # doctest: +SKIP
+    """
+
+    def __init__(self, *, memory_mb: int = 256, directory: Optional[str] = None) -> None:
+        self.max_entries = max(1, memory_mb * 1024 * 1024 // WRITER_ENTRY_BYTES)
+        self.directory = directory
+        self.entries: Dict[int, int] = {}
+        self.runs: List[str] = []
+        self.run_count = 0
+        self.tmpdir: Optional[tempfile.TemporaryDirectory[str]] = None
+
+    def __enter__(self) -> BookWriter:
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        return self.close()
+
+    def add(self, board: Union[chess.Board, int], move: chess.Move, weight: int = 1, learn: int = 0) -> None:
+        """
+        Adds an entry for a position or Zobrist hash.
+
+        If a board is given, castling moves are converted to the Polyglot
+        encoding (king captures rook). If only a key is given, the move is
+        used as is.
+        """
+        if isinstance(board, int):
+            key = board
+        else:
+            key = zobrist_hash(board)
+            move = board._to_chess960(move)
+
+        self._add(key << 16 | _raw_move(move), weight | learn << 64)
+
+    def add_entry(self, entry: Entry) -> None:
+        """Adds an :class:`~chess.polyglot.Entry`, for example from another book."""
+        self._add(entry.key << 16 | entry.raw_move, entry.weight | entry.learn << 64)
+
+    def add_game(self, game: Union[chess.pgn.Game, chess.pgn.CompactGame], *, max_ply: int = 40) -> bool:
+        """
+        Adds the first *max_ply* mainline moves of a game. Following the
+        convention of Polyglot, each move has weight 2 if the side that
+        played it won, 1 for a draw and 0 for a loss.
+
+        Games without a result are skipped. Returns whether the game was
+        added.
+
+        Games from :class:`~chess.pgn.CompactGameBuilder` are much faster
+        to read than full :class:`~chess.pgn.Game` objects.
+        """
+        try:
+            white, black = _RESULT_WEIGHTS[game.headers.get("Result", "*")]
+        except KeyError:
+            return False
+
+        board = game.board()
+        for ply, move in enumerate(game.mainline_moves()):
+            if ply >= max_ply:
+                break
+            self.add(board, move, white if board.turn == chess.WHITE else black)
+            board.push(move)
+
+        return True
+
+    def _add(self, combined: int, value: int) -> None:
+        entries = self.entries
+        entries[combined] = entries.get(combined, 0) + value
+
+        if len(entries) >= self.max_entries:
+            self._spill()
+
+    def _run_path(self) -> str:
+        if self.tmpdir is None:
+            self.tmpdir = tempfile.TemporaryDirectory(prefix="polyglot-", dir=self.directory)
+        self.run_count += 1
+        return os.path.join(self.tmpdir.name, f"run-{self.run_count}.bin")
+
+    def _write_run(self, f: BinaryIO, items: Iterable[Tuple[int, int]]) -> None:
+        for combined, value in items:
+            f.write(_WRITER_RUN_STRUCT.pack(combined >> 16, combined & 0xffff, value & _WEIGHT_MASK, value >> 64))
+
+    def _spill(self) -> None:
+        path = self._run_path()
+        with open(path, "wb") as f:
+            self._write_run(f, ((combined, self.entries[combined]) for combined in sorted(self.entries)))
+        self.runs.append(path)
+        self.entries.clear()
+
+    def _merged(self) -> Iterator[Tuple[int, int]]:
+        if self.tmpdir is not None:
+            def merge(group: List[str], f: BinaryIO) -> None:
+                self._write_run(f, _sum_sorted(heapq.merge(*(_read_writer_run(run) for run in group))))
+
+            # Leave one slot for the entries in memory.
+            self.runs = chess._external_sort.merge_run_groups(self.runs, self.tmpdir.name, WRITER_MERGE_FAN_IN - 1, merge)
+
+        in_memory = ((combined, self.entries[combined]) for combined in sorted(self.entries))
+        return _sum_sorted(heapq.merge(in_memory, *(_read_writer_run(run) for run in self.runs)))
+
+    def _positions(self) -> Iterator[List[Tuple[int, int, int, int]]]:
+        position: List[Tuple[int, int, int, int]] = []
+        for combined, value in self._merged():
+            key = combined >> 16
+            if position and position[0][0] != key:
+                yield position
+                position = []
+            position.append((key, combined & 0xffff, value & _WEIGHT_MASK, min(value >> 64, 0xffffffff)))
+        if position:
+            yield position
+
+    def write(self, path: StrOrBytesPath) -> int:
+        """
+        Writes all entries added so far to a Polyglot opening book at
+        *path*. Returns the number of entries written.
+
+        The writer can still be used afterwards.
+        """
+        count = 0
+        tmp_path = f"{os.fsdecode(path)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for position in self._positions():
+                    max_weight = max(weight for _, _, weight, _ in position)
+                    if max_weight > 0xffff:
+                        position = [(key, raw_move, max(1, weight * 0xffff // max_weight) if weight else 0, learn) for key, raw_move, weight, learn in position]
+                    position.sort(key=lambda entry: (-entry[2], entry[1]))
+                    for entry in position:
+                        f.write(ENTRY_STRUCT.pack(*entry))
+                    count += len(position)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+        return count
+
+    def close(self) -> None:
+        """Removes temporary files."""
+        self.entries.clear()
+        self.runs.clear()
+        if self.tmpdir is not None:
+            self.tmpdir.cleanup()
+            self.tmpdir = None
+
+    def __repr__(self) -> str:
+        return f"<BookWriter at {id(self):#x} ({len(self.entries)} entries in memory, {len(self.runs)} runs)>"
+
+
+def merge_books(path: StrOrBytesPath, books: Iterable[StrOrBytesPath], *, memory_mb: int = 256, directory: Optional[str] = None) -> int:
+    """
+    Merges Polyglot opening *books* into a new book at *path*, adding the
+    weights and learn values of entries with the same key and move (see
+    :class:`~chess.polyglot.BookWriter`).
+
+    Returns the number of entries written.
+    """
+    with BookWriter(memory_mb=memory_mb, directory=directory) as writer:
+        for book in books:
+            with open_reader(book) as reader:
+                for entry in reader:
+                    writer.add_entry(entry)
+        return writer.write(path)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import chess
+
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class _MateSearch:
+    def __init__(self, board: chess.Board, *, checks_only: bool = False) -> None:
+        self.board = board
+        self.attacker = board.turn
+        self.checks_only = checks_only
+
+        # Only checks can deliver an immediate mate in standard chess, but
+        # variants may end the game in other ways.
+        self.mate_needs_check = type(board).uci_variant == "chess"
+
+        # Transposition table, mapping positions to the smallest number of
+        # attacker moves that is known to win and the largest number of
+        # attacker moves that is known to be insufficient.
+        self.proven: Dict[Hashable, int] = {}
+        self.disproven: Dict[Hashable, int] = {}
+
+        self.nodes = 0
+
+    def _attacker_moves(self, n: int) -> List[chess.Move]:
+        board = self.board
+        only_checks = self.checks_only or (n == 1 and self.mate_needs_check)
+
+        scored: List[Tuple[int, int, chess.Move]] = []
+        for i, move in enumerate(board.generate_legal_moves()):
+            if board.gives_check(move):
+                scored.append((0, i, move))
+            elif only_checks:
+                continue
+            elif board.is_capture(move) or move.promotion:
+                scored.append((1, i, move))
+            else:
+                scored.append((2, i, move))
+
+        scored.sort()
+        return [move for _, _, move in scored]
+
+    def _decided(self) -> Optional[bool]:
+        outcome = self.board.outcome()
+        if outcome is None:
+            return None
+        return outcome.winner == self.attacker
+
+    def attacker_wins(self, n: int) -> Optional[chess.Move]:
+        """Finds a move that forces a win in at most *n* attacker moves."""
+        board = self.board
+        key = board._transposition_key()
+        if self.disproven.get(key, 0) >= n:
+            return None
+
+        self.nodes += 1
+
+        for move in self._attacker_moves(n):
+            board.push(move)
+            try:
+                decided = self._decided()
+                if decided or (decided is None and n > 1 and self.defender_loses(n - 1)):
+                    self.proven[key] = min(self.proven.get(key, n), n)
+                    return move
+            finally:
+                board.pop()
+
+        self.disproven[key] = max(self.disproven.get(key, 0), n)
+        return None
+
+    def defender_loses(self, n: int) -> bool:
+        """Checks if all defender moves lose in at most *n* attacker moves."""
+        board = self.board
+        key = board._transposition_key()
+        if self.proven.get(key, n + 1) <= n:
+            return True
+        if self.disproven.get(key, 0) >= n:
+            return False
+
+        self.nodes += 1
+
+        for move in board.generate_legal_moves():
+            board.push(move)
+            try:
+                decided = self._decided()
+                if decided is None:
+                    decided = self.attacker_wins(n) is not None
+                if not decided:
+                    self.disproven[key] = max(self.disproven.get(key, 0), n)
+                    return False
+            finally:
+                board.pop()
+
+        self.proven[key] = min(self.proven.get(key, n), n)
+        return True
+
+    def distance(self, max_depth: int) -> Optional[int]:
+        """
+        Finds the smallest number of attacker moves required to win against
+        every defense, if any.
+        """
+        for n in range(1, max_depth + 1):
+            if self.attacker_wins(n) is not None:
+                return n
+        return None
+
+    def principal_variation(self, n: int) -> List[chess.Move]:
+        board = self.board
+        pv: List[chess.Move] = []
+
+        while True:
+            move = self.attacker_wins(n)
+            assert move is not None, "expected proven win while following principal variation"
+            board.push(move)
+            pv.append(move)
+
+            if self._decided():
+                break
+
+            # The defender chooses the longest resistance.
+            best_reply, best_n = None, 0
+            for reply in board.generate_legal_moves():
+                board.push(reply)
+                for k in range(1, n):
+                    if self.attacker_wins(k) is not None:
+                        break
+                board.pop()
+                if best_reply is None or k > best_n:
+                    best_reply, best_n = reply, k
+
+            assert best_reply is not None, "expected defender to have legal moves"
+            board.push(best_reply)
+            pv.append(best_reply)
+            n = best_n
+
+        for _ in pv:
+            board.pop()
+
+        return pv
+
+
+def find_mate(board: chess.Board, max_depth: int, *, checks_only: bool = False) -> Optional[List[chess.Move]]:
+    """
+    Searches for a forced win of the side to move in at most *max_depth*
+    moves, using iterative deepening with move ordering and a transposition
+    table.
+
+    Returns the principal variation of the shortest forced win, where the
+    defender chooses the longest resistance, or ``None`` if there is no
+    forced win within *max_depth* moves.
+
+    >>> import chess
+    >>> import chess.search
+    >>>
+    >>> board = chess.Board("r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 1")
+    >>> board.variation_san(chess.search.find_mate(board, 2))
+    '1. Nf6+ gxf6 2. Bxf7#'
+
+    Besides checkmates, any variant end condition (for example, reaching the
+    center in King of the Hill) counts as a win, so variant boards from
+    :mod:`chess.variant` are supported.
+
+    If *checks_only* is set, only checking moves are considered for the
+    attacker. This is much faster, but will not find mates with quiet moves.
+
+    The board is restored to its original state after the search.
+    Repetitions are not considered.
+
+    Complexity is exponential in *max_depth*, so this is intended for short
+    mates, like those in tactics puzzles.
+    """
+    search = _MateSearch(board, checks_only=checks_only)
+
+    if board.is_game_over():
+        return None
+
+    n = search.distance(max_depth)
+    if n is None:
+        return None
+
+    return search.principal_variation(n)
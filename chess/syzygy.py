@@ -940,6 +940,8 @@ class Table:
 
     def decompress_pairs(self, d: PairsData, idx: int) -> int:
         assert self.data
+        if chess._instrumentation_used:
+            chess._count("decompressed_blocks")
 
         if not d.idxbits:
             return d.min_len
@@ -1532,6 +1534,9 @@ class Tablebase:
         return 0
 
     def probe_wdl_table(self, board: chess.Board) -> int:
+        if chess._instrumentation_used:
+            chess._count("syzygy_probes")
+
         # Test for variant end.
         if board.is_variant_win():
             return 2
@@ -1727,6 +1732,9 @@ class Tablebase:
             return default
 
     def probe_dtz_table(self, board: chess.Board, wdl: int) -> Tuple[int, int]:
+        if chess._instrumentation_used:
+            chess._count("syzygy_probes")
+
         key = calc_key(board)
         try:
             table = typing.cast(DtzTable, self.dtz[key])
@@ -1940,7 +1948,8 @@ class Tablebase:
             _, dtz = self.dtz.popitem()
             dtz.close()
 
-        self.lru.clear()
+        with self.lru_lock:
+            self.lru.clear()
 
     def __enter__(self) -> Tablebase:
         return self
@@ -690,15 +690,13 @@ class ThreeCheckBoard(chess.Board):
     tbw_magic = None
     tbz_magic = None
 
+    _stacks = chess.Board._stacks + ("_three_check_stack", )
+
     def __init__(self, fen: Optional[str] = starting_fen, chess960: bool = False) -> None:
         self.remaining_checks = [3, 3]
         self._three_check_stack: List[_ThreeCheckBoardState] = []
         super().__init__(fen, chess960=chess960)
 
-    def clear_stack(self) -> None:
-        super().clear_stack()
-        self._three_check_stack.clear()
-
     def reset_board(self) -> None:
         super().reset_board()
         self.remaining_checks[chess.WHITE] = 3
@@ -794,12 +792,12 @@ class ThreeCheckBoard(chess.Board):
     def copy(self, *, stack: Union[bool, int] = True) -> Self:
         board = super().copy(stack=stack)
         board.remaining_checks = self.remaining_checks.copy()
-        if stack:
-            stack = len(self.move_stack) if stack is True else stack
+        if stack and board._frozen is None:
             board._three_check_stack = self._three_check_stack[-stack:]
         return board
 
     def root(self) -> Self:
+        self._thaw()
         if self._three_check_stack:
             board = super().root()
             self._three_check_stack[0].restore(board)
@@ -879,15 +877,13 @@ class CrazyhouseBoard(chess.Board):
     tbw_magic = None
     tbz_magic = None
 
+    _stacks = chess.Board._stacks + ("_crazyhouse_stack", )
+
     def __init__(self, fen: Optional[str] = starting_fen, chess960: bool = False) -> None:
         self.pockets = [CrazyhousePocket(), CrazyhousePocket()]
         self._crazyhouse_stack: List[_CrazyhouseBoardState] = []
         super().__init__(fen, chess960=chess960)
 
-    def clear_stack(self) -> None:
-        super().clear_stack()
-        self._crazyhouse_stack.clear()
-
     def reset_board(self) -> None:
         super().reset_board()
         self.pockets[chess.WHITE].reset()
@@ -1044,12 +1040,12 @@ class CrazyhouseBoard(chess.Board):
         board = super().copy(stack=stack)
         board.pockets[chess.WHITE] = self.pockets[chess.WHITE].copy()
         board.pockets[chess.BLACK] = self.pockets[chess.BLACK].copy()
-        if stack:
-            stack = len(self.move_stack) if stack is True else stack
+        if stack and board._frozen is None:
             board._crazyhouse_stack = self._crazyhouse_stack[-stack:]
         return board
 
     def root(self) -> Self:
+        self._thaw()
         if self._crazyhouse_stack:
             board = super().root()
             self._crazyhouse_stack[0].restore(board)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+Measure how board workloads scale across a thread pool.
+
+Only interpreters without a global interpreter lock (free-threaded CPython
+3.13+) are expected to show speedups for the pure Python workloads.
+Threads share parsed data and tablebase memory maps, unlike processes.
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import io
+import os
+import sys
+import time
+
+from typing import Callable, Dict, List
+
+import chess
+import chess.pgn
+import chess.syzygy
+
+
+def perft(depth: int, board: chess.Board) -> int:
+    if depth < 1:
+        return 1
+
+    count = 0
+    for move in board.legal_moves:
+        board.push(move)
+        count += perft(depth - 1, board)
+        board.pop()
+    return count
+
+
+def perft_tasks(depth: int) -> List[Callable[[], int]]:
+    # One task per root move. Every task works on its own board.
+    tasks: List[Callable[[], int]] = []
+    root = chess.Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    for move in root.legal_moves:
+        board = root.copy(stack=False)
+        board.push(move)
+        tasks.append(functools.partial(perft, depth - 1, board))
+    return tasks
+
+
+def pgn_tasks(directory: str, repeat: int) -> List[Callable[[], int]]:
+    # Every task parses one file, read into memory once and shared.
+    def parse(text: str) -> int:
+        pgn = io.StringIO(text)
+        count = 0
+        while chess.pgn.read_game(pgn) is not None:
+            count += 1
+        return count
+
+    tasks: List[Callable[[], int]] = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".pgn"):
+            with open(os.path.join(directory, name), encoding="utf-8-sig") as f:
+                text = f.read()
+            tasks.extend(functools.partial(parse, text) for _ in range(repeat))
+    return tasks
+
+
+def syzygy_tasks(tablebase: chess.syzygy.Tablebase, epd_path: str, repeat: int) -> List[Callable[[], int]]:
+    # All tasks share a single tablebase and its memory mapped files.
+    with open(epd_path) as f:
+        boards = [chess.Board.from_epd(line)[0] for line in f if line.strip()]
+
+    def probe(chunk: List[chess.Board]) -> int:
+        return sum(tablebase.probe_wdl(board) for board in chunk)
+
+    chunk_size = max(1, len(boards) // 16)
+    chunks = [boards[i:i + chunk_size] for i in range(0, len(boards), chunk_size)]
+    return [functools.partial(probe, chunk) for chunk in chunks for _ in range(repeat)]
+
+
+def run(tasks: List[Callable[[], int]], threads: int) -> float:
+    start_time = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(task) for task in tasks]:
+            future.result()
+    return time.perf_counter() - start_time
+
+
+def main(workloads: Dict[str, List[Callable[[], int]]], thread_counts: List[int]) -> None:
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"# Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled else 'disabled'}, {os.cpu_count()} cores")
+
+    for name, tasks in workloads.items():
+        baseline = None
+        for threads in thread_counts:
+            elapsed = run(tasks, threads)
+            baseline = baseline or elapsed
+            print(f"{name:<8} threads {threads:>3} time {elapsed:8.3f}s speedup {baseline / elapsed:5.2f}x", flush=True)
+
+
+if __name__ == "__main__":
+    data = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-t", "--threads", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}), help="Thread pool sizes to compare")
+    parser.add_argument("--perft-depth", type=int, default=3, help="Perft depth. Defaults to 3")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of times to repeat the PGN and Syzygy tasks")
+    parser.add_argument("--data", default=data, help="Directory with pgn/ and syzygy/ test data")
+
+    args = parser.parse_args()
+
+    workloads = {
+        "perft": perft_tasks(args.perft_depth),
+        "pgn": pgn_tasks(os.path.join(args.data, "pgn"), args.repeat),
+    }
+
+    with chess.syzygy.open_tablebase(os.path.join(args.data, "syzygy", "regular")) as tablebase:
+        workloads["syzygy"] = syzygy_tasks(tablebase, os.path.join(args.data, "endgame.epd"), args.repeat)
+        main(workloads, args.threads)
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
 import asyncio
+import concurrent.futures
+import contextlib
 import copy
 import logging
 import os
 import os.path
+import pickle
 import platform
 import sys
 import tempfile
@@ -13,10 +16,12 @@ import unittest
 import io
 
 import chess
+import chess.bench
 import chess.gaviota
 import chess.engine
 import chess.pgn
 import chess.polyglot
+import chess.search
 import chess.svg
 import chess.syzygy
 import chess.variant
@@ -1728,6 +1733,90 @@ class BoardTestCase(unittest.TestCase):
         board = chess.Board("KKKK1kkk/8/8/8/8/8/8/8 w - - 0 1")
         self.assertEqual(board.king(chess.WHITE), None)
 
+    def test_copy_on_write_stack(self):
+        board = chess.Board()
+        for san in ["e4", "e5", "Nf3", "Nc6"]:
+            board.push_san(san)
+
+        copy = board.copy()
+        self.assertIs(copy._frozen, board._frozen)
+        self.assertEqual(copy.peek(), chess.Move.from_uci("b8c6"))
+
+        copy.push_san("Bb5")
+        self.assertIs(copy._frozen, board._frozen)
+        board.pop()
+        board.push_san("Nf6")
+        self.assertEqual(copy.move_stack, [chess.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5"]])
+        self.assertEqual(board.move_stack, [chess.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "g1f3", "g8f6"]])
+        self.assertEqual(copy.root(), chess.Board())
+
+        copy.clear_stack()
+        self.assertEqual(len(board.move_stack), 4)
+        self.assertEqual(board.pop(), chess.Move.from_uci("g8f6"))
+
+        # Fan out from a shared prefix.
+        candidates = [board.copy() for _ in range(3)]
+        for candidate, uci in zip(candidates, ["b8c6", "g8f6", "d7d6"]):
+            candidate.push_uci(uci)
+        board.push_uci("f8c5")
+        self.assertEqual([candidate.pop().uci() for candidate in candidates], ["b8c6", "g8f6", "d7d6"])
+        self.assertEqual([candidate.pop().uci() for candidate in candidates], ["g1f3"] * 3)
+        self.assertEqual(candidates[0].fen(), "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+        self.assertEqual(board.pop(), chess.Move.from_uci("f8c5"))
+        self.assertTrue(board.copy().is_repetition(1))
+        self.assertEqual(board.copy().root(), chess.Board())
+
+        partial = board.copy(stack=2)
+        self.assertEqual(partial.move_stack, board.move_stack[-2:])
+        self.assertEqual(partial.root().fen(), "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+
+    def test_instrumentation(self):
+        push = chess.Board.push
+
+        with chess.instrumented() as counters:
+            board = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+            board.push_san("Bb5")
+            board.pop()
+            self.assertEqual(board.legal_moves.count(), 27)
+            self.assertTrue(board.is_legal(chess.Move.from_uci("f1c4")))
+
+        self.assertIs(chess.Board.push, push)
+        self.assertEqual(counters["fen_parses"], 1)
+        self.assertEqual(counters["san_parses"], 1)
+        self.assertEqual(counters["push"], 1)
+        self.assertEqual(counters["pop"], 1)
+        self.assertEqual(counters["legality_checks"], 1)
+        self.assertGreaterEqual(counters["generated_moves"], 27)
+
+        snapshot = chess.instrumentation_counters()
+        board.push_san("Bb5")
+        self.assertEqual(chess.instrumentation_counters(), snapshot)
+
+        # Nested blocks add to the enclosing counters.
+        chess.set_instrumentation(True)
+        try:
+            board.pop()
+            with chess.instrumented() as counters:
+                board.push_san("Bb5")
+            self.assertEqual(counters["push"], 1)
+            self.assertEqual(chess.instrumentation_counters()["push"], 1)
+            self.assertEqual(chess.instrumentation_counters()["pop"], 1)
+            chess.reset_instrumentation_counters()
+            self.assertEqual(chess.instrumentation_counters(), {})
+        finally:
+            chess.set_instrumentation(False)
+
+        # Counters are separate for each thread.
+        def pushes(n):
+            with chess.instrumented() as counters:
+                board = chess.Board()
+                for _ in range(n):
+                    board.push(chess.Move.null())
+            return counters["push"]
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            self.assertEqual(list(executor.map(pushes, [10, 20, 30, 40] * 4)), [10, 20, 30, 40] * 4)
+
 
 class LegalMoveGeneratorTestCase(unittest.TestCase):
 
@@ -2091,6 +2180,76 @@ class PolyglotTestCase(unittest.TestCase):
             with self.assertRaises(IndexError):
                 book.find(chess.Board(), minimum_weight=2)
 
+    def test_book_writer(self):
+        pgn = io.StringIO(textwrap.dedent("""\
+            [Result "1-0"]
+
+            1. e4 e5 2. Nf3 Nc6 3. Bc4 Nf6 4. O-O 1-0
+
+            [Result "1/2-1/2"]
+
+            1. e4 c5 1/2-1/2
+
+            [Result "0-1"]
+
+            1. d4 d5 0-1
+
+            1. c4 *
+            """))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with chess.polyglot.BookWriter() as writer:
+                while True:
+                    game = chess.pgn.read_game(pgn, Visitor=chess.pgn.CompactGameBuilder)
+                    if game is None:
+                        break
+                    writer.add_game(game)
+                writer.add(chess.Board(), chess.Move.from_uci("g1f3"), 7, 3)
+                writer.add(chess.polyglot.zobrist_hash(chess.Board()), chess.Move.from_uci("g1f3"), 1, 2)
+                self.assertEqual(writer.write(os.path.join(tmpdir, "games.bin")), 11)
+
+            with chess.polyglot.open_reader(os.path.join(tmpdir, "games.bin")) as book:
+                entries = [(entry.move.uci(), entry.weight, entry.learn) for entry in book.find_all(chess.Board(), minimum_weight=0)]
+                self.assertEqual(entries, [("g1f3", 8, 5), ("e2e4", 3, 0), ("d2d4", 0, 0)])
+
+                board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+                self.assertEqual(book.find(board).move, chess.Move.from_uci("e1g1"))
+                self.assertEqual(book.find(board).raw_move & 0xfff, chess.E1 << 6 | chess.H1)
+
+                keys = [entry.key for entry in book]
+                self.assertEqual(keys, sorted(keys))
+
+            # Merge in multiple passes with runs on disk. Weights that no
+            # longer fit into 16 bits are scaled.
+            fan_in = chess.polyglot.WRITER_MERGE_FAN_IN
+            chess.polyglot.WRITER_MERGE_FAN_IN = 2
+            try:
+                with chess.polyglot.BookWriter(memory_mb=0, directory=tmpdir) as writer:
+                    writer.add(chess.Board(), chess.Move.from_uci("e2e4"), 0xffff)
+                    writer.add(chess.Board(), chess.Move.from_uci("d2d4"), 0x8000)
+                    writer.write(os.path.join(tmpdir, "heavy.bin"))
+
+                    self.assertEqual(chess.polyglot.merge_books(os.path.join(tmpdir, "merged.bin"), [os.path.join(tmpdir, "games.bin"), os.path.join(tmpdir, "heavy.bin")], memory_mb=0, directory=tmpdir), 11)
+
+                # Runs merged by an earlier write are merged again.
+                with chess.polyglot.BookWriter(memory_mb=0, directory=tmpdir) as writer:
+                    moves = list(chess.Board().legal_moves)
+                    for move in moves[:6]:
+                        writer.add(chess.Board(), move)
+                    self.assertEqual(writer.write(os.path.join(tmpdir, "reused.bin")), 6)
+                    for move in moves[6:]:
+                        writer.add(chess.Board(), move)
+                    self.assertEqual(writer.write(os.path.join(tmpdir, "reused.bin")), 20)
+                os.unlink(os.path.join(tmpdir, "reused.bin"))
+            finally:
+                chess.polyglot.WRITER_MERGE_FAN_IN = fan_in
+
+            with chess.polyglot.open_reader(os.path.join(tmpdir, "merged.bin")) as book:
+                entries = [(entry.move.uci(), entry.weight) for entry in book.find_all(chess.Board(), minimum_weight=0)]
+                self.assertEqual(entries, [("e2e4", 0xffff), ("d2d4", 0x8000 * 0xffff // 0x10002), ("g1f3", 8 * 0xffff // 0x10002)])
+
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["games.bin", "heavy.bin", "merged.bin"])
+
 
 class PgnTestCase(unittest.TestCase):
 
@@ -2152,6 +2311,61 @@ class PgnTestCase(unittest.TestCase):
         game.accept(exporter)
         self.assertEqual(virtual_file.getvalue(), pgn + "\n\n")
 
+    def test_write_games(self):
+        first = chess.pgn.read_game(io.StringIO("1. e4 e5 2. Nf3 { Comment } ( 2. Nc3 ) 2... Nc6 *"))
+        second = chess.pgn.Game.from_board(chess.Board("4k3/8/8/8/8/8/8/4K3 b - - 0 1"))
+        second.add_main_variation(chess.Move.from_uci("e8d7"))
+
+        f = io.StringIO()
+        written = chess.pgn.write_games(f, [first, second, first], columns=None, variations=False)
+        self.assertEqual(written, len(f.getvalue()))
+
+        expected = [game.accept(chess.pgn.StringExporter(columns=None, variations=False)) + "\n\n" for game in [first, second, first]]
+        self.assertEqual(f.getvalue(), "".join(expected))
+        self.assertIn("\n\n1... Kd7 1/2-1/2\n\n", f.getvalue())
+
+    def test_transform(self):
+        pgn = textwrap.dedent("""\
+            [Event "First"]
+
+            1. e4 { Comment } e5 2. Bc4 $1 ( 2. Nf3 Nc6 ) 2... Nc6 3. Qh5 Nf6 4. Qxf7# 1-0
+
+            [Event "Second"]
+
+            1. e4 d5 ( 1... Nf6 ) 2. Bb5+ *
+            """)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "input.pgn")
+            with open(path, "w") as f:
+                f.write(pgn)
+
+            f = io.StringIO()
+            self.assertEqual(chess.pgn.transform(path, f, comments=False, variations=False, processes=1), 2)
+            self.assertEqual(f.getvalue(), textwrap.dedent("""\
+                [Event "First"]
+
+                1. e4 e5 2. Bc4 Nc6 3. Qh5 Nf6 4. Qxf7# 1-0
+
+                [Event "Second"]
+
+                1. e4 d5 2. Bb5+ *
+
+                """))
+
+            f = io.StringIO()
+            chess.pgn.transform(path, f, normalize_san=True, columns=None, processes=1)
+            self.assertIn("1. e4 { Comment } 1... e5 2. Bc4 $1 ( 2. Nf3 Nc6 ) 2... Nc6 3. Qh5 Nf6 4. Qxf7# 1-0", f.getvalue())
+
+            output = os.path.join(tmpdir, "output.pgn")
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(chess.pgn.main(["transform", path, output, "--strip-variations", "--normalize-san", "-j", "2"]), 0)
+            self.assertEqual(stderr.getvalue(), "Transformed 2 games\n")
+            with open(output) as f:
+                games = [str(game.mainline()) for _, game in chess.pgn.iter_games(f)]
+            self.assertEqual(games, ["1. e4 { Comment } 1... e5 2. Bc4 $1 Nc6 3. Qh5 Nf6 4. Qxf7#", "1. e4 d5 2. Bb5+"])
+
     def test_game_without_tag_roster(self):
         game = chess.pgn.Game.without_tag_roster()
         self.assertEqual(str(game), "*")
@@ -2358,6 +2572,13 @@ class PgnTestCase(unittest.TestCase):
         self.assertEqual(game[0].san(), "c4")
         self.assertEqual(len(game.errors), 0)
 
+        # Continue in the correct position after nested variations.
+        pgn = io.StringIO("1. e4 e5 ( 1... c5 2. Nf3 ( 2. c3 d5 ) 2... d6 ( 2... Nc6 3. d4 ) ) ( 1... e6 ) 2. Nf3 Nc6 *")
+        game = chess.pgn.read_game(pgn)
+        self.assertEqual(game.end().board().fen(), "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+        self.assertEqual(game.next().variations[1].end().board().fen(), "rnbqkbnr/pp2pppp/3p4/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3")
+        self.assertEqual([node.san() for node in game.next().variations], ["e5", "c5", "e6"])
+
     def test_game_starting_comment(self):
         pgn = io.StringIO("{ Game starting comment } 1. d3")
         game = chess.pgn.read_game(pgn)
@@ -2801,6 +3022,24 @@ class PgnTestCase(unittest.TestCase):
         self.assertEqual(node.move, chess.Move.from_uci("e2e4"))
         self.assertTrue(node.is_end())
 
+    def test_movetext_comments_and_escapes(self):
+        pgn = io.StringIO(textwrap.dedent("""\
+            1. e4 { Spans
+
+            lines } e5 ; Rest { of line
+            % Escaped 2. d4 {
+            2. Nf3 {}{  }%Nc6 { Unterminated
+
+            3. Bb5 *
+            """))
+
+        game = chess.pgn.read_game(pgn)
+        self.assertEqual(game.next().comments, ["Spans\n\nlines"])
+        self.assertEqual([node.san() for node in game.mainline()], ["e4", "e5", "Nf3", "Nc6"])
+        self.assertEqual(game.end().parent.comments, [])
+        self.assertEqual(game.end().comments, ["Unterminated\n\n3. Bb5 *\n"])
+        self.assertIsNone(chess.pgn.read_game(pgn))
+
     def test_empty_game(self):
         pgn = io.StringIO(" \n\n   ")
         game = chess.pgn.read_game(pgn)
@@ -2981,6 +3220,728 @@ class PgnTestCase(unittest.TestCase):
         game = chess.pgn.read_game(io.StringIO(pgn)).accept(BlackVariationsOnly())
         self.assertEqual(game.accept(chess.pgn.StringExporter(headers=False)), expected_pgn)
 
+    def test_iter_games(self):
+        with open("data/pgn/kasparov-deep-blue-1997.pgn", "rb") as pgn:
+            data = pgn.read()
+
+        games = []
+        with open("data/pgn/kasparov-deep-blue-1997.pgn", encoding="utf-8") as pgn:
+            while True:
+                game = chess.pgn.read_game(pgn)
+                if game is None:
+                    break
+                games.append(str(game))
+
+        for read_ahead in [1, 13, 1 << 20]:
+            results = list(chess.pgn.iter_games(io.BytesIO(data), read_ahead=read_ahead))
+            self.assertEqual([str(game) for _, game in results], games)
+
+            # Offsets can be used to seek to games.
+            for offset, game in results:
+                pgn = io.TextIOWrapper(io.BytesIO(data[offset:]), encoding="utf-8")
+                self.assertEqual(str(chess.pgn.read_game(pgn)), str(game))
+
+        # Offsets are absolute byte offsets in binary mode.
+        handle = io.BytesIO("\n\n; Comment\n[Event \"Café\"]\n\n1. e4 *\n\n\n[Event \"B\"]\n\n1. d4 *\n".encode("utf-8"))
+        handle.seek(1)
+        results = list(chess.pgn.iter_games(handle, Visitor=chess.pgn.HeadersBuilder))
+        self.assertEqual([(offset, headers["Event"]) for offset, headers in results], [(12, "Café"), (39, "B")])
+
+        # Character offsets in text mode.
+        handle = io.StringIO("[Event \"Café\"]\n\n1. e4 *\n\n[Event \"B\"]\n")
+        results = list(chess.pgn.iter_games(handle, Visitor=chess.pgn.HeadersBuilder))
+        self.assertEqual([(offset, headers["Event"]) for offset, headers in results], [(0, "Café"), (25, "B")])
+
+        self.assertEqual(list(chess.pgn.iter_games(io.BytesIO(b"\n\n"))), [])
+
+    def test_parallel_read(self):
+        with open("data/pgn/kasparov-deep-blue-1997.pgn", encoding="utf-8") as pgn:
+            text = pgn.read()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "games.pgn")
+            with open(path, "w", encoding="utf-8", newline="\r\n") as pgn:
+                for i in range(10):
+                    pgn.write(text.replace("IBM Man-Machine", f"Event {i}"))
+                    pgn.write("\n\n")
+
+            with open(path, encoding="utf-8") as pgn:
+                expected = []
+                while True:
+                    game = chess.pgn.read_game(pgn)
+                    if game is None:
+                        break
+                    expected.append(str(game))
+            self.assertEqual(len(expected), 60)
+
+            games = list(chess.pgn.parallel_read(path, processes=2, chunk_size=2000))
+            self.assertEqual([str(game) for game in games], expected)
+
+            headers = list(chess.pgn.parallel_read(path, Visitor=chess.pgn.HeadersBuilder, processes=2, chunk_size=1, ordered=False))
+            self.assertEqual(sorted(h["Event"] for h in headers), sorted(chess.pgn.read_game(io.StringIO(game)).headers["Event"] for game in expected))
+
+            # Stop early.
+            self.assertEqual(str(next(chess.pgn.parallel_read(path, processes=2, chunk_size=1))), expected[0])
+
+            # Filter by headers.
+            headers = list(chess.pgn.parallel_read(path, Visitor=chess.pgn.HeadersBuilder, where=[("Event", "contains", "Event 7")], processes=2, chunk_size=2000))
+            self.assertEqual([h["Site"] for h in headers], ["01", "02", "03", "04", "05", "06"])
+
+    def test_indexed_pgn(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "games.pgn")
+            with open("data/pgn/kasparov-deep-blue-1997.pgn", "rb") as src, open(path, "wb") as dst:
+                data = src.read()
+                dst.write(data)
+                dst.write(b"\n\n[Event \"\xc3\xa9\"]\n\n1. e4 *\n")
+
+            with open(path, "rb") as f:
+                games = [str(game) for _, game in chess.pgn.iter_games(f)]
+
+            index_path = chess.pgn.build_index(path, tags=["White", "Event", "WhiteElo"])
+            self.assertEqual(index_path, path + ".idx")
+
+            with chess.pgn.IndexedPGN(path, tags=["White", "Event", "WhiteElo"]) as pgn:
+                self.assertEqual(pgn.tags, ["White", "Event", "WhiteElo"])
+                self.assertEqual(len(pgn), 7)
+                self.assertEqual([str(game) for game in pgn], games)
+                self.assertEqual(str(pgn[-2]), games[5])
+                self.assertEqual(dict(pgn.headers(6)), {"Event": "é"})
+                self.assertEqual(pgn.headers(1)["White"], "Deep Blue (Computer)")
+                self.assertEqual(pgn.offset(1), 717)
+                with self.assertRaises(IndexError):
+                    pgn[7]
+
+                kasparov = pgn.iter_games(where=lambda headers: headers.get("White") == "Garry Kasparov", Visitor=chess.pgn.HeadersBuilder)
+                self.assertEqual([i for i, _ in kasparov], [0, 2, 4])
+
+                deep_blue = pgn.iter_games(where=[("White", "contains", "Deep Blue")], Visitor=chess.pgn.HeadersBuilder)
+                self.assertEqual([i for i, _ in deep_blue], [1, 3, 5])
+
+            # Rebuilt with other tags.
+            with chess.pgn.IndexedPGN(path, tags=["Black"]) as pgn:
+                self.assertEqual(pgn.tags, ["Black"])
+                self.assertEqual([i for i, _ in pgn.iter_games(where=[("Black", "==", "Garry Kasparov")], Visitor=chess.pgn.HeadersBuilder)], [1, 3, 5])
+
+            # Rebuilt when the PGN file changes.
+            with open(path, "ab") as f:
+                f.write(b"\n\n1. d4 *\n")
+            with chess.pgn.IndexedPGN(path) as pgn:
+                self.assertEqual(len(pgn), 8)
+                self.assertEqual(pgn.tags, chess.pgn.TAG_ROSTER)
+                self.assertEqual(pgn[7].next().move, chess.Move.from_uci("d2d4"))
+
+    def test_lazy_game(self):
+        pgn = io.StringIO(textwrap.dedent("""\
+            [Event "Lazy"]
+            [FEN "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"]
+
+            { Starting comment } 1. e4 { Blank
+
+            line } ( 1. e3 ) 1... Kd7 *
+
+            [Event "Unknown result"]
+
+            1. d4 1-0
+
+            """))
+
+        game = chess.pgn.read_game(pgn, Visitor=chess.pgn.LazyGameBuilder)
+        self.assertIsInstance(game, chess.pgn.LazyGame)
+        self.assertFalse(game.is_parsed())
+        self.assertEqual(game.headers["Event"], "Lazy")
+
+        self.assertEqual(game.comments, ["Starting comment"])
+        self.assertTrue(game.is_parsed())
+        self.assertEqual(game.next().comments, ["Blank\n\nline"])
+        self.assertEqual([node.san() for node in game.variations], ["e4", "e3"])
+        self.assertEqual(game.errors, [])
+        self.assertEqual(game.end().board().fen(), "8/3k4/8/8/4P3/8/8/4K3 w - - 1 2")
+
+        # Results in the movetext are applied to the headers immediately.
+        game = chess.pgn.read_game(pgn, Visitor=chess.pgn.LazyGameBuilder)
+        self.assertEqual(game.headers["Result"], "1-0")
+        self.assertEqual(game.next().move, chess.Move.from_uci("d2d4"))
+        self.assertIsNone(chess.pgn.read_game(pgn, Visitor=chess.pgn.LazyGameBuilder))
+
+        with open("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+            game = chess.pgn.read_game(pgn, Visitor=chess.pgn.LazyGameBuilder)
+        expected = str(game)
+        self.assertTrue(game.is_parsed())
+
+        with open("data/pgn/kasparov-deep-blue-1997.pgn") as pgn:
+            game = chess.pgn.read_game(pgn, Visitor=chess.pgn.LazyGameBuilder)
+        copy = pickle.loads(pickle.dumps(game))
+        self.assertFalse(copy.is_parsed())
+        self.assertEqual(str(copy), expected)
+
+    def test_compact_game(self):
+        pgn = io.StringIO(textwrap.dedent("""\
+            [Event "Compact"]
+
+            { Root } 1. e4 { [%clk 0:03:00.5] [%eval 0.17,20] } ( 1. d4 { [%clk 0:00:01] } ) 1... e5 $2 $4 2. Qh5 { [%eval #-3] } Nc6 { [%eval #1] } 3. Qxf7# 1-0
+
+            [Variant "Crazyhouse"]
+
+            1. e4 d5 2. exd5 Qxd5 3. Nc3 Qd8 4. P@d5 P@e4 *
+            """))
+
+        game = chess.pgn.read_game(pgn, Visitor=chess.pgn.CompactGameBuilder)
+        self.assertEqual(game.headers["Result"], "1-0")
+        self.assertEqual(game.fen, chess.STARTING_FEN)
+        self.assertEqual(game.mainline_moves(), [chess.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "d1h5", "b8c6", "h5f7"]])
+        self.assertEqual(list(game.clocks)[0], 180.5)
+        self.assertEqual([game.clock(index) for index in range(1, 5)], [None] * 4)
+        self.assertEqual(game.eval(0), chess.engine.PovScore(chess.engine.Cp(17), chess.WHITE))
+        self.assertEqual(game.eval(1), None)
+        self.assertEqual(game.eval(2), chess.engine.PovScore(chess.engine.Mate(-3), chess.WHITE))
+        self.assertEqual(game.eval(3), chess.engine.PovScore(chess.engine.Mate(1), chess.WHITE))
+        self.assertEqual(list(game.nags), [0, chess.pgn.NAG_MISTAKE, 0, 0, 0])
+
+        copy = chess.pgn.CompactGame.from_game(game.to_game())
+        self.assertEqual(copy.moves, game.moves)
+        self.assertEqual(copy.evals, game.evals)
+        self.assertEqual(copy.nags, game.nags)
+        self.assertEqual(copy.clock(0), 180.5)
+
+        game = chess.pgn.read_game(pgn, Visitor=chess.pgn.CompactGameBuilder)
+        self.assertIsNone(game.clocks)
+        self.assertIsNone(game.evals)
+        self.assertIsNone(game.nags)
+        self.assertEqual(game.fen, chess.variant.CrazyhouseBoard.starting_fen)
+        self.assertEqual(game.mainline_moves()[-2:], [chess.Move.from_uci("P@d5"), chess.Move.from_uci("P@e4")])
+        board = game.board()
+        for move in game.mainline_moves():
+            board.push(move)
+        self.assertEqual(board, game.to_game().end().board())
+
+        # Huge evaluations do not overflow.
+        pgn = io.StringIO("1. e4 { [%eval 9999999999.99] } e5 { [%eval -9999999999] } 2. Nf3 { [%eval #999999] } *")
+        game = chess.pgn.read_game(pgn, Visitor=chess.pgn.CompactGameBuilder)
+        limit = chess.pgn.COMPACT_MATE_SCORE // 2
+        self.assertEqual(list(game.evals), [limit, -limit, chess.pgn.COMPACT_NO_EVAL])
+        self.assertEqual(game.eval(0), chess.engine.PovScore(chess.engine.Cp(limit), chess.WHITE))
+        self.assertIsNone(game.eval(2))
+
+    def test_annotations_builder(self):
+        pgn = io.StringIO(textwrap.dedent("""\
+            [Event "Annotations"]
+
+            { [%clk 0:01:00] } 1. e4 { [%clk 0:03:00.5] [%emt 0:00:02] [%eval 0.17,20] } ( 1. d4 { [%clk 0:00:01] } ) 1... e5 { No annotations } 2. Nf3 { [%csl Gd4] [%cal Rf3e5,Yd1h5] } Nc6 { [%eval #-2] } *
+            """))
+
+        annotations = chess.pgn.read_game(pgn, Visitor=chess.pgn.AnnotationsBuilder)
+        self.assertEqual(annotations.headers["Event"], "Annotations")
+        self.assertEqual(annotations.headers["Result"], "*")
+        self.assertEqual(annotations.moves, [chess.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "g1f3", "b8c6"]])
+        self.assertEqual(annotations.clocks, [180.5, None, None, None])
+        self.assertEqual(annotations.emts, [2.0, None, None, None])
+        self.assertEqual(annotations.evals, [chess.engine.PovScore(chess.engine.Cp(17), chess.WHITE), None, None, chess.engine.PovScore(chess.engine.Mate(-2), chess.WHITE)])
+        self.assertEqual(annotations.eval_depths, [20, None, None, None])
+        self.assertEqual([[arrow.pgn() for arrow in arrows] for arrows in annotations.arrows], [[], [], ["Gd4", "Rf3e5", "Yd1h5"], []])
+        self.assertEqual(annotations.errors, [])
+
+        game = chess.pgn.read_game(io.StringIO(pgn.getvalue()))
+        for index, node in enumerate(game.mainline()):
+            self.assertEqual(annotations.clocks[index], node.clock())
+            self.assertEqual(annotations.emts[index], node.emt())
+            self.assertEqual(annotations.evals[index], node.eval())
+            self.assertEqual(annotations.eval_depths[index], node.eval_depth())
+
+    def test_columnar_exporter(self):
+        import json
+        import math
+        import struct
+
+        pgn = io.StringIO(textwrap.dedent("""\
+            [White "Alice"]
+            [Black "Bob"]
+
+            1. e4 { [%clk 0:03:00] [%eval 0.17] } ( 1. d4 { [%clk 0:00:01] } ) 1... e5 2. Nf3 { [%eval #-2] } *
+
+            [White "Bob"]
+            [Black "Alice"]
+            [Result "1-0"]
+            [FEN "4k3/8/8/8/8/8/8/4K2R w K - 0 10"]
+
+            10. Rh8+ 1-0
+            """))
+
+        exporter = chess.pgn.ColumnarExporter(headers=["White", "Result", "Site"])
+        self.assertEqual(chess.pgn.read_game(pgn, Visitor=lambda: exporter), 3)
+        self.assertEqual(chess.pgn.read_game(pgn, Visitor=lambda: exporter), 1)
+        self.assertIsNone(chess.pgn.read_game(pgn, Visitor=lambda: exporter))
+
+        self.assertEqual(exporter.games, 2)
+        self.assertEqual(list(exporter.columns["game"]), [0, 0, 0, 1])
+        self.assertEqual(list(exporter.columns["ply"]), [0, 1, 2, 18])
+        self.assertEqual([chess.pgn._unpack_move(packed).uci() for packed in exporter.columns["move"]], ["e2e4", "e7e5", "g1f3", "h1h8"])
+        self.assertEqual([exporter.values("san")[index] for index in exporter.columns["san"]], ["e4", "e5", "Nf3", "Rh8+"])
+        self.assertEqual(exporter.columns["clock"][0], 180)
+        self.assertTrue(all(math.isnan(clock) for clock in exporter.columns["clock"][1:]))
+        self.assertEqual(list(exporter.columns["eval"]), [17, chess.pgn.COMPACT_NO_EVAL, -chess.pgn.COMPACT_MATE_SCORE + 2, chess.pgn.COMPACT_NO_EVAL])
+        self.assertEqual(exporter.values("header_White"), ["Alice", "Bob"])
+        self.assertEqual([exporter.values("header_Result")[index] for index in exporter.columns["header_Result"]], ["*", "1-0"])
+        self.assertEqual(list(exporter.columns["header_Site"]), [0, 0])
+        self.assertEqual(exporter.values("header_Site"), [""])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exporter.save(tmpdir)
+            with open(os.path.join(tmpdir, "columns.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.assertEqual(manifest["columns"]["move"], {"dtype": "<u2", "length": 4})
+            self.assertEqual(manifest["dictionaries"]["san"], ["e4", "e5", "Nf3", "Rh8+"])
+            with open(os.path.join(tmpdir, "ply.bin"), "rb") as f:
+                self.assertEqual(struct.unpack("<4I", f.read()), (0, 1, 2, 18))
+
+        try:
+            import numpy
+        except ImportError:
+            return
+
+        arrays = exporter.to_numpy()
+        self.assertEqual(arrays["ply"].tolist(), [0, 1, 2, 18])
+        self.assertEqual(arrays["san_values"].tolist(), ["e4", "e5", "Nf3", "Rh8+"])
+
+        f = io.BytesIO()
+        exporter.save_npz(f)
+        f.seek(0)
+        with numpy.load(f) as npz:
+            self.assertEqual(npz["header_White"].tolist(), [0, 1])
+
+    def test_build_position_stats(self):
+        pgn = textwrap.dedent("""\
+            [Result "1-0"]
+
+            1. e4 e5 ( 1... c5 ) 2. Nf3 1-0
+
+            [Result "0-1"]
+
+            1. e4 c5 2. Nf3 0-1
+
+            [Result "1/2-1/2"]
+
+            1. d4 d5 1/2-1/2
+
+            1. e4 e5 2. Nc3 *
+            """)
+
+        stats = list(chess.pgn.build_position_stats([io.StringIO(pgn)], max_ply=2))
+        keys = [(s.key, chess.pgn._pack_move(s.move)) for s in stats]
+        self.assertEqual(keys, sorted(keys))
+
+        by_position = {(s.key, s.move.uci()): (s.games, s.white, s.draws, s.black) for s in stats}
+        root = chess.polyglot.zobrist_hash(chess.Board())
+        after_e4 = chess.polyglot.zobrist_hash(chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"))
+        self.assertEqual(by_position[(root, "e2e4")], (3, 1, 0, 1))
+        self.assertEqual(by_position[(root, "d2d4")], (1, 0, 1, 0))
+        self.assertEqual(by_position[(after_e4, "e7e5")], (2, 1, 0, 0))
+        self.assertEqual(by_position[(after_e4, "c7c5")], (1, 0, 0, 1))
+        self.assertEqual(len(stats), 5)
+
+        # Spill after every game and merge in multiple passes.
+        fan_in = chess.pgn.POSITION_STATS_MERGE_FAN_IN
+        chess.pgn.POSITION_STATS_MERGE_FAN_IN = 2
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                spilled = list(chess.pgn.build_position_stats([io.StringIO(pgn)], max_ply=2, memory_mb=0, directory=tmpdir))
+                self.assertEqual(os.listdir(tmpdir), [])
+        finally:
+            chess.pgn.POSITION_STATS_MERGE_FAN_IN = fan_in
+        self.assertEqual(spilled, stats)
+
+        stats = list(chess.pgn.build_position_stats([io.StringIO(pgn)], max_ply=4, where=[("Result", "==", "1-0")]))
+        self.assertEqual(sum(s.games for s in stats), 3)
+
+    def test_deduplicate(self):
+        import codecs
+        import functools
+
+        pgn = textwrap.dedent("""\
+            [Event "A"]
+            [White "Kasparov"]
+
+            1. e4 e5 2. Nf3 *
+
+            [Event "B"]
+            [White "Kasparov"]
+
+            1. e4 { Best by test } e5 ( 1... c5 ) 2. Ng1f3 1-0
+
+            [Event "C"]
+            [White "Karpov"]
+
+            1. e4 e5 2. Nf3 *
+
+            [Event "D"]
+            [FEN "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"]
+
+            1... e5 2. Nf3 *
+            """)
+
+        fingerprints = [fingerprint for _, fingerprint in chess.pgn.iter_games(io.StringIO(pgn), Visitor=chess.pgn.FingerprintBuilder)]
+        self.assertEqual(len(fingerprints[0]), chess.pgn.FINGERPRINT_SIZE)
+        self.assertEqual(fingerprints[0], fingerprints[1])
+        self.assertEqual(fingerprints[0], fingerprints[2])
+        self.assertNotEqual(fingerprints[0], fingerprints[3])
+
+        Visitor = functools.partial(chess.pgn.FingerprintBuilder, headers=["White"])
+        fingerprints = [fingerprint for _, fingerprint in chess.pgn.iter_games(io.StringIO(pgn), Visitor=Visitor)]
+        self.assertEqual(fingerprints[0], fingerprints[1])
+        self.assertNotEqual(fingerprints[0], fingerprints[2])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "games.pgn")
+            with open(path, "wb") as f:
+                f.write(codecs.BOM_UTF8 + pgn.encode("utf-8"))
+
+            seen_path = os.path.join(tmpdir, "seen.bin")
+            with chess.pgn.FingerprintSet(seen_path, capacity=2) as seen:
+                output = io.BytesIO()
+                self.assertEqual(chess.pgn.deduplicate([path, path], output, seen=seen), (2, 6))
+                games = output.getvalue().decode("utf-8")
+                self.assertTrue(games.startswith("[Event \"A\"]"))
+                self.assertEqual(games.count("[Event"), 2)
+                self.assertIn("[Event \"D\"]", games)
+                self.assertEqual(len(seen), 2)
+
+            # Reopen, grow past the initial capacity.
+            with chess.pgn.FingerprintSet(seen_path) as seen:
+                self.assertEqual(len(seen), 2)
+                self.assertEqual(chess.pgn.deduplicate([path], io.BytesIO(), seen=seen), (0, 4))
+                for i in range(1, 101):
+                    self.assertTrue(seen.add(i.to_bytes(chess.pgn.FINGERPRINT_SIZE, "big")))
+                self.assertEqual(len(seen), 102)
+                self.assertGreaterEqual(seen.capacity, 2 * len(seen))
+                self.assertTrue(all(i.to_bytes(chess.pgn.FINGERPRINT_SIZE, "big") in seen for i in range(1, 101)))
+                self.assertNotIn(b"x" * chess.pgn.FINGERPRINT_SIZE, seen)
+                with self.assertRaises(ValueError):
+                    seen.add(b"short")
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["games.pgn", "seen.bin"])
+            with chess.pgn.FingerprintSet(seen_path) as seen:
+                self.assertEqual(len(seen), 102)
+
+            output = io.BytesIO()
+            self.assertEqual(chess.pgn.deduplicate([path], output, headers=["White"]), (3, 1))
+
+    def test_position_index(self):
+        pgn = textwrap.dedent("""\
+            [Event "A"]
+
+            1. e4 e5 ( 1... c5 2. Nf3 ) 2. Nf3 Nc6 *
+
+            [Event "B"]
+
+            1. Nf3 e5 2. e4 Nc6 3. Bb5 *
+
+            [Event "C"]
+            [Result "1-0"]
+
+            1. d4 d5 1-0
+
+            [Event "D"]
+            [FEN "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"]
+
+            1... e5 *
+            """).encode("utf-8")
+
+        offsets = [offset for offset, _ in chess.pgn.iter_games(io.BytesIO(pgn), Visitor=chess.pgn.HeadersBuilder)]
+
+        after_e4 = chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+        transposed = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+        after_c5 = chess.Board("rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "games.pgn")
+            with open(path, "wb") as f:
+                f.write(pgn)
+
+            with chess.pgn.PositionIndex(path) as index:
+                self.assertEqual(index.lookup(chess.Board()), offsets[:3])
+                self.assertEqual(index.lookup(after_e4), [offsets[0], offsets[3]])
+                self.assertEqual(index.lookup(transposed), offsets[:2])
+                self.assertEqual(index.lookup(chess.polyglot.zobrist_hash(transposed)), offsets[:2])
+                self.assertEqual(index.lookup(after_c5), [])
+                self.assertEqual([headers["Event"] for _, headers in index.find_games(transposed, Visitor=chess.pgn.HeadersBuilder)], ["A", "B"])
+                self.assertEqual(index.read_game(offsets[2]).headers["Result"], "1-0")
+                self.assertEqual(len(index), 5 + 6 + 3 + 2)
+
+            # Rebuilt with different parameters, spilling after every game.
+            fan_in = chess.pgn.POSITION_INDEX_MERGE_FAN_IN
+            chess.pgn.POSITION_INDEX_MERGE_FAN_IN = 2
+            try:
+                index_path = chess.pgn.build_position_index(path, max_ply=2, memory_mb=0, where=[("Event", "!=", "C")])
+            finally:
+                chess.pgn.POSITION_INDEX_MERGE_FAN_IN = fan_in
+            self.assertEqual(sorted(os.listdir(tmpdir)), ["games.pgn", "games.pgn.pos"])
+
+            with chess.pgn.PositionIndex(path, index_path=index_path, max_ply=2, where=[("Event", "!=", "C")]) as index:
+                self.assertEqual(index.lookup(chess.Board()), offsets[:2])
+                self.assertEqual(index.lookup(transposed), [])
+                self.assertEqual(len(index), 3 + 3 + 2)
+
+            # Rebuilt with another header filter.
+            with chess.pgn.PositionIndex(path, index_path=index_path, max_ply=2, where=[("Event", "!=", "A")]) as index:
+                self.assertEqual(index.lookup(chess.Board()), offsets[1:3])
+                self.assertEqual(len(index), 3 + 3 + 2)
+
+    def test_opening_classifier(self):
+        import functools
+
+        tsv = textwrap.dedent("""\
+            # name\tcode\tmoves
+            King's Pawn Game\tB00\t1. e4
+            Open Game\tC20\t1. e4 e5
+            Italian Game\tC50\t1. e4 e5 2. Nf3 Nc6 3. Bc4
+            Two Knights Defense\tC55\t1.e4 e5 2.Nf3 Nc6 3.Bc4 Nf6
+            Queen's Gambit\tD06\t1. d4 d5 2. c4
+            """)
+        table = chess.pgn.read_opening_table(io.StringIO(tsv))
+        self.assertEqual(len(table), 5)
+        self.assertEqual(table.max_ply, 6)
+
+        pgn = textwrap.dedent("""\
+            [Event "Trie"]
+
+            1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 ( 3... Nf6 ) 4. c3 *
+
+            [Event "Transposition"]
+            [ECO "?"]
+
+            1. e4 e5 2. Bc4 Nc6 3. Nf3 Nf6 4. d3 *
+
+            [Event "Deviation"]
+
+            1. e4 c5 ( 1... e5 ) 2. Nf3 *
+
+            [Event "Setup"]
+            [FEN "rnbqkbnr/pppppppp/8/8/3P4/8/PPP1PPPP/RNBQKBNR b KQkq - 0 1"]
+
+            1... d5 2. c4 *
+
+            [Event "Unknown"]
+
+            1. Nf3 *
+            """)
+
+        Visitor = functools.partial(chess.pgn.OpeningClassifier, table)
+        openings = [opening.eco if opening else None for _, opening in chess.pgn.iter_games(io.StringIO(pgn), Visitor=Visitor)]
+        self.assertEqual(openings, ["C50", "C55", "B00", "D06", None])
+
+        games = [game for _, game in chess.pgn.iter_games(io.StringIO(pgn), Visitor=functools.partial(chess.pgn.OpeningGameBuilder, table))]
+        self.assertEqual([game.headers.get("ECO") for game in games], ["C50", "?", "B00", "D06", None])
+        self.assertEqual(games[0].headers["Opening"], "Italian Game")
+        self.assertEqual(games[1].headers["Opening"], "Two Knights Defense")
+        self.assertEqual(games[0].end().parent.parent.variation(1).move, chess.Move.from_uci("g8f6"))
+        self.assertEqual([table.classify(game) and table.classify(game).eco for game in games], openings)
+
+        games = [game for _, game in chess.pgn.iter_games(io.StringIO(pgn), Visitor=functools.partial(chess.pgn.OpeningGameBuilder, table, overwrite=True))]
+        self.assertEqual(games[1].headers["ECO"], "C55")
+
+        # Header row with a different order of columns.
+        table = chess.pgn.read_opening_table(io.StringIO("eco\tname\tpgn\nC50\tItalian Game\t1. e4 e5 2. Nf3 Nc6 3. Bc4\n"))
+        opening = table.classify([chess.Move.from_uci(uci) for uci in ["e2e4", "e7e5", "g1f3", "b8c6", "f1c4"]])
+        self.assertEqual(opening, chess.pgn.Opening("C50", "Italian Game", opening.moves))
+        self.assertEqual(len(opening.moves), 5)
+
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            chess.pgn.read_opening_table(io.StringIO("Open Game\tC20\t1. e4 e5\nBroken\tA00\t1. e5\n"))
+        with self.assertRaises(ValueError):
+            table.add("A00", "Illegal", [chess.Move.from_uci("e2e5")])
+
+    def test_open_pgn(self):
+        import bz2
+        import gzip
+        import lzma
+
+        with open("data/pgn/kasparov-deep-blue-1997.pgn", "rb") as f:
+            data = f.read()
+
+        with open("data/pgn/kasparov-deep-blue-1997.pgn", "rb") as f:
+            expected = [(offset, str(game)) for offset, game in chess.pgn.iter_games(f)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, compress in [("games.pgn", bytes), ("games.pgn.gz", gzip.compress), ("games.pgn.bz2", bz2.compress), ("games.pgn.xz", lzma.compress)]:
+                path = os.path.join(tmpdir, name)
+                with open(path, "wb") as f:
+                    f.write(compress(data))
+
+                with chess.pgn.open_pgn(path, "rb", block_size=100, queue_size=2) as pgn:
+                    self.assertEqual([(offset, str(game)) for offset, game in chess.pgn.iter_games(pgn)], expected)
+
+                with chess.pgn.open_pgn(path) as pgn:
+                    self.assertEqual(str(chess.pgn.read_game(pgn)), expected[0][1])
+
+                # Close without consuming everything.
+                pgn = chess.pgn.open_pgn(path, block_size=10, queue_size=1)
+                chess.pgn.read_game(pgn, Visitor=chess.pgn.HeadersBuilder)
+                pgn.close()
+
+            # Errors are raised in the reading thread.
+            path = os.path.join(tmpdir, "truncated.pgn.gz")
+            with open(path, "wb") as f:
+                f.write(gzip.compress(data)[:1000])
+            with chess.pgn.open_pgn(path) as pgn:
+                with self.assertRaises(EOFError):
+                    pgn.read()
+
+            with self.assertRaises(ValueError):
+                chess.pgn.open_pgn(path, "w")
+
+    def test_scan_headers(self):
+        data = textwrap.dedent("""\
+            % Escaped { line
+            [Event "A"]
+
+            [Site "B"]
+            1. e4 { Comment
+
+            with blank line } e5 ; Not a { comment
+            2. Nf3 *
+
+            ; Comment between games
+            [Event "C"]
+            [Malformed
+              [White "X"]
+
+
+            1. d4 d5
+
+            { Only comment }
+            1. c4
+
+            \ufeff[Event "D"]
+            [Black "É"]
+            1. e4 { Unterminated
+            """).encode("utf-8")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "games.pgn")
+            for newline in [b"\n", b"\r\n"]:
+                with open(path, "wb") as f:
+                    f.write(data.replace(b"\n", newline))
+
+                with open(path, "rb") as f:
+                    expected = [(offset, dict(headers)) for offset, headers in chess.pgn.iter_games(f, Visitor=chess.pgn.HeadersBuilder)]
+                self.assertEqual(len(expected), 5)
+
+                results = [(offset, dict(headers)) for offset, headers in chess.pgn.scan_headers(path)]
+                self.assertEqual(results, expected)
+
+                results = [dict(headers) for _, headers in chess.pgn.scan_headers(path, tags=["Event", "White"])]
+                self.assertEqual(results, [{"Event": "A"}, {"Event": "C", "White": "X"}, {}, {}, {"Event": "D"}])
+
+            # Line comments and escaped lines at the end of the file.
+            for end in [b";", b"; Comment", b"\n%", b"\n% Escaped", b"\n;"]:
+                with open(path, "wb") as f:
+                    f.write(b"[Event \"A\"]\n\n1. e4 ; c\n%\n2. d4 *\n\n[Event \"B\"]\n\n1. e4 e5 0-1" + end)
+                self.assertEqual([(offset, dict(headers)) for offset, headers in chess.pgn.scan_headers(path)], [(0, {"Event": "A"}), (34, {"Event": "B"})])
+                with chess.pgn.IndexedPGN(path, index_path=path + ".idx") as pgn:
+                    self.assertEqual(len(pgn), 2)
+
+            open(path, "wb").close()
+            self.assertEqual(list(chess.pgn.scan_headers(path)), [])
+
+    def test_read_game_where(self):
+        pgn = io.StringIO(textwrap.dedent("""\
+            [White "A"]
+            [WhiteElo "2400"]
+
+            1. e4 { Blank
+
+            line } e5 *
+
+            [White "B"]
+            [WhiteElo "2600"]
+
+            1. d4 d5 *
+
+            [White "C"]
+            [WhiteElo "?"]
+
+            1. c4 *
+
+            [White "D"]
+
+            1. Nf3 *
+            """))
+
+        class RecordingVisitor(chess.pgn.HeadersBuilder):
+            instances = 0
+            games = 0
+
+            def __init__(self):
+                super().__init__()
+                RecordingVisitor.instances += 1
+
+            def begin_game(self):
+                RecordingVisitor.games += 1
+
+        headers = chess.pgn.read_game(pgn, Visitor=RecordingVisitor, where=[("WhiteElo", ">=", 2500)])
+        self.assertEqual(headers["White"], "B")
+        self.assertEqual(RecordingVisitor.games, 1)
+        self.assertEqual(RecordingVisitor.instances, 1)
+        self.assertEqual(chess.pgn.read_game(pgn, where=[("WhiteElo", ">=", 2500)]), None)
+
+        pgn.seek(0)
+        game = chess.pgn.read_game(pgn, where=lambda headers: "WhiteElo" not in headers)
+        self.assertEqual(game.headers["White"], "D")
+        self.assertEqual(game.next().move, chess.Move.from_uci("g1f3"))
+
+        pgn.seek(0)
+        results = [headers["White"] for _, headers in chess.pgn.iter_games(pgn, Visitor=chess.pgn.HeadersBuilder, where=[("WhiteElo", "!=", "2600"), ("White", "in", ["B", "C", "D"])])]
+        self.assertEqual(results, ["C"])
+
+        with self.assertRaises(ValueError):
+            chess.pgn.read_game(pgn, where=[("White", "~", "A")])
+
+    def test_pickle_long_game(self):
+        board = chess.Board("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+        for _ in range(500):
+            for uci in ["e1e2", "e8e7", "e2e1", "e7e8"]:
+                board.push_uci(uci)
+        game = chess.pgn.Game.from_board(board)
+        game.variations[0].add_variation(chess.Move.from_uci("e8d8")).comments = ["Variation"]
+
+        copied = pickle.loads(pickle.dumps(game))
+        self.assertEqual(str(copied), str(game))
+        self.assertIs(copied.end().game(), copied)
+
+    def test_board_checkpoints(self):
+        board = chess.Board()
+        for _ in range(10):
+            for uci in ["g1f3", "g8f6", "f3g1", "f6g8"]:
+                board.push_uci(uci)
+        game = chess.pgn.Game.from_board(board)
+        nodes = list(game.mainline())
+
+        interval, max_checkpoints = chess.pgn.BOARD_CHECKPOINT_INTERVAL, chess.pgn.MAX_BOARD_CHECKPOINTS
+        chess.pgn.BOARD_CHECKPOINT_INTERVAL = 16
+        try:
+            self.assertEqual(nodes[-1].board().move_stack, board.move_stack)
+            for ply, node in reversed(list(enumerate(nodes, 1))):
+                self.assertEqual(node.ply(), ply)
+                self.assertEqual(node.board().move_stack, board.move_stack[ply // 16 * 16:ply])
+                self.assertEqual(node.board(), chess.Board(node.board().fen()))
+            self.assertIsNotNone(nodes[31]._board_checkpoint)
+            self.assertNotIn("_board_checkpoint", pickle.loads(pickle.dumps(game)).end().__dict__)
+
+            # Changing the starting position invalidates checkpoints.
+            game.setup("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 5")
+            expected = game.board()
+            for move in board.move_stack[:34]:
+                expected.push(move)
+            self.assertEqual(nodes[33].ply(), 42)
+            self.assertEqual(nodes[33].board(), expected)
+            self.assertEqual(nodes[31].ply(), 40)
+
+            # Only the newest checkpoints are kept.
+            chess.pgn.MAX_BOARD_CHECKPOINTS = 1
+            game.end().board()
+            self.assertEqual([node for node in nodes if node._board_checkpoint is not None], [game.end()])
+        finally:
+            chess.pgn.BOARD_CHECKPOINT_INTERVAL, chess.pgn.MAX_BOARD_CHECKPOINTS = interval, max_checkpoints
+
     def test_utf8_bom(self):
         not_utf8_sig = "utf-8"
         with open("data/pgn/utf8-bom.pgn", encoding=not_utf8_sig) as pgn:
@@ -4366,6 +5327,21 @@ class GaviotaTestCase(unittest.TestCase):
 
         self.assertFalse(self.tablebase.available_tables)
 
+    def test_threads(self):
+        boards = []
+        for square in chess.SQUARES[8:56]:
+            for piece in "PNQ":
+                board = chess.Board("8/8/8/1k6/8/8/8/5K2 w - - 0 1")
+                board.set_piece_at(square, chess.Piece.from_symbol(piece))
+                if board.is_valid():
+                    boards.append(board)
+
+        expected = [self.tablebase.probe_dtm(board) for board in boards]
+        self.tablebase.block_cache.clear()
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            self.assertEqual(list(executor.map(self.tablebase.probe_dtm, boards)), expected)
+
     @catchAndSkip(chess.gaviota.MissingTableError, "need KPPvKP.gtb.cp4")
     def test_two_ep(self):
         board = chess.Board("8/8/8/8/5pPp/8/5K1k/8 b - g3 0 61")
@@ -4411,6 +5387,59 @@ class SvgTestCase(unittest.TestCase):
         self.assertIn("id=\"white-king\"", svg)
 
 
+class SearchTestCase(unittest.TestCase):
+
+    def test_mate_in_one(self):
+        board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4")
+        self.assertEqual(board.variation_san(chess.search.find_mate(board, 3)), "4. Qxf7#")
+        self.assertEqual(board.fen(), "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4")
+
+    def test_mate_in_two(self):
+        board = chess.Board("r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 10")
+        self.assertIsNone(chess.search.find_mate(board, 1))
+        self.assertEqual(board.variation_san(chess.search.find_mate(board, 2)), "10. Nf6+ gxf6 11. Bxf7#")
+
+    def test_mate_in_three(self):
+        board = chess.Board("r1b1kb1r/pppp1ppp/5q2/4n3/3KP3/2N3PN/PPP4P/R1BQ1B1R b kq - 0 1")
+        self.assertEqual(board.variation_san(chess.search.find_mate(board, 3)), "1... Bc5+ 2. Kxc5 Qb6+ 3. Kd5 Qd6#")
+        self.assertEqual(len(chess.search.find_mate(board, 3, checks_only=True)), 5)
+
+    def test_no_mate(self):
+        self.assertIsNone(chess.search.find_mate(chess.Board(), 2))
+        self.assertIsNone(chess.search.find_mate(chess.Board("4k3/8/8/8/8/8/8/4K3 w - - 0 1"), 3))
+
+        # Stalemate is not a win.
+        board = chess.Board("7k/8/6Q1/8/8/8/8/K7 w - - 0 1")
+        self.assertNotIn(chess.Move.from_uci("g6g5"), chess.search.find_mate(board, 2) or [])
+
+    def test_variant(self):
+        board = chess.variant.KingOfTheHillBoard("8/8/8/8/8/8/4K3/k7 w - - 0 1")
+        self.assertEqual(len(chess.search.find_mate(board, 2)), 3)
+
+        board = chess.variant.ThreeCheckBoard("4k3/8/8/8/8/8/8/3QK3 w - - 1+1 0 1")
+        self.assertEqual(len(chess.search.find_mate(board, 1)), 1)
+
+
+class BenchTestCase(unittest.TestCase):
+
+    def test_run(self):
+        report = chess.bench.run(["fen", "does-not-exist"], repeat=1)
+        self.assertEqual(list(report["benchmarks"]), ["fen"])
+        self.assertGreater(report["benchmarks"]["fen"]["ops"], 0)
+
+    def test_missing_data(self):
+        with tempfile.TemporaryDirectory() as root:
+            report = chess.bench.run(["pgn"], root=root, repeat=1)
+        self.assertFalse(report["benchmarks"])
+        self.assertIn("pgn", report["skipped"])
+
+    def test_compare(self):
+        baseline = {"benchmarks": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}}}
+        report = {"benchmarks": {"a": {"seconds": 1.05}, "b": {"seconds": 1.5}, "d": {"seconds": 9.0}}}
+        self.assertEqual(list(chess.bench.compare(report, baseline, threshold=0.1)), [("b", 1.0, 1.5)])
+        self.assertEqual(list(chess.bench.compare(report, baseline, threshold=0.01)), [("a", 1.0, 1.05), ("b", 1.0, 1.5)])
+
+
 class SuicideTestCase(unittest.TestCase):
 
     def test_parse_san(self):
@@ -4776,6 +5805,22 @@ class ThreeCheckTestCase(unittest.TestCase):
         board = chess.variant.ThreeCheckBoard(fen)
         self.assertEqual(board.copy().fen(), fen)
 
+    def test_copy_on_write_stack(self):
+        board = chess.variant.ThreeCheckBoard()
+        board.push_san("e4")
+        board.push_san("f5")
+
+        copy = board.copy()
+        copy.push_san("Qh5+")
+        self.assertEqual(copy.remaining_checks[chess.WHITE], 2)
+        board.push_san("Qf3")
+        board.pop()
+        board.pop()
+        self.assertEqual(copy.pop(), chess.Move.from_uci("d1h5"))
+        self.assertEqual(copy.remaining_checks[chess.WHITE], 3)
+        self.assertEqual(copy.fen(), "rnbqkbnr/ppppp1pp/8/5p2/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 3+3 0 2")
+        self.assertEqual(board.fen(), "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 3+3 0 1")
+
     def test_mirror_checks(self):
         fen = "3R4/1p3rpk/p4p1p/2B1n3/8/2P1PP2/bPN4P/6K1 w - - 5 29 +2+0"
         board = chess.variant.ThreeCheckBoard(fen)